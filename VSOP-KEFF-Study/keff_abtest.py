@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+求解程序A/B对比模块
+同一组参数点分别用两个求解程序（如VSOP99_11-MS.exe与VSOP99_11-ZUT.exe）计算，
+按参数点配对比较运行时间、CPU时间和峰值内存（差值与比值的置信区间），并检查每个点的keff是否一致
+仅使用Python标准库
+"""
+
+import math
+import csv
+from statistics import NormalDist, mean, stdev
+
+# 对比的资源指标 (结果字段, 名称, 单位换算系数, 单位)
+METRICS = (
+    ('wall_time', '运行时间', 1.0, 's'),
+    ('cpu_time', 'CPU时间', 1.0, 's'),
+    ('peak_memory', '峰值内存', 1.0 / 2 ** 20, 'MB'),
+)
+
+
+def t_quantile(p, dof):
+    """t分布的分位数
+
+    自由度为1、2时用解析式（精确值），不小于3时用Cornish-Fisher展开（误差小于0.5%）
+    """
+    if dof < 1:
+        raise ValueError("自由度必须不小于1")
+    if dof == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    n = float(dof)
+    return (z + (z ** 3 + z) / (4 * n)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * n ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * n ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * n ** 4))
+
+
+def paired_interval(differences, confidence=0.95):
+    """配对差值均值的t置信区间
+
+    Returns:
+        (均值, 下限, 上限)，差值少于2个时区间为None
+    """
+    n = len(differences)
+    if n == 0:
+        return None, None, None
+    center = mean(differences)
+    if n < 2:
+        return center, None, None
+    half = t_quantile(0.5 + confidence / 2, n - 1) * stdev(differences) / math.sqrt(n)
+    return center, center - half, center + half
+
+
+class PairedComparison:
+    """两个求解程序在同一组参数点上的配对对比
+
+    Args:
+        label_a, label_b: 两个求解程序的名称
+        confidence: 置信水平
+        keff_tolerance: keff之差的绝对值超过该值的点视为不一致
+    """
+
+    def __init__(self, label_a, label_b, confidence=0.95, keff_tolerance=5e-5):
+        self.label_a = label_a
+        self.label_b = label_b
+        self.confidence = confidence
+        self.keff_tolerance = keff_tolerance
+        self.pairs = []  # (参数值, 重复序号, A的结果, B的结果)
+        self.unpaired = 0  # 只有一个求解程序成功的点
+
+    def add(self, value, repeat, result_a, result_b):
+        """加入一个参数点（一次重复）的两个结果，任一为None时只计数"""
+        if result_a is None or result_b is None:
+            self.unpaired += 1
+            return
+        self.pairs.append((value, repeat, result_a, result_b))
+
+    def metric(self, field):
+        """某个资源指标的配对统计
+
+        Returns:
+            {'n', 'mean_a', 'mean_b', 'diff'（B-A的均值与区间）, 'ratio'（B/A几何平均比值与区间）}，
+            没有两边都有该指标的配对时返回None
+        """
+        values = [(a[field], b[field]) for _, _, a, b in self.pairs
+                  if a.get(field) is not None and b.get(field) is not None]
+        if not values:
+            return None
+        diff = paired_interval([b - a for a, b in values], self.confidence)
+        logs = [math.log(b / a) for a, b in values if a > 0 and b > 0]
+        ratio = tuple(None if x is None else math.exp(x) for x in paired_interval(logs, self.confidence))
+        return {
+            'n': len(values),
+            'mean_a': mean(a for a, _ in values),
+            'mean_b': mean(b for _, b in values),
+            'diff': diff,
+            'ratio': ratio,
+        }
+
+    def keff_agreement(self):
+        """keff一致性：差值（B-A）的均值与区间、最大绝对差值、不一致的点"""
+        diffs = [(value, b['keff'] - a['keff']) for value, _, a, b in self.pairs]
+        if not diffs:
+            return None
+        return {
+            'diff': paired_interval([d for _, d in diffs], self.confidence),
+            'max_abs': max(abs(d) for _, d in diffs),
+            'disagree': sorted((value, d) for value, d in diffs if abs(d) > self.keff_tolerance),
+        }
+
+    def report_lines(self):
+        pct = self.confidence * 100
+        lines = [f"{self.label_a} vs {self.label_b}: {len(self.pairs)}对有效结果"
+                 + (f"（另有{self.unpaired}个点只有一方成功）" if self.unpaired else "")]
+        for field, name, scale, unit in METRICS:
+            summary = self.metric(field)
+            if summary is None:
+                lines.append(f"{name}: 无数据")
+                continue
+            diff, low, high = summary['diff']
+            text = (f"{name}: {self.label_a} {summary['mean_a'] * scale:.3g} {unit}，"
+                    f"{self.label_b} {summary['mean_b'] * scale:.3g} {unit}，差值(B-A) {diff * scale:+.3g} {unit}")
+            if low is not None:
+                text += f"（{pct:.0f}%置信区间 [{low * scale:+.3g}, {high * scale:+.3g}]）"
+            ratio, r_low, r_high = summary['ratio']
+            if ratio is not None:
+                text += f"，比值(B/A) {ratio:.3f}"
+                if r_low is not None:
+                    text += f" [{r_low:.3f}, {r_high:.3f}]"
+            lines.append(text)
+        agreement = self.keff_agreement()
+        if agreement is not None:
+            diff, low, high = agreement['diff']
+            text = f"keff差值(B-A): 平均 {diff:+.2e}"
+            if low is not None:
+                text += f"（{pct:.0f}%置信区间 [{low:+.2e}, {high:+.2e}]）"
+            text += f"，最大绝对差 {agreement['max_abs']:.2e}"
+            lines.append(text)
+            if agreement['disagree']:
+                lines.append(f"keff差值超过{self.keff_tolerance:g}的点（{len(agreement['disagree'])}个）: "
+                             + ", ".join(f"{value:.4E} ({d:+.2e})" for value, d in agreement['disagree'][:10]))
+            else:
+                lines.append(f"所有点的keff差值均不超过{self.keff_tolerance:g}")
+        return lines
+
+    def save_csv(self, filename):
+        """每个配对一行：两边的keff、运行时间、CPU时间和峰值内存"""
+        a, b = self.label_a, self.label_b
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Line87_Parameter', 'Repeat', f'KEFF_{a}', f'KEFF_{b}', 'KEFF_Diff',
+                             f'Wall_s_{a}', f'Wall_s_{b}', f'CPU_s_{a}', f'CPU_s_{b}',
+                             f'Peak_Memory_MB_{a}', f'Peak_Memory_MB_{b}'])
+
+            def fmt(result, field, scale=1.0):
+                value = result.get(field)
+                return '' if value is None else f"{value * scale:.3f}"
+
+            for value, repeat, ra, rb in sorted(self.pairs, key=lambda p: (p[0], p[1])):
+                writer.writerow([f"{value:.6E}", repeat, f"{ra['keff']:.6f}", f"{rb['keff']:.6f}",
+                                 f"{rb['keff'] - ra['keff']:+.2e}",
+                                 fmt(ra, 'wall_time'), fmt(rb, 'wall_time'),
+                                 fmt(ra, 'cpu_time'), fmt(rb, 'cpu_time'),
+                                 fmt(ra, 'peak_memory', 1.0 / 2 ** 20), fmt(rb, 'peak_memory', 1.0 / 2 ** 20)])
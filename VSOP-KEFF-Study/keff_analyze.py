@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP KEFF离线分析工具
+对已有的输出目录或压缩包（*.out）重新提取keff并做后处理，
+重新生成 keff_study_results.csv、统计摘要和分析图表，无需再次运行VSOP程序
+
+用法:
+    python keff_analyze.py <输出目录或压缩包> [--output-dir 目录] [--workers N] [--baseline 1.22370]
+    python keff_study_simple.py analyze <输出目录或压缩包> ...
+"""
+
+import os
+import sys
+import argparse
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vsop_output import parse_output_task
+
+
+def collect_tasks(source, temp_dir):
+    """收集待解析的输出文件
+
+    目录直接列出*.out；zip包由工作进程直接按成员读取；
+    tar包不支持随机访问，先解压*.out到临时目录（每个成员一个子目录，不同目录下的同名文件不会互相覆盖，
+    文件名保持不变以便从中读取参数值）
+    """
+    tasks = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith('.out'):
+                tasks.append(('file', os.path.join(source, name), None))
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for member in zf.namelist():
+                if member.lower().endswith('.out'):
+                    tasks.append(('zip', source, member))
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as tf:
+            members = [m for m in tf.getmembers() if m.isfile() and m.name.lower().endswith('.out')]
+            for index, member in enumerate(members):
+                target_dir = os.path.join(temp_dir, str(index))
+                os.makedirs(target_dir)
+                target = os.path.join(target_dir, os.path.basename(member.name))
+                with tf.extractfile(member) as src, open(target, 'wb') as dst:
+                    dst.write(src.read())
+                tasks.append(('file', target, None))
+    else:
+        raise ValueError(f"无法识别的输入: {source}（需要目录、zip或tar压缩包）")
+    return tasks
+
+
+def parse_outputs(tasks, workers=None):
+    """在多个工作进程中并行解析输出文件"""
+    if not tasks:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) < 4:
+        return [parse_output_task(t) for t in tasks]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_output_task, tasks, chunksize=chunksize))
+
+
+def natural_cubic_spline(x, y):
+    """自然三次样条，返回各节点的二阶导数（Thomas算法求解三对角方程组）"""
+    n = len(x)
+    m = np.zeros(n)
+    if n < 3:
+        return m
+    h = np.diff(x)
+    rhs = 6 * (np.diff(y[1:]) / h[1:] - np.diff(y[:-1]) / h[:-1])
+    sub = h[1:-1].copy()
+    diag = 2 * (h[:-1] + h[1:])
+    sup = h[1:-1].copy()
+    for i in range(1, n - 2):
+        w = sub[i - 1] / diag[i - 1]
+        diag[i] -= w * sup[i - 1]
+        rhs[i] -= w * rhs[i - 1]
+    inner = np.zeros(n - 2)
+    inner[-1] = rhs[-1] / diag[-1]
+    for i in range(n - 4, -1, -1):
+        inner[i] = (rhs[i] - sup[i] * inner[i + 1]) / diag[i]
+    m[1:-1] = inner
+    return m
+
+
+def spline_evaluate(x, y, m, xq, derivative=False):
+    """向量化计算样条在xq处的值或一阶导数"""
+    if len(x) < 2:
+        return np.zeros_like(xq) if derivative else np.full_like(xq, y[0])
+    idx = np.clip(np.searchsorted(x, xq) - 1, 0, len(x) - 2)
+    x0, x1 = x[idx], x[idx + 1]
+    y0, y1 = y[idx], y[idx + 1]
+    m0, m1 = m[idx], m[idx + 1]
+    h = x1 - x0
+    a = (x1 - xq) / h
+    b = (xq - x0) / h
+    if derivative:
+        return (y1 - y0) / h - (3 * a ** 2 - 1) * h * m0 / 6 + (3 * b ** 2 - 1) * h * m1 / 6
+    return a * y0 + b * y1 + ((a ** 3 - a) * m0 + (b ** 3 - b) * m1) * h ** 2 / 6
+
+
+def analyze_arrays(param1, keff, baseline_keff):
+    """对参数和keff数组做向量化后处理
+
+    Returns:
+        字典，包含反应性、相对基准的反应性价值（pcm）、
+        对数参数空间的样条拟合值及其导数
+    """
+    order = np.argsort(param1)
+    param1 = param1[order]
+    keff = keff[order]
+
+    reactivity = (keff - 1.0) / keff
+    baseline_reactivity = (baseline_keff - 1.0) / baseline_keff
+    worth_pcm = (reactivity - baseline_reactivity) * 1e5
+
+    # 重复参数点取平均后在log10空间拟合
+    log_p = np.log10(param1)
+    knots, inverse = np.unique(log_p, return_inverse=True)
+    knot_keff = np.bincount(inverse, weights=keff) / np.bincount(inverse)
+    m = natural_cubic_spline(knots, knot_keff)
+    spline_keff = spline_evaluate(knots, knot_keff, m, log_p)
+    dkeff_dlogp = spline_evaluate(knots, knot_keff, m, log_p, derivative=True)
+    # dρ/dlogP = (dk/dlogP) / k²
+    drho_dlogp_pcm = dkeff_dlogp / spline_keff ** 2 * 1e5
+
+    return {
+        'order': order,
+        'param1': param1,
+        'keff': keff,
+        'reactivity_pcm': reactivity * 1e5,
+        'worth_pcm': worth_pcm,
+        'spline_keff': spline_keff,
+        'dkeff_dlogp': dkeff_dlogp,
+        'drho_dlogp_pcm': drho_dlogp_pcm,
+    }
+
+
+def save_analysis_csv(analysis, ratio, filename):
+    """保存后处理结果（反应性、反应性价值和样条导数）"""
+    table = np.column_stack([
+        analysis['param1'],
+        analysis['param1'] / ratio,
+        analysis['keff'],
+        analysis['reactivity_pcm'],
+        analysis['worth_pcm'],
+        analysis['spline_keff'],
+        analysis['dkeff_dlogp'],
+        analysis['drho_dlogp_pcm'],
+    ])
+    header = ('Line87_Parameter,Line92_Parameter,KEFF_Value,Reactivity_pcm,'
+              'Reactivity_Worth_pcm,Spline_KEFF,dKEFF_dlog10P,dRho_dlog10P_pcm')
+    np.savetxt(filename, table, delimiter=',', header=header, comments='',
+               fmt=['%.6E', '%.6E', '%.6f', '%.2f', '%+.2f', '%.6f', '%+.6e', '%+.3f'])
+    print(f"后处理结果已保存到: {filename}")
+
+
+def run_analysis(source, output_dir='.', workers=None, baseline_keff=None, plots=True):
+    """离线分析主流程"""
+    # 延迟导入，避免工作进程加载matplotlib
+    from keff_study_simple import KeffStudySimple
+
+    study = KeffStudySimple()
+    if baseline_keff is not None:
+        study.baseline_keff = baseline_keff
+        study.stats.baseline_keff = baseline_keff
+    os.makedirs(output_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tasks = collect_tasks(source, temp_dir)
+        print(f"找到{len(tasks)}个输出文件，开始并行解析...")
+        records = parse_outputs(tasks, workers)
+
+    valid = []
+    for record in records:
+        if record['parameter_value_1'] is None:
+            print(f"跳过 {record['output_file']}：文件名无法解析为参数值")
+        elif record['keff'] is None:
+            print(f"跳过 {record['output_file']}：{record['error']}")
+        else:
+            valid.append(record)
+
+    if not valid:
+        print("没有可用的结果")
+        return None
+
+    param1 = np.array([r['parameter_value_1'] for r in valid])
+    keff = np.array([r['keff'] for r in valid])
+    analysis = analyze_arrays(param1, keff, study.baseline_keff)
+
+    for i in analysis['order']:
+        record = valid[i]
+        study.record_result({
+            'parameter_value_1': record['parameter_value_1'],
+            'parameter_value_2': record['parameter_value_1'] / study.ratio,
+            'keff': record['keff'],
+            'state': record['state'],
+            'output_file': record['output_file'],
+        })
+
+    print(f"有效结果{len(valid)}个，跳过{len(records) - len(valid)}个")
+    study.save_results_csv(os.path.join(output_dir, "keff_study_results.csv"),
+                           summary_filename=os.path.join(output_dir, "keff_study_summary.txt"))
+    save_analysis_csv(analysis, study.ratio, os.path.join(output_dir, "keff_analysis.csv"))
+
+    worth = analysis['worth_pcm']
+    slope = analysis['dkeff_dlogp']
+    print("\n=== Reactivity Analysis ===")
+    print(f"Reactivity Worth vs Baseline: {worth.min():+.2f} - {worth.max():+.2f} pcm")
+    print(f"dKEFF/dlog10(P): {slope.min():+.6f} - {slope.max():+.6f}")
+
+    if plots:
+        study.generate_final_plots(filename=os.path.join(output_dir, "keff_study_analysis.png"), show=False)
+    return analysis
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VSOP KEFF 离线分析：从已有输出文件重新生成结果、摘要和图表")
+    parser.add_argument('source', help="输出目录或压缩包（zip/tar/tar.gz）")
+    parser.add_argument('--output-dir', default='.', help="结果输出目录（默认当前目录）")
+    parser.add_argument('--workers', type=int, default=None, help="解析进程数（默认CPU核数）")
+    parser.add_argument('--baseline', type=float, default=None, help="基准KEFF值（默认1.22370）")
+    parser.add_argument('--no-plots', action='store_true', help="不生成分析图表")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"错误：找不到 {args.source}")
+        return 1
+    run_analysis(args.source, args.output_dir, args.workers, args.baseline, plots=not args.no_plots)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行中研究的控制通道
+研究运行期间监视控制文件（JSON Lines，每行一条命令），可以：
+  - add:      加入新的参数点（可指定优先级）
+  - priority: 调整尚未开始的参数点的优先级（数值越大越先计算）
+  - cancel:   取消排队中或正在计算的参数点
+  - workers:  调整并行进程数
+已完成的结果不受影响。命令由研究在等待结果时读取（约每秒一次），立即生效
+
+发送命令:
+    python keff_control.py add 1.2e-7 1.5e-7 --priority 5
+    python keff_control.py priority 1.2e-7 10
+    python keff_control.py cancel 3.08e-8
+    python keff_control.py workers 4
+仅使用Python标准库
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+DEFAULT_CONTROL_FILE = "keff_control.jsonl"
+
+CMD_ADD = 'add'
+CMD_PRIORITY = 'priority'
+CMD_CANCEL = 'cancel'
+CMD_WORKERS = 'workers'
+COMMANDS = (CMD_ADD, CMD_PRIORITY, CMD_CANCEL, CMD_WORKERS)
+
+
+def validate(command):
+    """检查命令格式，返回错误信息，正确时返回None"""
+    if not isinstance(command, dict):
+        return "命令必须是JSON对象"
+    cmd = command.get('cmd')
+    if cmd not in COMMANDS:
+        return f"未知命令: {cmd}"
+    try:
+        if cmd in (CMD_ADD, CMD_CANCEL):
+            values = command.get('values')
+            if not values or any(float(v) <= 0 for v in values):
+                return "values必须是正数列表"
+        if cmd == CMD_ADD:
+            float(command.get('priority', 0))
+        if cmd == CMD_PRIORITY:
+            if float(command['value']) <= 0:
+                return "value必须是正数"
+            float(command['priority'])
+        if cmd == CMD_WORKERS and int(command['count']) < 1:
+            return "count必须不小于1"
+    except (KeyError, TypeError, ValueError) as e:
+        return f"命令参数错误: {e}"
+    return None
+
+
+def send(command, path=DEFAULT_CONTROL_FILE):
+    """向控制文件追加一条命令，返回写入的命令"""
+    error = validate(command)
+    if error is not None:
+        raise ValueError(error)
+    command = dict(command)
+    command.setdefault('timestamp', time.strftime('%Y-%m-%d %H:%M:%S'))
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(command, ensure_ascii=False) + "\n")
+    return command
+
+
+class ControlChannel:
+    """增量读取控制文件中的新命令
+
+    从创建时的文件末尾开始读，之前研究留下的命令不会被执行
+
+    Args:
+        path: 控制文件路径
+    """
+
+    def __init__(self, path=DEFAULT_CONTROL_FILE):
+        self.path = path
+        try:
+            self._offset = os.path.getsize(path)
+        except OSError:
+            self._offset = 0
+        self._partial = b''
+
+    def poll(self):
+        """返回自上次读取以来的新命令列表，格式错误的命令打印后跳过"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self._offset:
+            # 控制文件被清空或替换
+            self._offset = 0
+            self._partial = b''
+        if size == self._offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = self._partial + f.read(size - self._offset)
+        self._offset = size
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        commands = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                command = json.loads(line.decode('utf-8'))
+            except ValueError:
+                print(f"控制命令无法解析，已忽略: {line[:80]!r}")
+                continue
+            error = validate(command)
+            if error is not None:
+                print(f"控制命令无效（{error}），已忽略: {command}")
+                continue
+            commands.append(command)
+        return commands
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="向运行中的keff研究发送控制命令")
+    parser.add_argument('--file', default=DEFAULT_CONTROL_FILE, help="控制文件路径")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    add = sub.add_parser(CMD_ADD, help="加入新的参数点")
+    add.add_argument('values', type=float, nargs='+', help="第87行参数值")
+    add.add_argument('--priority', type=float, default=0, help="优先级，数值越大越先计算（默认0）")
+    priority = sub.add_parser(CMD_PRIORITY, help="调整尚未开始的参数点的优先级")
+    priority.add_argument('value', type=float)
+    priority.add_argument('priority', type=float)
+    cancel = sub.add_parser(CMD_CANCEL, help="取消排队中或正在计算的参数点")
+    cancel.add_argument('values', type=float, nargs='+')
+    workers = sub.add_parser(CMD_WORKERS, help="调整并行进程数")
+    workers.add_argument('count', type=int)
+    args = parser.parse_args(argv)
+
+    command = {'cmd': args.cmd}
+    if args.cmd == CMD_ADD:
+        command.update(values=args.values, priority=args.priority)
+    elif args.cmd == CMD_PRIORITY:
+        command.update(value=args.value, priority=args.priority)
+    elif args.cmd == CMD_CANCEL:
+        command.update(values=args.values)
+    else:
+        command.update(count=args.count)
+    try:
+        send(command, args.file)
+    except ValueError as e:
+        print(f"错误：{e}")
+        return 1
+    print(f"已发送: {json.dumps(command, ensure_ascii=False)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP运行失败处理
+  - 失败分类：超时、停滞、程序崩溃、输出格式错误、缺少K-EFF表，以及研究流程本身（生成输入、移动文件等）出错
+  - 自适应超时：根据本次研究实测运行时间分布（P95）确定超时时间，代替固定的10分钟
+  - 重试策略：瞬时失败（超时、停滞、崩溃）指数退避后重试，确定性失败的点隔离
+仅使用Python标准库
+"""
+
+import threading
+
+from keff_stats import P2Quantile
+from vsop_output import read_keff, read_table, operating_state, NO_KEFF_TABLE_ERROR
+
+# 失败类型
+FAILURE_TIMEOUT = 'timeout'
+FAILURE_STALLED = 'stalled'
+FAILURE_CRASH = 'crash'
+FAILURE_MALFORMED = 'malformed_output'
+FAILURE_NO_KEFF_TABLE = 'missing_keff_table'
+FAILURE_INTERNAL = 'internal_error'
+
+FAILURE_NAMES = {
+    FAILURE_TIMEOUT: '运行超时',
+    FAILURE_STALLED: '运行停滞',
+    FAILURE_CRASH: '程序崩溃',
+    FAILURE_MALFORMED: '输出格式错误',
+    FAILURE_NO_KEFF_TABLE: '缺少K-EFF表',
+    FAILURE_INTERNAL: '流程内部错误',
+}
+
+# 可能是偶发的失败类型，值得重试；其余类型对同一输入必然重现
+TRANSIENT_FAILURES = (FAILURE_TIMEOUT, FAILURE_STALLED, FAILURE_CRASH)
+
+
+def classify_output(output_path):
+    """读取输出文件并提取keff，失败时给出分类
+
+    Returns:
+        (keff, failure, message)，成功时failure为None
+    """
+    try:
+        keff, error = read_keff(output_path)
+    except (OSError, ValueError) as e:
+        return None, FAILURE_MALFORMED, f"无法读取输出文件: {e}"
+    if error is None:
+        return keff, None, None
+    if error == NO_KEFF_TABLE_ERROR:
+        return None, FAILURE_NO_KEFF_TABLE, error
+    return None, FAILURE_MALFORMED, error
+
+
+def classify_output_state(output_path):
+    """读取输出文件的K-EFF表，一次解析同时得到keff和运行状态，失败分类与classify_output相同
+
+    K-EFF表不能整体解析（如没有numpy、数据行字段不足）时退回classify_output只提取keff，运行状态为空字典
+
+    Returns:
+        (keff, state, failure, message)，成功时failure为None
+    """
+    try:
+        table, error = read_table(output_path)
+    except (OSError, ValueError) as e:
+        return None, {}, FAILURE_MALFORMED, f"无法读取输出文件: {e}"
+    if error is None:
+        return float(table['keff'][0]), operating_state(table), None, None
+    if error == NO_KEFF_TABLE_ERROR:
+        return None, {}, FAILURE_NO_KEFF_TABLE, error
+    keff, failure, message = classify_output(output_path)
+    return keff, {}, failure, message
+
+
+class AdaptiveTimeout:
+    """根据运行时间分布自适应的超时时间
+
+    样本不足时使用初始值（由运行时间模型的预测值推出），
+    之后取 multiplier × 实测运行时间P95，并限制在[min_timeout, max_timeout]内
+    """
+
+    def __init__(self, initial=600.0, multiplier=3.0, min_timeout=60.0, max_timeout=3600.0,
+                 min_samples=5):
+        self.initial = initial
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self._p95 = P2Quantile(0.95)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_model(cls, runtime_model, values, deck, **kwargs):
+        """用运行时间模型对本次设计中最慢点的预测值初始化；该输入文件没有历史记录时保持600秒"""
+        timeout = cls(**kwargs)
+        if values and runtime_model.has_history(deck):
+            slowest = max(runtime_model.predict(v, deck) for v in values)
+            timeout.initial = timeout._clamp(slowest * timeout.multiplier)
+        return timeout
+
+    def _clamp(self, seconds):
+        return min(self.max_timeout, max(self.min_timeout, seconds))
+
+    def observe(self, wall_time):
+        """记录一次成功运行的耗时"""
+        with self._lock:
+            self._p95.update(wall_time)
+
+    def current(self):
+        """当前超时时间（秒）"""
+        with self._lock:
+            if self._p95.count < self.min_samples:
+                return self.initial
+            return self._clamp(self.multiplier * self._p95.value())
+
+    def for_attempt(self, last_failure=None, last_timeout=None):
+        """下一次尝试的超时时间：上次因超时失败则至少放宽为上次的2倍"""
+        timeout = self.current()
+        if last_failure == FAILURE_TIMEOUT and last_timeout:
+            timeout = min(self.max_timeout, max(timeout, last_timeout * 2))
+        return timeout
+
+
+class RetryPolicy:
+    """重试与隔离策略
+
+    瞬时失败最多尝试max_attempts次，两次尝试之间按backoff_base × 2^(n-1)秒退避；
+    确定性失败或所有尝试都失败的点进入隔离
+    """
+
+    def __init__(self, max_attempts=3, backoff_base=5.0):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+
+    def should_retry(self, failure, attempt):
+        return failure in TRANSIENT_FAILURES and attempt < self.max_attempts
+
+    def backoff(self, attempt):
+        return self.backoff_base * 2 ** (attempt - 1)
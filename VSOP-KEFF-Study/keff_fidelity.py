@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多保真度计算模块
+  - 低保真度输入：放宽V 6卡的收敛判据，并可按行号/字段覆盖其他卡（如减少燃耗步）
+  - 校准：用同一参数点的低/高保真度keff拟合线性修正 keff_高 ≈ a + b × keff_低
+  - 提升：按修正后的keff选出有价值的区域（接近目标值、跨越目标值的区间、校准锚点）做高保真度计算
+仅使用Python标准库
+"""
+
+import re
+import math
+
+FIDELITY_HIGH = 'high'
+FIDELITY_LOW = 'low'
+
+# V 6卡第8个字段为收敛判据（原输入文件为0.0001）
+CONVERGENCE_CARD = ('V', '6')
+CONVERGENCE_FIELD = 7
+
+
+def card_id(line):
+    """行末的卡片标识，如 ('V', '6')、('D', '17')"""
+    return tuple(line.split()[-2:])
+
+
+def replace_field(line, index, text):
+    """替换行中第index个字段，新值右对齐到原字段的结束列，保持其余列位置不变"""
+    spans = [m.span() for m in re.finditer(r'\S+', line)]
+    if index >= len(spans):
+        raise ValueError(f"该行只有{len(spans)}个字段")
+    start, end = spans[index]
+    start = min(start, end - len(text))
+    previous_end = spans[index - 1][1] if index > 0 else 0
+    if index > 0 and start <= previous_end:
+        raise ValueError(f"新值 '{text}' 过长，会与前一个字段相连")
+    if start < 0:
+        raise ValueError(f"新值 '{text}' 过长")
+    return line[:start] + text.rjust(end - start) + line[end:]
+
+
+def relax_convergence(lines, criterion):
+    """把V 6卡的收敛判据替换为criterion，返回新的行列表"""
+    lines = list(lines)
+    for i, line in enumerate(lines):
+        if card_id(line) == CONVERGENCE_CARD:
+            lines[i] = replace_field(line, CONVERGENCE_FIELD, f"{criterion:g}")
+            return lines
+    raise ValueError("输入文件中没有V 6卡")
+
+
+def apply_overrides(lines, overrides):
+    """按 (行号, 字段序号, 新值文本) 覆盖输入文件中的字段，行号从1开始"""
+    lines = list(lines)
+    for line_no, field_index, text in overrides:
+        lines[line_no - 1] = replace_field(lines[line_no - 1], field_index, str(text))
+    return lines
+
+
+class FidelityCalibration:
+    """低/高保真度keff的线性校准
+
+    配对数不少于3且低保真度keff有足够分散时拟合 a + b × keff_低；
+    否则只修正平均偏差；没有配对时不做修正
+    """
+
+    def __init__(self):
+        self.pairs = []  # (keff_低, keff_高)
+        self.intercept = 0.0
+        self.slope = 1.0
+
+    def add(self, low_keff, high_keff):
+        self.pairs.append((low_keff, high_keff))
+        self._fit()
+
+    def _fit(self):
+        n = len(self.pairs)
+        mean_low = sum(p[0] for p in self.pairs) / n
+        mean_high = sum(p[1] for p in self.pairs) / n
+        sxx = sum((p[0] - mean_low) ** 2 for p in self.pairs)
+        if n >= 3 and sxx > 1e-12:
+            sxy = sum((p[0] - mean_low) * (p[1] - mean_high) for p in self.pairs)
+            self.slope = sxy / sxx
+            self.intercept = mean_high - self.slope * mean_low
+        else:
+            self.slope = 1.0
+            self.intercept = mean_high - mean_low
+
+    def correct(self, low_keff):
+        """把低保真度keff修正到高保真度的估计值"""
+        return self.intercept + self.slope * low_keff
+
+    @property
+    def residual_std(self):
+        """校准后的残差标准差，配对不足时为None"""
+        n = len(self.pairs)
+        dof = n - (2 if n >= 3 else 1)
+        if dof <= 0:
+            return None
+        ss = sum((high - self.correct(low)) ** 2 for low, high in self.pairs)
+        return math.sqrt(ss / dof)
+
+    def describe(self):
+        if not self.pairs:
+            return "无配对，未校准"
+        std = self.residual_std
+        std_text = f"，残差标准差 {std:.5f}" if std is not None else ""
+        return (f"keff_高 ≈ {self.intercept:+.5f} + {self.slope:.4f} × keff_低"
+                f"（{len(self.pairs)}对{std_text}）")
+
+
+def select_promotions(points, target, band, anchors=3):
+    """从筛选结果中选出需要做高保真度计算的参数点
+
+    Args:
+        points: [(参数值, 修正后keff)]，失败的点不包含在内
+        target: 目标keff（通常为基准值）
+        band: 修正后keff与目标相差不超过band的点被提升
+        anchors: 在参数范围内均匀选取的校准锚点数
+
+    Returns:
+        按参数值排序的待提升参数值列表
+    """
+    points = sorted(points)
+    if not points:
+        return []
+    chosen = set()
+    for value, keff in points:
+        if abs(keff - target) <= band:
+            chosen.add(value)
+    # 跨越目标值的相邻点对
+    for (v1, k1), (v2, k2) in zip(points, points[1:]):
+        if (k1 - target) * (k2 - target) < 0:
+            chosen.update((v1, v2))
+    # 校准锚点：覆盖整个范围，保证校准不依赖外推
+    if anchors > 0:
+        count = min(anchors, len(points))
+        for k in range(count):
+            index = round(k * (len(points) - 1) / max(count - 1, 1))
+            chosen.add(points[index][0])
+    return sorted(chosen)
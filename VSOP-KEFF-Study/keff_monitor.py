@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP KEFF研究监控服务
+读取结果存储（keff_results_store.jsonl），以独立进程提供本地HTTP监控：
+  /             网页（自动刷新的进度、keff曲线和运行记录）
+  /api/status   当前研究的进度和统计（JSON）
+  /api/runs     当前研究的运行记录（JSON，可用 ?since=序号 增量获取）
+  /api/keff     当前研究已得到的keff（JSON）
+  /events       服务器推送事件（SSE），结果存储有新记录时推送
+研究进程只负责追加写入结果存储，监控服务不影响研究进程，也可在计算节点上无界面运行时使用
+仅使用Python标准库
+
+用法:
+    python keff_monitor.py [--store keff_results_store.jsonl] [--host 127.0.0.1] [--port 8765]
+    python keff_study_simple.py monitor ...
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from keff_stats import KeffStatistics
+from keff_store import (DEFAULT_STORE_FILE, STATUS_OK, STATUS_FAILED, STATUS_QUARANTINED, STATUS_RUNNING,
+                        STATUS_CANCELLED, EVENT_STUDY_START, EVENT_STUDY_END, VARIANT_FIELDS, is_variant_record)
+from keff_fidelity import FIDELITY_HIGH
+
+DEFAULT_PORT = 8765
+POLL_INTERVAL = 1.0  # 检查结果存储新记录的间隔（秒）
+
+
+class StudyMonitor:
+    """增量读取结果存储，维护最近一次研究的状态
+
+    只读取文件新增的部分，写了一半的末行留到下次再读
+    """
+
+    def __init__(self, store_path=DEFAULT_STORE_FILE, baseline_keff=1.22370):
+        self.store_path = store_path
+        self.baseline_keff = baseline_keff
+        self.lock = threading.Lock()
+        self._offset = 0
+        self._partial = b''
+        self.sequence = 0  # 已读取的记录总数，供SSE和增量接口定位
+        self._reset(None)
+
+    def _reset(self, study):
+        self.study = study
+        self.study_end = None
+        self.runs = []  # (序号, 记录)
+        self.running = {}  # run_label -> 正在运行的记录列表（A/B对比的多次重复可能同名）
+        self.keff = []
+        self.counts = {STATUS_OK: 0, STATUS_FAILED: 0, STATUS_QUARANTINED: 0, STATUS_CANCELLED: 0}
+        self.stats = KeffStatistics(self.baseline_keff)
+
+    def refresh(self):
+        """读取新增记录，返回新记录数"""
+        try:
+            size = os.path.getsize(self.store_path)
+        except OSError:
+            return 0
+        with self.lock:
+            if size < self._offset:
+                # 存储文件被清空或替换，重新读取
+                self._offset = 0
+                self._partial = b''
+                self._reset(None)
+            if size == self._offset:
+                return 0
+            with open(self.store_path, 'rb') as f:
+                f.seek(self._offset)
+                data = self._partial + f.read(size - self._offset)
+            self._offset = size
+            lines = data.split(b'\n')
+            self._partial = lines.pop()
+            added = 0
+            for line in lines:
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                self._apply(record)
+                added += 1
+            return added
+
+    @staticmethod
+    def run_label(record):
+        """正在运行的条目名称：参数点，变体运行附上求解程序等标记，同一点的多次运行互不覆盖"""
+        marks = [f"{field}={str(record[field])[:12]}" for field in VARIANT_FIELDS if field in record]
+        return record['point'] + (f" [{', '.join(marks)}]" if marks else "")
+
+    def _apply(self, record):
+        self.sequence += 1
+        event = record.get('event')
+        if event == EVENT_STUDY_START:
+            self._reset(record)
+            return
+        if event == EVENT_STUDY_END:
+            self.study_end = record
+            self.running.clear()
+            return
+        if 'point' not in record:
+            return
+        status = record.get('status')
+        label = self.run_label(record)
+        if status == STATUS_RUNNING:
+            self.running.setdefault(label, []).append(record)
+            return
+        if self.running.get(label):
+            self.running[label].pop(0)
+            if not self.running[label]:
+                del self.running[label]
+        if status in self.counts:
+            self.counts[status] += 1
+        self.runs.append((self.sequence, record))
+        # keff曲线和统计与ResultsStore.completed()一致，只包括参数扫描本身的高保真度结果
+        if (status == STATUS_OK and record.get('fidelity', FIDELITY_HIGH) == FIDELITY_HIGH
+                and not is_variant_record(record)):
+            value_1 = record['parameter_value_1']
+            value_2 = record.get('parameter_value_2', value_1)
+            self.keff.append((value_1, record['keff']))
+            self.stats.update(value_1, value_2, record['keff'])
+
+    def status(self):
+        """当前研究的进度和统计"""
+        with self.lock:
+            study = self.study or {}
+            planned = study.get('planned')
+            done = self.counts[STATUS_OK] + self.counts[STATUS_QUARANTINED] + self.counts[STATUS_CANCELLED]
+            elapsed = None
+            remaining = None
+            if study.get('started_at'):
+                end = self.study_end.get('finished_at') if self.study_end else time.time()
+                elapsed = end - study['started_at']
+                if planned and done and not self.study_end:
+                    remaining = elapsed / done * max(planned - done, 0)
+            st = self.stats
+            return {
+                'store': os.path.abspath(self.store_path),
+                'study': study,
+                'finished': self.study_end is not None,
+                'planned': planned,
+                'completed_points': done,
+                'successful_runs': self.counts[STATUS_OK],
+                'failed_attempts': self.counts[STATUS_FAILED],
+                'quarantined': self.counts[STATUS_QUARANTINED],
+                'cancelled': self.counts[STATUS_CANCELLED],
+                'running': sorted(label for label, records in self.running.items() for _ in records),
+                'elapsed_seconds': elapsed,
+                'remaining_seconds': remaining,
+                'keff': {
+                    'count': st.count,
+                    'mean': st.mean if st.count else None,
+                    'std': st.std if st.count else None,
+                    'min': st.min_keff,
+                    'max': st.max_keff,
+                    'median': st.median if st.count else None,
+                    'baseline': self.baseline_keff,
+                },
+                'sequence': self.sequence,
+            }
+
+    def runs_since(self, since=0):
+        with self.lock:
+            return [dict(record, seq=seq) for seq, record in self.runs if seq > since]
+
+    def keff_points(self):
+        with self.lock:
+            return [{'parameter_value_1': p, 'keff': k} for p, k in sorted(self.keff)]
+
+
+class MonitorHandler(BaseHTTPRequestHandler):
+    """监控服务的请求处理"""
+
+    monitor = None  # 由make_server设置
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.monitor.refresh()
+        if url.path == '/':
+            body = MONITOR_PAGE.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == '/api/status':
+            self._send_json(self.monitor.status())
+        elif url.path == '/api/runs':
+            try:
+                since = int(query.get('since', ['0'])[0] or 0)
+            except ValueError:
+                self._send_json({'error': "参数since应为整数"}, status=400)
+                return
+            self._send_json(self.monitor.runs_since(since))
+        elif url.path == '/api/keff':
+            self._send_json(self.monitor.keff_points())
+        elif url.path == '/events':
+            self._stream_events()
+        else:
+            self._send_json({'error': f"未知路径 {url.path}"}, status=404)
+
+    def _stream_events(self):
+        """SSE：先推送一次状态，之后每当结果存储有新记录时推送新运行记录和状态"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        last = None  # 已推送的最后一个序号，None表示尚未推送
+        try:
+            while True:
+                self.monitor.refresh()
+                status = self.monitor.status()
+                if status['sequence'] != last:
+                    for record in self.monitor.runs_since(last or 0):
+                        self._send_event('run', record)
+                    self._send_event('status', status)
+                    last = status['sequence']
+                else:
+                    self.wfile.write(b': keep-alive\n\n')
+                    self.wfile.flush()
+                time.sleep(POLL_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_event(self, name, payload):
+        data = json.dumps(payload, ensure_ascii=False)
+        self.wfile.write(f"event: {name}\ndata: {data}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+
+def make_server(store_path=DEFAULT_STORE_FILE, host='127.0.0.1', port=DEFAULT_PORT, baseline_keff=1.22370):
+    """创建监控服务（调用serve_forever()开始服务）"""
+    monitor = StudyMonitor(store_path, baseline_keff)
+    monitor.refresh()
+    handler = type('BoundMonitorHandler', (MonitorHandler,), {'monitor': monitor})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+MONITOR_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>VSOP KEFF Study Monitor</title>
+<style>
+body { font-family: "Times New Roman", "SimSun", serif; margin: 20px; color: #222; }
+h1 { font-size: 22px; }
+.bar { width: 100%; height: 22px; background: #eee; border-radius: 4px; overflow: hidden; }
+.bar div { height: 100%; background: #3a9d3a; width: 0; }
+table { border-collapse: collapse; font-size: 13px; margin-top: 10px; }
+td, th { border: 1px solid #ccc; padding: 3px 8px; text-align: right; }
+.failed { color: #b00; } .quarantined { color: #b60; }
+#summary span { margin-right: 18px; }
+</style>
+</head>
+<body>
+<h1>VSOP KEFF Study Real-time Monitoring</h1>
+<div id="study"></div>
+<div class="bar"><div id="progress"></div></div>
+<p id="summary"></p>
+<svg id="chart" width="720" height="300" style="border:1px solid #ccc"></svg>
+<table><thead><tr><th>#</th><th>Line 87</th><th>Status</th><th>KEFF</th><th>Attempt</th><th>Wall (s)</th><th>Fidelity</th><th>Time</th></tr></thead>
+<tbody id="runs"></tbody></table>
+<script>
+const fmt = (x, d) => (x === null || x === undefined) ? '-' : Number(x).toFixed(d);
+const dur = s => s === null ? '-' : (s >= 3600 ? (s / 3600).toFixed(1) + ' h' : s >= 60 ? (s / 60).toFixed(1) + ' min' : s.toFixed(0) + ' s');
+let baseline = null;
+function showStatus(s) {
+  const st = s.study || {};
+  baseline = s.keff.baseline;
+  document.getElementById('study').textContent =
+    (st.mode || '-') + ' | ' + (st.deck || '-') + ' | workers ' + (st.workers || '-') + (s.finished ? ' | finished' : '');
+  const pct = s.planned ? Math.min(100, 100 * s.completed_points / s.planned) : 0;
+  document.getElementById('progress').style.width = pct + '%';
+  document.getElementById('summary').innerHTML =
+    '<span>' + s.completed_points + '/' + (s.planned || '?') + ' (' + pct.toFixed(1) + '%)</span>' +
+    '<span>running: ' + s.running.join(', ') + '</span>' +
+    '<span>failed attempts: ' + s.failed_attempts + '</span><span>quarantined: ' + s.quarantined + '</span>' +
+    '<span>elapsed: ' + dur(s.elapsed_seconds) + '</span><span>remaining: ' + dur(s.remaining_seconds) + '</span>' +
+    '<span>KEFF mean ' + fmt(s.keff.mean, 5) + ' std ' + fmt(s.keff.std, 5) +
+    ' range ' + fmt(s.keff.min, 5) + ' - ' + fmt(s.keff.max, 5) + '</span>';
+  fetch('/api/keff').then(r => r.json()).then(drawChart);
+}
+function drawChart(points) {
+  const svg = document.getElementById('chart'), W = 720, H = 300, P = 45;
+  if (!points.length) { svg.innerHTML = ''; return; }
+  const xs = points.map(p => Math.log10(p.parameter_value_1)), ys = points.map(p => p.keff);
+  if (baseline !== null) ys.push(baseline);
+  const x0 = Math.min(...xs), x1 = Math.max(...xs) + 1e-9, y0 = Math.min(...ys), y1 = Math.max(...ys) + 1e-9;
+  const X = x => P + (x - x0) / (x1 - x0) * (W - 2 * P), Y = y => H - P - (y - y0) / (y1 - y0) * (H - 2 * P);
+  let html = '<polyline fill="none" stroke="blue" stroke-width="2" points="' +
+    points.map(p => X(Math.log10(p.parameter_value_1)) + ',' + Y(p.keff)).join(' ') + '"/>';
+  if (points.length <= 200) html += points.map(p => '<circle r="3" fill="blue" cx="' + X(Math.log10(p.parameter_value_1)) + '" cy="' + Y(p.keff) + '"/>').join('');
+  if (baseline !== null) html += '<line stroke="red" stroke-dasharray="6,4" x1="' + P + '" x2="' + (W - P) + '" y1="' + Y(baseline) + '" y2="' + Y(baseline) + '"/>';
+  html += '<text x="' + P + '" y="' + (H - 10) + '" font-size="12">1e' + x0.toFixed(2) + '</text>';
+  html += '<text x="' + (W - P - 50) + '" y="' + (H - 10) + '" font-size="12">1e' + x1.toFixed(2) + '</text>';
+  html += '<text x="2" y="' + (P - 10) + '" font-size="12">' + y1.toFixed(5) + '</text><text x="2" y="' + (H - P + 4) + '" font-size="12">' + y0.toFixed(5) + '</text>';
+  svg.innerHTML = html;
+}
+function addRun(r) {
+  const row = document.createElement('tr');
+  row.className = r.status;
+  row.innerHTML = '<td>' + r.seq + '</td><td>' + Number(r.parameter_value_1).toExponential(6) + '</td><td>' + r.status +
+    (r.failure ? ' (' + r.failure + ')' : '') + '</td><td>' + fmt(r.keff, 5) + '</td><td>' + (r.attempt || '-') +
+    '</td><td>' + fmt(r.wall_time, 1) + '</td><td>' + (r.fidelity || 'high') + '</td><td>' + (r.timestamp || '') + '</td>';
+  const body = document.getElementById('runs');
+  body.insertBefore(row, body.firstChild);
+  while (body.children.length > 500) body.removeChild(body.lastChild);
+}
+const source = new EventSource('/events');
+source.addEventListener('status', e => showStatus(JSON.parse(e.data)));
+source.addEventListener('run', e => addRun(JSON.parse(e.data)));
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VSOP KEFF 研究监控服务：通过浏览器或HTTP接口查看研究进度")
+    parser.add_argument('--store', default=DEFAULT_STORE_FILE, help="结果存储文件（默认keff_results_store.jsonl）")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址（默认仅本机，计算节点上可用0.0.0.0配合端口转发）")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"端口（默认{DEFAULT_PORT}）")
+    parser.add_argument('--baseline', type=float, default=1.22370, help="基准KEFF值（默认1.22370）")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.store, args.host, args.port, args.baseline)
+    print(f"监控服务已启动: http://{args.host}:{args.port}/ （结果存储: {os.path.abspath(args.store)}）")
+    print("按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
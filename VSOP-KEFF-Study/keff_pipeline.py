@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线执行模块
+把一次研究拆成若干环节（设计生成、输入文件生成、求解、keff提取、结果保存、报告），
+环节之间用有界队列连接，每个环节有自己的线程数：
+  - 下游处理不过来时上游在放入队列时等待（背压），设计和输入文件按需生成，不必全部生成后才开始求解
+  - 求解线程把结果交给提取环节后立即开始下一个计算，不等待Python端的解析和文件操作
+最后的报告环节在调用线程中执行（便于在主线程中更新图表），结果队列不限长度，报告慢时不会阻塞求解
+环节函数出错时由on_error处理（如记录失败、清理工作目录），item直接交给报告环节，不会丢失
+结束后按环节统计处理时间、等待输入（空闲）和等待下游（阻塞）的时间，找出瓶颈环节
+仅使用Python标准库
+"""
+
+import time
+import queue
+import threading
+
+_DONE = object()  # 结束标记
+
+
+class Requeue:
+    """环节函数的返回值：item在delay秒后重新送入名为stage的环节（如失败重试），此次不向下传递"""
+
+    def __init__(self, stage, item, delay=0.0):
+        self.stage = stage
+        self.item = item
+        self.delay = delay
+
+
+class Stage:
+    """流水线的一个环节
+
+    Args:
+        name: 环节名称（用于报告和Requeue）
+        func: func(item) 在工作线程中执行，返回交给下一环节的item；返回None表示该item到此结束，
+              返回Requeue表示稍后重新处理
+        workers: 线程数
+        capacity: 输入队列容量，默认与线程数相同
+        concurrency: 可选，concurrency() 返回当前允许同时处理的item数（如按资源自动调节的求解进程数）
+    """
+
+    def __init__(self, name, func, workers=1, capacity=None, concurrency=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.capacity = max(1, capacity or self.workers)
+        self.concurrency = concurrency
+        self.inbox = queue.Queue(self.capacity)
+        self.processed = 0
+        self.busy = 0.0  # 处理时间（各线程累计）
+        self.idle = 0.0  # 等待输入的时间
+        self.blocked = 0.0  # 下游队列已满、等待放入的时间
+        self.peak_queue = 0
+        self.peak_active = 0
+        self._active = 0
+        self._gate = threading.Condition()
+
+    def acquire(self):
+        with self._gate:
+            while self.concurrency is not None and self._active >= max(1, self.concurrency()):
+                # 限制可能在别处放宽，定期重新检查
+                self._gate.wait(timeout=1.0)
+            self._active += 1
+            self.peak_active = max(self.peak_active, self._active)
+
+    def release(self, busy):
+        with self._gate:
+            self._active -= 1
+            self.processed += 1
+            self.busy += busy
+            self._gate.notify_all()
+
+
+class Pipeline:
+    """由有界队列连接的多环节流水线
+
+    Args:
+        source: 可迭代对象，按需逐个取出送入第一个环节（设计生成环节）
+        stages: Stage列表，按顺序连接
+        on_error: 可选，on_error(环节名称, item, 异常) 在出错的工作线程中执行，返回交给报告环节的item，
+                  返回None表示该item到此结束；未设置时只打印错误
+    """
+
+    def __init__(self, source, stages, on_error=None):
+        self.source = source
+        self.stages = list(stages)
+        self.on_error = on_error
+        self.by_name = {stage.name: stage for stage in self.stages}
+        self.output = queue.Queue()
+        self.fed = 0
+        self.feed_blocked = 0.0
+        self._in_flight = 0
+        self._source_done = False
+        self._lock = threading.Lock()
+
+    def _put(self, stage, item):
+        """放入环节的输入队列，返回等待时间"""
+        if stage is None:
+            self.output.put(item)
+            return 0.0
+        start = time.time()
+        stage.inbox.put(item)
+        waited = time.time() - start
+        size = stage.inbox.qsize()
+        with self._lock:
+            stage.peak_queue = max(stage.peak_queue, size)
+        return waited
+
+    def _finish_item(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._check_done()
+
+    def _check_done(self):
+        # 调用方持有self._lock
+        if self._source_done and self._in_flight == 0:
+            for stage in self.stages:
+                for _ in range(stage.workers):
+                    stage.inbox.put(_DONE)
+            self.output.put(_DONE)
+
+    def _feed(self):
+        first = self.stages[0]
+        for item in self.source:
+            with self._lock:
+                self._in_flight += 1
+                self.fed += 1
+            self.feed_blocked += self._put(first, item)
+        with self._lock:
+            self._source_done = True
+            self._check_done()
+
+    def _work(self, index):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            wait_start = time.time()
+            item = stage.inbox.get()
+            waited = time.time() - wait_start
+            if item is _DONE:
+                break
+            stage.acquire()
+            work_start = time.time()
+            failed = False
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                print(f"流水线环节 {stage.name} 处理出错: {e}")
+                result = self._handle_error(stage, item, e)
+                failed = True
+            stage.release(time.time() - work_start)
+            blocked = 0.0
+            if result is None:
+                self._finish_item()
+            elif failed:
+                self._put(None, result)  # 跳过其余环节，直接交给报告环节
+            elif isinstance(result, Requeue):
+                timer = threading.Timer(result.delay, self._put, (self.by_name[result.stage], result.item))
+                timer.daemon = True
+                timer.start()
+            else:
+                blocked = self._put(downstream, result)
+            with self._lock:
+                stage.idle += waited
+                stage.blocked += blocked
+
+    def _handle_error(self, stage, item, error):
+        if self.on_error is None:
+            return None
+        try:
+            return self.on_error(stage.name, item, error)
+        except Exception as e:
+            print(f"流水线环节 {stage.name} 的错误处理出错: {e}")
+            return None
+
+    def run(self, on_output=None, on_tick=None, tick_interval=2.0):
+        """运行流水线直到全部item处理完毕
+
+        on_output(item) 在调用线程中依次执行（报告环节）；等待期间每隔tick_interval秒执行一次on_tick()
+
+        Returns:
+            流水线报告字典
+        """
+        start = time.time()
+        threads = [threading.Thread(target=self._feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [threading.Thread(target=self._work, args=(index,), daemon=True)
+                        for _ in range(stage.workers)]
+        for t in threads:
+            t.start()
+
+        reported = 0
+        report_time = 0.0
+        while True:
+            try:
+                item = self.output.get(timeout=tick_interval if on_tick is not None else None)
+            except queue.Empty:
+                on_tick()
+                continue
+            if item is _DONE:
+                break
+            report_start = time.time()
+            if on_output is not None:
+                on_output(item)
+            report_time += time.time() - report_start
+            reported += 1
+            self._finish_item()
+
+        for t in threads:
+            t.join()
+
+        elapsed = time.time() - start
+        stages = []
+        for stage in self.stages:
+            stages.append({
+                'name': stage.name,
+                'workers': stage.workers,
+                'capacity': stage.capacity,
+                'processed': stage.processed,
+                'busy': stage.busy,
+                'idle': stage.idle,
+                'blocked': stage.blocked,
+                'utilization': stage.busy / (stage.workers * elapsed) if elapsed > 0 else 0.0,
+                'peak_queue': stage.peak_queue,
+                'peak_active': stage.peak_active,
+            })
+        stages.append({
+            'name': 'report',
+            'workers': 1,
+            'capacity': None,
+            'processed': reported,
+            'busy': report_time,
+            'idle': max(0.0, elapsed - report_time),
+            'blocked': 0.0,
+            'utilization': report_time / elapsed if elapsed > 0 else 0.0,
+            'peak_queue': None,
+            'peak_active': 1 if reported else 0,
+        })
+        return {'elapsed': elapsed, 'fed': self.fed, 'feed_blocked': self.feed_blocked, 'stages': stages}
+
+
+def print_pipeline_report(report):
+    """打印流水线报告：各环节的处理、空闲和阻塞时间"""
+    print("\n=== 流水线报告 ===")
+    print(f"总用时: {report['elapsed']:.1f}秒，送入设计点: {report['fed']}")
+    print(f"{'环节':<12}{'线程':>6}{'处理数':>8}{'处理(s)':>10}{'等待输入(s)':>14}{'等待下游(s)':>14}"
+          f"{'利用率':>9}{'队列峰值':>10}")
+    for s in report['stages']:
+        peak = '-' if s['peak_queue'] is None else f"{s['peak_queue']}/{s['capacity']}"
+        print(f"{s['name']:<12}{s['workers']:>6}{s['processed']:>8}{s['busy']:>10.1f}{s['idle']:>14.1f}"
+              f"{s['blocked']:>14.1f}{s['utilization']:>9.0%}{peak:>10}")
+    bottleneck = max(report['stages'], key=lambda s: s['utilization'])
+    print(f"瓶颈环节: {bottleneck['name']}（利用率{bottleneck['utilization']:.0%}）")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP输入文件预检
+在启动任何VSOP计算之前检查整个输入文件：
+  - 每行第73-80列的卡片标识（S/BI/D/V/G/T/C/K等）及各输入块的先后顺序、卡片编号顺序
+  - 数据区（第1-72列）的数值格式，已知卡片的字段数
+  - 输入文件引用的库文件是否存在
+原始输入文件只完整解析一次；设计中的每个变体只检查与原始文件不同的行
+（卡片标识、字段数、字段类型、固定列对齐不变），上千个变体可在几十毫秒内检查完
+仅使用Python标准库
+"""
+
+import os
+import re
+import operator
+from itertools import compress
+
+DATA_COLUMNS = 72  # 第1-72列为数据区
+IDENT_COLUMNS = 80  # 第73-80列为卡片标识
+
+# 输入块的先后顺序：S(总体) BI(BIRGIT) D(DATA2) V(VSOP) G(GAM) T(THERMOS) C(CITATION) K(THERMIX)
+FAMILY_ORDER = ('S', 'BI', 'D', 'V', 'G', 'T', 'C', 'K')
+
+# 允许出现文本字段的卡片（标题、关键字、库文件名）
+TEXT_CARDS = {('S', 1), ('S', 2), ('D', 5), ('C', 1), ('T', 1)}
+
+# 已知字段数的卡片（本工具会修改或依赖的卡片）
+FIELD_COUNTS = {
+    ('D', 17): 2,   # 第2个字段为第87/92行的研究参数
+    ('V', 6): 9,    # 第8个字段为收敛判据
+    ('T', 1): 7,    # 第1个字段为热化库文件名
+}
+
+# 卡片中引用的库文件字段 (卡片, 字段序号)
+LIBRARY_FIELDS = ((('T', 1), 0),)
+
+ERROR = 'error'
+WARNING = 'warning'
+
+_IDENT_PATTERN = re.compile(r'([A-Z]{1,2})\s*(\d+)\s*$')
+_INT_PATTERN = re.compile(r'[+-]?\d+$')
+_REAL_PATTERN = re.compile(r'[+-]?(\d+\.\d*|\.\d+|\d+)([EeDd][+-]?\d+)?$')
+# 固定列格式中相邻字段可以没有空格分隔，如D 6卡的 '0-301'（I4字段 '   0' 与 '-301'）
+_PACKED_PATTERN = re.compile(r'[+-]?[\d.]+([+-][\d.]+)+$')
+_TOKEN_PATTERN = re.compile(r'\S+')
+
+
+def parse_card(line):
+    """解析一行的卡片标识
+
+    Returns:
+        ((卡片族, 编号), 数据区文本)，没有卡片标识时返回(None, 数据区文本)
+    """
+    line = line.rstrip('\r\n')
+    ident = line[DATA_COLUMNS:IDENT_COLUMNS]
+    data = line[:DATA_COLUMNS]
+    match = _IDENT_PATTERN.search(ident)
+    if match is None:
+        return None, data
+    return (match.group(1), int(match.group(2))), data
+
+
+def field_type(token):
+    """字段类型：'int'、'real'、'packed'（相邻的数值字段）或 'text'"""
+    if _INT_PATTERN.match(token):
+        return 'int'
+    if _REAL_PATTERN.match(token):
+        return 'real'
+    if _PACKED_PATTERN.match(token):
+        return 'packed'
+    return 'text'
+
+
+def data_fields(data):
+    """数据区的字段 [(文本, 结束列)]，'$'之后为注释"""
+    comment = data.find('$')
+    if comment >= 0:
+        data = data[:comment]
+    return [(m.group(), m.end()) for m in _TOKEN_PATTERN.finditer(data)]
+
+
+def card_name(card):
+    return f"{card[0]} {card[1]}" if card else "无标识"
+
+
+class DeckValidator:
+    """输入文件预检器
+
+    Args:
+        lines: 原始输入文件的行列表
+        library_dirs: 查找库文件的目录
+    """
+
+    def __init__(self, lines, library_dirs=('Libraries', '.')):
+        self.base_lines = list(lines)
+        self.library_dirs = library_dirs
+        self.cards = []   # 每行的卡片标识
+        self.fields = []  # 每行的字段 [(文本, 结束列)]
+        self.issues = self._validate_base()
+
+    @classmethod
+    def from_file(cls, path, library_dirs=None):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.readlines()
+        if library_dirs is None:
+            base = os.path.dirname(os.path.abspath(path))
+            library_dirs = (os.path.join(base, 'Libraries'), base)
+        return cls(lines, library_dirs)
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue[0] == ERROR]
+
+    def _validate_base(self):
+        """完整检查原始输入文件，返回问题列表 [(级别, 行号, 信息)]"""
+        issues = []
+        family_index = -1
+        seen_numbers = {}
+        last_number = {}
+
+        for line_no, line in enumerate(self.base_lines, 1):
+            card, data = parse_card(line)
+            self.cards.append(card)
+            fields = data_fields(data)
+            self.fields.append(fields)
+
+            if card is None:
+                if line.strip() and line_no < len(self.base_lines):
+                    issues.append((ERROR, line_no, "第73-80列没有卡片标识"))
+                continue
+
+            family, number = card
+            if family not in FAMILY_ORDER:
+                issues.append((WARNING, line_no, f"未知的卡片族 '{family}'"))
+            else:
+                # 输入块不能回到前面的块
+                index = FAMILY_ORDER.index(family)
+                if index < family_index:
+                    issues.append((ERROR, line_no, f"{card_name(card)}卡出现在{FAMILY_ORDER[family_index]}输入块之后"))
+                elif index > family_index:
+                    family_index = index
+                    if number != 1:
+                        issues.append((ERROR, line_no, f"{family}输入块应从{family} 1卡开始，实际为{card_name(card)}"))
+
+            # 块内编号递增，回退只允许回到已出现过的编号（重复的卡片组）
+            numbers = seen_numbers.setdefault(family, set())
+            if family in last_number and number < last_number[family] and number not in numbers:
+                issues.append((ERROR, line_no, f"{card_name(card)}卡出现在{family} {last_number[family]}卡之后"))
+            numbers.add(number)
+            last_number[family] = number
+
+            issues.extend(self._check_fields(line_no, card, fields))
+
+        issues.extend(self._check_libraries())
+        return issues
+
+    def _check_fields(self, line_no, card, fields):
+        issues = []
+        if card not in TEXT_CARDS:
+            for token, _ in fields:
+                if field_type(token) == 'text':
+                    issues.append((ERROR, line_no, f"{card_name(card)}卡字段 '{token}' 不是有效的数值"))
+        expected = FIELD_COUNTS.get(card)
+        if expected is not None and len(fields) != expected:
+            issues.append((ERROR, line_no, f"{card_name(card)}卡应有{expected}个字段，实际为{len(fields)}个"))
+        return issues
+
+    def _check_libraries(self):
+        issues = []
+        for (card, index) in LIBRARY_FIELDS:
+            for line_no, (line_card, fields) in enumerate(zip(self.cards, self.fields), 1):
+                if line_card != card or index >= len(fields):
+                    continue
+                name = fields[index][0]
+                if not any(os.path.exists(os.path.join(d, name)) for d in self.library_dirs):
+                    issues.append((ERROR, line_no, f"{card_name(card)}卡引用的库文件 '{name}' 不存在"))
+        return issues
+
+    def validate_variant(self, lines):
+        """检查一个变体（由原始文件修改若干行得到），返回问题列表
+
+        只检查与原始文件不同的行：卡片标识、字段数、字段类型不变，
+        数值仍右对齐到原来的结束列（数据超出第72列时卡片标识会随之改变）
+        """
+        if len(lines) != len(self.base_lines):
+            return [(ERROR, 0, f"行数为{len(lines)}，原始文件为{len(self.base_lines)}")]
+        issues = []
+        # 变体通常由原始行列表复制后修改少数几行得到，先按对象身份筛出改动过的行
+        changed = compress(range(len(lines)), map(operator.is_not, self.base_lines, lines))
+        for index in changed:
+            base, line = self.base_lines[index], lines[index]
+            if line == base:
+                continue
+            line_no = index + 1
+            card, data = parse_card(line)
+            base_card = self.cards[index]
+            if card != base_card:
+                hint = "（数据可能超出第72列）" if len(line.rstrip()) > len(base.rstrip()) else ""
+                issues.append((ERROR, line_no, f"卡片标识由{card_name(base_card)}变为{card_name(card)}{hint}"))
+                continue
+            fields = data_fields(data)
+            base_fields = self.fields[index]
+            if len(fields) != len(base_fields):
+                issues.append((ERROR, line_no, f"{card_name(card)}卡字段数由{len(base_fields)}变为{len(fields)}"))
+                continue
+            if card in TEXT_CARDS:
+                continue
+            for i, ((token, end), (base_token, base_end)) in enumerate(zip(fields, base_fields), 1):
+                kind, base_kind = field_type(token), field_type(base_token)
+                if kind != base_kind:
+                    issues.append((ERROR, line_no, f"{card_name(card)}卡第{i}个字段 '{token}' 应为{base_kind}，实际为{kind}"))
+                elif end != base_end:
+                    issues.append((ERROR, line_no, f"{card_name(card)}卡第{i}个字段 '{token}' 结束于第{end}列，原为第{base_end}列"))
+        return issues
+
+    def validate_design(self, variants):
+        """批量检查设计中的全部变体
+
+        Args:
+            variants: 可迭代的 (标签, 行列表)
+
+        Returns:
+            {标签: 问题列表}，只包含有问题的变体
+        """
+        problems = {}
+        for label, lines in variants:
+            issues = self.validate_variant(lines)
+            if issues:
+                problems[label] = issues
+        return problems
+
+
+def format_issues(issues, limit=20):
+    """把问题列表格式化为多行文本"""
+    names = {ERROR: '错误', WARNING: '警告'}
+    text = [f"  [{names[level]}] 第{line_no}行: {message}" if line_no else f"  [{names[level]}] {message}"
+            for level, line_no, message in issues[:limit]]
+    if len(issues) > limit:
+        text.append(f"  ……另有{len(issues) - limit}个问题")
+    return "\n".join(text)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+研究流程性能剖析模块（可选）
+为输入文件生成、keff提取、图表刷新、CSV/摘要写入等Python端环节和VSOP运行本身计时，
+区分Python端开销与求解程序耗时；可选用cProfile记录函数级耗时、tracemalloc记录内存分配
+每次研究输出一个折叠调用栈文件（*.folded，可直接用flamegraph.pl、speedscope等工具生成火焰图）和摘要
+未启用时每个环节只多一次属性检查
+
+启用方式（环境变量）:
+    KEFF_PROFILE=1                     只记录各环节耗时
+    KEFF_PROFILE=cprofile,tracemalloc  同时启用cProfile和tracemalloc
+仅使用Python标准库
+"""
+
+import os
+import time
+import functools
+import threading
+
+# 求解程序本身的环节名称，摘要中与Python端开销分开统计
+SOLVER_PHASE = 'solver'
+
+
+class _NullPhase:
+    """未启用剖析时使用的空上下文"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._push(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._pop()
+        return False
+
+
+class PhaseProfiler:
+    """按环节计时的剖析器，支持多线程（每个线程维护自己的环节栈）
+
+    Args:
+        enabled: 是否启用
+        use_cprofile: 研究期间在主线程启用cProfile
+        use_tracemalloc: 研究期间启用tracemalloc
+        output_dir: 剖析结果目录
+    """
+
+    def __init__(self, enabled=False, use_cprofile=False, use_tracemalloc=False, output_dir="profiles"):
+        self.enabled = enabled
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self.output_dir = output_dir
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._tracemalloc_started = False
+        self._reset(None)
+
+    @classmethod
+    def from_env(cls, variable='KEFF_PROFILE', **kwargs):
+        """按环境变量创建：未设置或为0时不启用"""
+        value = os.environ.get(variable, '').strip().lower()
+        if value in ('', '0', 'no', 'off'):
+            return cls(**kwargs)
+        options = {part.strip() for part in value.split(',')}
+        return cls(True, 'cprofile' in options, 'tracemalloc' in options, **kwargs)
+
+    def _reset(self, label):
+        self.label = label
+        self.stacks = {}  # 调用栈(元组) -> [次数, 总时间, 子环节时间, 最长单次]
+        self.started_at = None
+        self.stopped_at = None
+        self._cprofile = None
+        self._memory = None  # 停止时保存的 (当前分配, 峰值, 快照)
+
+    def phase(self, name):
+        """环节计时上下文: with profiler.phase('modify_input_file'): ..."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def _push(self, name):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            root = 'main' if threading.current_thread() is threading.main_thread() else 'worker'
+            stack = self._local.stack = [[root, None, 0.0]]
+        stack.append([name, time.perf_counter(), 0.0])
+
+    def _pop(self):
+        stack = self._local.stack
+        name, start, children = stack.pop()
+        elapsed = time.perf_counter() - start
+        stack[-1][2] += elapsed
+        key = tuple(frame[0] for frame in stack) + (name,)
+        with self._lock:
+            entry = self.stacks.get(key)
+            if entry is None:
+                entry = self.stacks[key] = [0, 0.0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += children
+            entry[3] = max(entry[3], elapsed)
+
+    def start(self, label='study'):
+        """开始一次研究的剖析，清空之前的记录；上一次剖析未停止时先停止"""
+        if not self.enabled:
+            return
+        self.stop()
+        self._reset(label)
+        self.started_at = time.time()
+        self._local.stack = None
+        if self.use_cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if self.use_tracemalloc:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self._tracemalloc_started = True
+
+    def stop(self):
+        """研究结束时调用：停用cProfile，停止由start启动的tracemalloc（先保存内存统计），之后仍可write"""
+        if not self.enabled or self.started_at is None or self.stopped_at is not None:
+            return
+        self.stopped_at = time.time()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._tracemalloc_started:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            self._memory = (current, peak, tracemalloc.take_snapshot())
+            tracemalloc.stop()
+            self._tracemalloc_started = False
+
+    def phase_totals(self):
+        """按环节名称汇总 {名称: (次数, 总时间, 自身时间, 最长单次)}"""
+        totals = {}
+        with self._lock:
+            items = list(self.stacks.items())
+        for key, (count, total, children, longest) in items:
+            name = key[-1]
+            c, t, s, m = totals.get(name, (0, 0.0, 0.0, 0.0))
+            totals[name] = (c + count, t + total, s + total - children, max(m, longest))
+        return totals
+
+    def write(self):
+        """写入折叠调用栈文件和摘要，返回文件名前缀；未启用或未开始时返回None
+
+        可在研究结束后多次调用（如写完CSV后再次写入），每次覆盖同一组文件；stop之后环节计时照常累计，cProfile和tracemalloc部分为停止时的结果
+        """
+        if not self.enabled or self.started_at is None:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at))
+        prefix = os.path.join(self.output_dir, f"{self.label}_{stamp}")
+        wall = time.time() - self.started_at
+
+        with self._lock:
+            items = sorted(self.stacks.items())
+        main_phases = sum(total for key, (_, total, _, _) in items if len(key) == 2 and key[0] == 'main')
+        # 折叠调用栈：每行为"栈;帧 自身时间(微秒)"，主线程未计入任何环节的时间记在main上
+        with open(prefix + '.folded', 'w', encoding='utf-8') as f:
+            f.write(f"main {max(0, int((wall - main_phases) * 1e6))}\n")
+            for key, (_, total, children, _) in items:
+                self_us = int((total - children) * 1e6)
+                if self_us > 0:
+                    f.write(f"{';'.join(key)} {self_us}\n")
+
+        totals = self.phase_totals()
+        solver = totals.get(SOLVER_PHASE, (0, 0.0, 0.0, 0.0))[1]
+        python_self = sum(s for name, (_, _, s, _) in totals.items() if name != SOLVER_PHASE)
+        with open(prefix + '_summary.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Profile: {self.label}\n")
+            f.write("=" * 40 + "\n\n")
+            f.write(f"研究总用时: {wall:.2f}秒\n")
+            f.write(f"求解程序运行（各进程累计）: {solver:.2f}秒\n")
+            f.write(f"Python端各环节自身耗时（各线程累计）: {python_self:.2f}秒\n\n")
+            f.write(f"{'环节':<28}{'次数':>8}{'总时间(s)':>12}{'自身(s)':>12}{'平均(ms)':>12}{'最长(ms)':>12}\n")
+            for name, (count, total, self_time, longest) in sorted(totals.items(), key=lambda x: -x[1][1]):
+                f.write(f"{name:<28}{count:>8}{total:>12.3f}{self_time:>12.3f}"
+                        f"{total / count * 1000:>12.2f}{longest * 1000:>12.2f}\n")
+            self._write_cprofile(f, prefix)
+            self._write_tracemalloc(f)
+        return prefix
+
+    def _write_cprofile(self, f, prefix):
+        if self._cprofile is None:
+            return
+        import io
+        import pstats
+        running = self.stopped_at is None
+        self._cprofile.disable()
+        self._cprofile.dump_stats(prefix + '.prof')
+        text = io.StringIO()
+        pstats.Stats(self._cprofile, stream=text).sort_stats('cumulative').print_stats(25)
+        f.write("\n=== cProfile（主线程，按累计时间前25项）===\n")
+        f.write(text.getvalue())
+        if running:
+            self._cprofile.enable()
+
+    def _write_tracemalloc(self, f):
+        if not self.use_tracemalloc:
+            return
+        import tracemalloc
+        if self._memory is not None:
+            current, peak, snapshot = self._memory
+        elif tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+        else:
+            return
+        f.write("\n=== tracemalloc ===\n")
+        f.write(f"当前已分配: {current / 2 ** 20:.1f} MB，峰值: {peak / 2 ** 20:.1f} MB\n")
+        for stat in snapshot.statistics('lineno')[:15]:
+            f.write(f"{stat}\n")
+
+
+def profiled(name=None):
+    """方法装饰器：用所属对象的profiler为整个方法计时，未启用时直接调用"""
+    def decorate(func):
+        phase_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if not profiler.enabled:
+                return func(self, *args, **kwargs)
+            with profiler.phase(phase_name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
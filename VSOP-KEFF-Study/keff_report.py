@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KEFF研究最终分析图表渲染模块
+使用Agg后端无界面渲染，不依赖pyplot，适用于大规模参数扫描：
+  - LTTB降采样，在保持曲线形状的前提下限制每条曲线的绘制点数
+  - 密集图层栅格化，点多时取消逐点标记
+  - 6个子图在多个进程中并行渲染后拼接为一张图
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 每条曲线最多绘制的点数
+MAX_PLOT_POINTS = 2000
+# 超过该点数时不再绘制逐点标记，并将图层栅格化
+DENSE_THRESHOLD = 200
+# 实时图表中最多标注的点数
+MAX_ANNOTATIONS = 12
+
+FIGURE_SIZE = (16, 12)
+TITLE_HEIGHT = 0.6  # 标题栏高度（英寸）
+GRID_ROWS, GRID_COLS = 2, 3
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets降采样
+
+    Returns:
+        保留点的下标数组（已排序，包含首尾两点）
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # 中间点均分为threshold-2个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # 下一个桶的平均点（最后一个桶使用末点）
+        if i < threshold - 3:
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def decimate(x, y, threshold=MAX_PLOT_POINTS, log_x=False):
+    """按曲线形状降采样，log_x为True时在log10(x)空间计算三角形面积"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= threshold:
+        return x, y
+    idx = lttb(np.log10(x) if log_x else x, y, threshold)
+    return x[idx], y[idx]
+
+
+def annotation_indices(n, limit=MAX_ANNOTATIONS):
+    """从n个点中均匀选出最多limit个需要标注的点（总是包含最后一个点）"""
+    if n <= limit:
+        return list(range(n))
+    picks = set(np.linspace(0, n - 1, limit).astype(int).tolist())
+    picks.add(n - 1)
+    return sorted(picks)
+
+
+def _line_style(n):
+    """根据点数决定标记大小和是否栅格化"""
+    if n > DENSE_THRESHOLD:
+        return {'marker': None, 'linewidth': 1.2, 'rasterized': True}
+    return {'marker': 'o', 'markersize': 8, 'linewidth': 2, 'rasterized': False}
+
+
+def _setup_worker_font(font_name):
+    import matplotlib
+    matplotlib.rcParams.update({
+        'font.family': 'sans-serif',
+        'font.sans-serif': [font_name, 'DejaVu Sans'] if font_name else ['DejaVu Sans'],
+        'axes.unicode_minus': False,
+        'font.size': 10,
+        'axes.titlesize': 12,
+        'legend.fontsize': 9,
+    })
+
+
+def render_panel(task):
+    """渲染单个子图为RGBA数组（在工作进程中执行）"""
+    kind, data, size, dpi, font_name = task
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    _setup_worker_font(font_name)
+    fig = Figure(figsize=size, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+
+    if kind in ('keff_p1', 'keff_p2', 'deviation', 'params'):
+        style = _line_style(data['n'])
+        ax.plot(data['x'], data['y'], linestyle='-', color=data['color'],
+                label=data.get('label'), **style)
+        if 'theory_x' in data:
+            ax.plot(data['theory_x'], data['theory_y'], 'b--', linewidth=2, alpha=0.7,
+                    label='Theoretical Ratio Line')
+        if 'hline' in data:
+            ax.axhline(y=data['hline'], color='red', linestyle='--', linewidth=2, alpha=0.8,
+                       label=data['hline_label'])
+        ax.set_xscale('log')
+        if data.get('log_y'):
+            ax.set_yscale('log')
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=9)
+    elif kind == 'histogram':
+        counts, edges = data['counts'], data['edges']
+        ax.stairs(counts, edges, fill=True, alpha=0.7, edgecolor='black')
+        ax.grid(True, alpha=0.3)
+    elif kind == 'stats':
+        ax.axis('off')
+        ax.text(0.1, 0.95, data['text'], transform=ax.transAxes, fontsize=10,
+                verticalalignment='top', fontfamily='monospace')
+
+    if kind != 'stats':
+        ax.set_xlabel(data['xlabel'])
+        ax.set_ylabel(data['ylabel'])
+        ax.set_title(data['title'])
+
+    fig.tight_layout()
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def render_title(title, width, dpi, font_name):
+    """渲染标题栏为RGBA数组"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    _setup_worker_font(font_name)
+    fig = Figure(figsize=(width, TITLE_HEIGHT), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    fig.text(0.5, 0.5, title, ha='center', va='center', fontsize=18, fontweight='bold')
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def build_panel_tasks(param1, param2, keff, baseline_keff, ratio, stats_text,
+                      dpi=300, font_name=None):
+    """准备6个子图的渲染任务，大数组在此处降采样，只把少量数据传给工作进程"""
+    order = np.argsort(param1)
+    p1 = np.asarray(param1, dtype=float)[order]
+    p2 = np.asarray(param2, dtype=float)[order]
+    k = np.asarray(keff, dtype=float)[order]
+    n = len(k)
+
+    width = FIGURE_SIZE[0] / GRID_COLS
+    height = (FIGURE_SIZE[1] - TITLE_HEIGHT) / GRID_ROWS
+    size = (width, height)
+    baseline_label = f'Baseline: {baseline_keff:.5f}'
+
+    x1, y1 = decimate(p1, k, log_x=True)
+    x2, y2 = decimate(p2, k, log_x=True)
+    xp, yp = decimate(p1, p2, log_x=True)
+    xd, yd = decimate(p1, k - baseline_keff, log_x=True)
+    bins = min(10, n) if n <= 100 else min(int(np.sqrt(n)), 50)
+    counts, edges = np.histogram(k, bins=bins)
+
+    panels = [
+        ('keff_p1', {'x': x1, 'y': y1, 'n': n, 'color': 'b', 'label': 'KEFF Values',
+                     'hline': baseline_keff, 'hline_label': baseline_label,
+                     'xlabel': 'Line 87 Parameter Value', 'ylabel': 'KEFF Value',
+                     'title': 'KEFF vs Line 87 Parameter'}),
+        ('keff_p2', {'x': x2, 'y': y2, 'n': n, 'color': 'r', 'label': 'KEFF Values',
+                     'hline': baseline_keff, 'hline_label': baseline_label,
+                     'xlabel': 'Line 92 Parameter Value', 'ylabel': 'KEFF Value',
+                     'title': 'KEFF vs Line 92 Parameter'}),
+        ('params', {'x': xp, 'y': yp, 'n': n, 'color': 'g', 'label': 'Actual Values',
+                    'theory_x': [p1[0], p1[-1]], 'theory_y': [p1[0] / ratio, p1[-1] / ratio],
+                    'log_y': True,
+                    'xlabel': 'Line 87 Parameter Value', 'ylabel': 'Line 92 Parameter Value',
+                    'title': 'Parameter Relationship (7.95:5)'}),
+        ('deviation', {'x': xd, 'y': yd, 'n': n, 'color': 'm',
+                       'hline': 0, 'hline_label': baseline_label,
+                       'xlabel': 'Line 87 Parameter Value', 'ylabel': 'Deviation from Baseline',
+                       'title': 'KEFF Deviation from Baseline'}),
+        ('histogram', {'counts': counts, 'edges': edges,
+                       'xlabel': 'KEFF Value', 'ylabel': 'Frequency',
+                       'title': 'KEFF Value Distribution'}),
+        ('stats', {'text': stats_text}),
+    ]
+    return [(kind, data, size, dpi, font_name) for kind, data in panels]
+
+
+def _render_all(tasks, workers):
+    if workers and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(render_panel, tasks))
+        except Exception as e:
+            print(f"并行渲染失败，改为顺序渲染: {e}")
+    return [render_panel(t) for t in tasks]
+
+
+def render_report(param1, param2, keff, baseline_keff, ratio, stats_text,
+                  filename='keff_study_analysis.png', dpi=300, font_name=None, workers=None,
+                  title='VSOP KEFF Study Results Analysis'):
+    """渲染6子图分析报告并保存为PNG
+
+    Args:
+        workers: 并行渲染进程数，默认min(6, CPU核数)，为1时顺序渲染
+    """
+    import matplotlib.image as mpimg
+
+    if workers is None:
+        workers = min(GRID_ROWS * GRID_COLS, os.cpu_count() or 1)
+    tasks = build_panel_tasks(param1, param2, keff, baseline_keff, ratio, stats_text, dpi, font_name)
+    images = _render_all(tasks, workers)
+
+    # 拼接：标题栏 + 2x3子图
+    rows = [np.concatenate(images[r * GRID_COLS:(r + 1) * GRID_COLS], axis=1)
+            for r in range(GRID_ROWS)]
+    grid = np.concatenate(rows, axis=0)
+    title_img = render_title(title, grid.shape[1] / dpi, dpi, font_name)
+    title_img = title_img[:, :grid.shape[1]]
+    if title_img.shape[1] < grid.shape[1]:
+        pad = np.full((title_img.shape[0], grid.shape[1] - title_img.shape[1], 4), 255, dtype=np.uint8)
+        title_img = np.concatenate([title_img, pad], axis=1)
+    composite = np.concatenate([title_img, grid], axis=0)
+
+    mpimg.imsave(filename, composite, dpi=dpi)
+    return filename
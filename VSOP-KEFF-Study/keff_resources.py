@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行度自动调节模块
+根据实测资源决定同时运行的VSOP进程数，并在每次运行结束后重新评估：
+  - CPU：进程可用的核（CPU亲和性）与cgroup配额（容器、作业调度系统）
+  - 内存：当前可用内存（同样受cgroup限制）/ 已观测的单个VSOP进程峰值内存（P95）
+  - 磁盘：输出目录的顺序写入吞吐量 / 单个VSOP进程的平均输出写入速率
+每个VSOP进程绑定到独占的核上，并可按观测峰值内存的倍数设置进程内存上限（Linux）
+另提供内存盘（tmpfs）上的工作目录分配，空间或内存不足时退回磁盘
+仅使用Python标准库（安装了psutil时用它读取可用内存和设置亲和性）
+"""
+
+import os
+import sys
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+
+from keff_stats import P2Quantile
+
+_CGROUP_ROOT = '/sys/fs/cgroup'
+
+
+def _read_text(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit():
+    """cgroup的CPU配额（核数，可为小数），没有限制时返回None"""
+    # cgroup v2: "配额 周期" 或 "max 周期"
+    text = _read_text(os.path.join(_CGROUP_ROOT, 'cpu.max'))
+    if text:
+        quota, _, period = text.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+    # cgroup v1
+    quota = _read_text(os.path.join(_CGROUP_ROOT, 'cpu', 'cpu.cfs_quota_us'))
+    period = _read_text(os.path.join(_CGROUP_ROOT, 'cpu', 'cpu.cfs_period_us'))
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus():
+    """可用于VSOP进程的核
+
+    Returns:
+        (可绑定的核编号列表, 可同时运行的进程数)，进程数受cgroup配额限制（向下取整，至少为1）
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    limit = cgroup_cpu_limit()
+    count = len(cpus) if limit is None else max(1, min(len(cpus), int(limit)))
+    return cpus, count
+
+
+def _cgroup_memory_available():
+    """cgroup内存上限减去当前用量，没有限制时返回None"""
+    for limit_file, usage_file in (('memory.max', 'memory.current'),
+                                   ('memory/memory.limit_in_bytes', 'memory/memory.usage_in_bytes')):
+        limit = _read_text(os.path.join(_CGROUP_ROOT, limit_file))
+        usage = _read_text(os.path.join(_CGROUP_ROOT, usage_file))
+        if limit and usage and limit != 'max' and limit.isdigit():
+            limit = int(limit)
+            if limit >= 2 ** 60:  # cgroup v1中无限制表示为极大值
+                return None
+            return max(0, limit - int(usage))
+    return None
+
+
+def _windows_memory_available():
+    try:
+        import ctypes
+
+        class MemoryStatusEx(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    except Exception:
+        pass
+    return None
+
+
+def available_memory():
+    """当前可用内存（字节），取系统可用内存与cgroup剩余额度中较小者，无法获取时返回None"""
+    candidates = [_cgroup_memory_available()]
+    try:
+        import psutil
+        candidates.append(psutil.virtual_memory().available)
+    except ImportError:
+        if sys.platform.startswith('linux'):
+            text = _read_text('/proc/meminfo') or ''
+            for line in text.splitlines():
+                if line.startswith('MemAvailable:'):
+                    candidates.append(int(line.split()[1]) * 1024)
+        elif sys.platform == 'win32':
+            candidates.append(_windows_memory_available())
+    candidates = [c for c in candidates if c is not None]
+    return min(candidates) if candidates else None
+
+
+def measure_disk_throughput(directory='.', size=32 * 2 ** 20):
+    """测量目录所在磁盘的顺序写入吞吐量（字节/秒，含fsync），失败时返回None"""
+    path = os.path.join(directory, f".keff_disk_probe_{os.getpid()}")
+    block = b'\0' * 2 ** 20
+    try:
+        start = time.perf_counter()
+        with open(path, 'wb') as f:
+            for _ in range(max(1, size // len(block))):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = time.perf_counter() - start
+        return size / elapsed if elapsed > 0 else None
+    except OSError:
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def pin_process(pid, cores):
+    """把进程绑定到指定的核，成功时返回True"""
+    if not cores:
+        return False
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(pid, cores)
+            return True
+        import psutil
+        psutil.Process(pid).cpu_affinity(list(cores))
+        return True
+    except (ImportError, OSError, ValueError):
+        return False
+    except Exception:
+        return False
+
+
+def limit_process_memory(pid, limit_bytes):
+    """设置进程的数据段上限（Linux的prlimit），超出时VSOP分配内存失败并退出，成功时返回True"""
+    try:
+        import resource
+        resource.prlimit(pid, resource.RLIMIT_DATA, (int(limit_bytes), int(limit_bytes)))
+        return True
+    except (ImportError, AttributeError, OSError, ValueError):
+        return False
+
+
+class ConcurrencyTuner:
+    """按实测资源自动调节同时运行的VSOP进程数
+
+    Args:
+        max_workers: 进程数上限，默认为可用核数
+        memory_reserve: 保留不用的可用内存比例
+        memory_limit_factor: 进程内存上限为观测峰值内存P95的倍数，None时不设上限
+        output_dir: 测量磁盘吞吐量的目录
+        refresh_interval: 两次重新评估之间的最短间隔（秒）
+    """
+
+    def __init__(self, max_workers=None, memory_reserve=0.1, memory_limit_factor=3.0, output_dir='.',
+                 refresh_interval=10.0):
+        self.cpus, self.cpu_count = available_cpus()
+        self.max_workers = max_workers or self.cpu_count
+        self.memory_reserve = memory_reserve
+        self.memory_limit_factor = memory_limit_factor
+        self.output_dir = output_dir
+        self.refresh_interval = refresh_interval
+        self.peak_memory = P2Quantile(0.95)
+        self.write_bytes = 0.0
+        self.write_seconds = 0.0
+        self.disk_throughput = None
+        self.active = 0
+        self.history = []  # (时间, 进程数, 限制因素)
+        self._free_cores = list(self.cpus)
+        self._lock = threading.Lock()
+        self._limit = None
+        self._reason = None
+        self._evaluated_at = 0.0
+
+    def observe(self, peak_memory, output_bytes, wall_time):
+        """记录一次成功运行的峰值内存、输出文件大小和运行时间，下次调用limit()时重新评估"""
+        with self._lock:
+            if peak_memory:
+                self.peak_memory.update(peak_memory)
+            if output_bytes and wall_time > 0:
+                self.write_bytes += output_bytes
+                self.write_seconds += wall_time
+            self._evaluated_at = 0.0
+
+    def limit(self):
+        """当前允许同时运行的进程数（供LPTScheduler.run的concurrency参数使用）"""
+        with self._lock:
+            now = time.time()
+            if self._limit is not None and now - self._evaluated_at < self.refresh_interval:
+                return self._limit
+            self._evaluated_at = now
+            bounds = [(self.max_workers, "进程数上限"), (self.cpu_count, "可用核数")]
+
+            peak = self.peak_memory.value()
+            free = available_memory()
+            if peak and free is not None:
+                # 可用内存已扣除正在运行的进程，只按剩余内存估计还能再启动几个
+                bounds.append((self.active + int(free * (1 - self.memory_reserve) // peak), "可用内存"))
+
+            if self.write_seconds > 0:
+                if self.disk_throughput is None:
+                    self.disk_throughput = measure_disk_throughput(self.output_dir)
+                rate = self.write_bytes / self.write_seconds
+                if self.disk_throughput and rate > 0:
+                    bounds.append((int(self.disk_throughput // rate), "磁盘吞吐量"))
+
+            limit, reason = min(bounds, key=lambda b: b[0])
+            limit = max(1, limit)
+            if limit != self._limit:
+                self.history.append((now, limit, reason))
+                if self._limit is not None:
+                    print(f"并行度调整为{limit}（受{reason}限制）")
+            self._limit, self._reason = limit, reason
+            return limit
+
+    @contextmanager
+    def slot(self):
+        """一个VSOP进程运行期间占用一个独占的核，返回绑定用的核列表（核不够时为空）"""
+        with self._lock:
+            self.active += 1
+            cores = [self._free_cores.pop(0)] if self._free_cores else []
+        try:
+            yield cores
+        finally:
+            with self._lock:
+                self.active -= 1
+                self._free_cores.extend(cores)
+                self._free_cores.sort()
+
+    def apply(self, pid, cores):
+        """把刚启动的VSOP进程绑定到核上，观测足够后设置内存上限"""
+        pin_process(pid, cores)
+        peak = self.peak_memory.value()
+        if self.memory_limit_factor and peak and self.peak_memory.count >= 3:
+            limit_process_memory(pid, peak * self.memory_limit_factor)
+
+    def describe(self):
+        parts = [f"可用核{self.cpu_count}个"]
+        free = available_memory()
+        if free is not None:
+            parts.append(f"可用内存{free / 2 ** 30:.1f} GB")
+        peak = self.peak_memory.value()
+        if peak:
+            parts.append(f"单进程峰值内存P95 {peak / 2 ** 20:.0f} MB")
+        if self.disk_throughput:
+            parts.append(f"磁盘写入{self.disk_throughput / 2 ** 20:.0f} MB/s")
+        if self._limit is not None:
+            parts.append(f"当前并行度{self._limit}（受{self._reason}限制）")
+        return "，".join(parts)
+
+
+def default_scratch_root():
+    """系统的内存盘目录（Linux的/dev/shm），没有时返回None"""
+    for path in ('/dev/shm', '/run/shm'):
+        if os.path.isdir(path) and os.access(path, os.W_OK):
+            return path
+    return None
+
+
+def directory_size(path):
+    """目录下全部文件的大小之和（字节），不跟随符号链接"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ScratchSpace:
+    """内存盘上的计算点工作目录
+
+    每个工作目录按单次运行的预计大小（已观测到的最大工作目录大小的1.25倍）预留空间，
+    预留总量超过limit、内存盘剩余空间不足或系统可用内存低于min_free_memory时不分配，由调用方退回磁盘
+
+    Args:
+        root: 内存盘目录，默认为/dev/shm
+        limit: 工作目录总大小上限（字节）
+        min_free_memory: 分配后系统至少保留的可用内存（字节）
+        initial_estimate: 尚未观测时单次运行的预计大小（字节）
+    """
+
+    def __init__(self, root=None, limit=2 * 2 ** 30, min_free_memory=2 ** 30, initial_estimate=64 * 2 ** 20):
+        root = root or default_scratch_root()
+        if root is None:
+            raise OSError("没有可用的内存盘目录")
+        self.root = os.path.join(root, f"keff_scratch_{os.getpid()}")
+        self.limit = limit
+        self.min_free_memory = min_free_memory
+        self.estimate = initial_estimate
+        self.largest = 0  # 已观测到的最大工作目录大小
+        self.reserved = {}  # 工作目录 -> 预留字节数
+        self.allocations = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def allocate(self, name):
+        """在内存盘上创建工作目录并返回路径，空间或内存不足时返回None"""
+        with self._lock:
+            need = self.estimate
+            used = sum(self.reserved.values())
+            reason = None
+            if used + need > self.limit:
+                reason = f"内存盘工作目录已预留{used / 2 ** 20:.0f} MB，达到上限{self.limit / 2 ** 20:.0f} MB"
+            else:
+                free = available_memory()
+                if free is not None and free - need < self.min_free_memory:
+                    reason = f"系统可用内存只有{free / 2 ** 20:.0f} MB"
+                else:
+                    os.makedirs(self.root, exist_ok=True)
+                    if shutil.disk_usage(self.root).free < need:
+                        reason = "内存盘剩余空间不足"
+            if reason is not None:
+                self.fallbacks += 1
+                print(f"{reason}，{name} 改在磁盘上运行")
+                return None
+            path = os.path.join(self.root, name)
+            if os.path.exists(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+            self.reserved[path] = need
+            self.allocations += 1
+            return path
+
+    def owns(self, path):
+        return path in self.reserved
+
+    def release(self, path):
+        """删除工作目录（需要保留的文件应已移出），按其实际大小更新单次运行的预计大小"""
+        size = directory_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self.reserved.pop(path, None)
+            self.largest = max(self.largest, size)
+            self.estimate = max(int(self.largest * 1.25), 2 ** 20)
+
+    def cleanup(self):
+        """研究结束后删除内存盘上的根目录"""
+        with self._lock:
+            if not self.reserved:
+                shutil.rmtree(self.root, ignore_errors=True)
+
+    def describe(self):
+        return (f"{self.root}，上限{self.limit / 2 ** 20:.0f} MB，单次运行预计{self.estimate / 2 ** 20:.0f} MB，"
+                f"已分配{self.allocations}次，退回磁盘{self.fallbacks}次")
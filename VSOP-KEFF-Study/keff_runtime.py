@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP运行时间模型
+记录每次VSOP程序的实际运行时间，按输入文件分组，拟合运行时间与log10(第87行参数值)的二次关系，
+用于运行中的剩余时间估算、参数预览工具的耗时预测以及自动分批
+仅使用Python标准库
+"""
+
+import os
+import csv
+import math
+import time
+
+DEFAULT_HISTORY_FILE = "keff_runtime_history.csv"
+DEFAULT_SECONDS_PER_POINT = 120.0  # 没有任何历史记录时的估计值（每个点约2分钟）
+MIN_SAMPLES_PER_DECK = 3  # 某个输入文件的样本数达到该值才单独拟合
+
+HISTORY_FIELDS = ['Timestamp', 'Deck', 'Line87_Parameter', 'Line92_Parameter', 'Wall_Time']
+
+
+def split_deck_key(deck):
+    """拆分模型分组名：'<输入文件>[:<保真度>][@<求解程序或用途>]' -> (输入文件, 保真度, 后缀)
+
+    保真度为空表示高保真度；后缀如A/B对比的求解程序名称、'sensitivity'
+    """
+    deck, _, variant = deck.partition('@')
+    deck, _, fidelity = deck.partition(':')
+    return deck, fidelity, variant
+
+
+def _solve_3x3(a, b):
+    """高斯消元求解3x3线性方程组，奇异时返回None"""
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(3):
+        pivot = max(range(col, 3), key=lambda r: abs(m[r][col]))
+        if abs(m[pivot][col]) < 1e-12:
+            return None
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, 3):
+            factor = m[r][col] / m[col][col]
+            for c in range(col, 4):
+                m[r][c] -= factor * m[col][c]
+    x = [0.0, 0.0, 0.0]
+    for r in range(2, -1, -1):
+        x[r] = (m[r][3] - sum(m[r][c] * x[c] for c in range(r + 1, 3))) / m[r][r]
+    return x
+
+
+class RuntimeModel:
+    """基于历史记录的VSOP运行时间模型"""
+
+    def __init__(self, history_file=DEFAULT_HISTORY_FILE):
+        self.history_file = history_file
+        self.samples = []  # (deck, log10参数值, 运行时间)
+        self._fits = {}
+        self.load()
+
+    def load(self):
+        """读取历史运行时间记录"""
+        self.samples = []
+        self._fits = {}
+        if not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        value = float(row['Line87_Parameter'])
+                        wall_time = float(row['Wall_Time'])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if value > 0 and wall_time > 0:
+                        self.samples.append((row.get('Deck', ''), math.log10(value), wall_time))
+        except OSError as e:
+            print(f"读取运行时间记录失败: {e}")
+
+    def record(self, value_1, value_2, wall_time, deck=""):
+        """追加一条运行时间记录并更新模型"""
+        new_file = not os.path.exists(self.history_file)
+        try:
+            with open(self.history_file, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow({
+                    'Timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'Deck': deck,
+                    'Line87_Parameter': f"{value_1:.6E}",
+                    'Line92_Parameter': f"{value_2:.6E}",
+                    'Wall_Time': f"{wall_time:.2f}",
+                })
+        except OSError as e:
+            print(f"写入运行时间记录失败: {e}")
+        self.samples.append((deck, math.log10(value_1), wall_time))
+        self._fits = {}
+
+    def sample_count(self, deck=None):
+        if deck is None:
+            return len(self.samples)
+        return sum(1 for d, _, _ in self.samples if d == deck)
+
+    def fallback_decks(self, deck):
+        """样本不足时可借用的分组：同一输入文件、同一保真度
+
+        A/B对比、灵敏度变体等带后缀的分组借用默认求解程序的记录；不同保真度、不同求解程序之间
+        运行时间相差很大（低保真度往往快一个数量级），互不借用，否则会把自适应超时设得过短
+        """
+        base, fidelity, variant = split_deck_key(deck)
+        decks = {deck}
+        if variant:
+            decks.add(f"{base}:{fidelity}" if fidelity else base)
+        return decks
+
+    def has_history(self, deck=""):
+        """该分组（含可借用的分组）是否有运行时间记录，没有时predict返回默认估计值"""
+        return self._fit(deck)[2] is not None
+
+    def _fit(self, deck):
+        """拟合 t = c0 + c1*x + c2*x²（x = log10参数值），样本不足时退化为均值
+
+        Returns:
+            (类型, 参数, x范围, 样本中最短运行时间)
+        """
+        if deck in self._fits:
+            return self._fits[deck]
+
+        samples = [(x, t) for d, x, t in self.samples if d == deck]
+        if len(samples) < MIN_SAMPLES_PER_DECK:
+            decks = self.fallback_decks(deck)
+            samples = [(x, t) for d, x, t in self.samples if d in decks]
+
+        if not samples:
+            fit = ('constant', DEFAULT_SECONDS_PER_POINT, None, None)
+        else:
+            mean_t = sum(t for _, t in samples) / len(samples)
+            coefficients = None
+            x_range = (min(x for x, _ in samples), max(x for x, _ in samples))
+            x_mean = sum(x for x, _ in samples) / len(samples)
+            if len({round(x, 6) for x, _ in samples}) >= 3:
+                # 以均值为中心的正规方程，改善条件数
+                s = [sum((x - x_mean) ** k for x, _ in samples) for k in range(5)]
+                a = [[s[0], s[1], s[2]], [s[1], s[2], s[3]], [s[2], s[3], s[4]]]
+                b = [sum(t * (x - x_mean) ** k for x, t in samples) for k in range(3)]
+                coefficients = _solve_3x3(a, b)
+            shortest = min(t for _, t in samples)
+            if coefficients is None:
+                fit = ('constant', mean_t, x_range, shortest)
+            else:
+                fit = ('quadratic', (coefficients, x_mean), x_range, shortest)
+        self._fits[deck] = fit
+        return fit
+
+    def predict(self, value, deck=""):
+        """预测单个参数点的运行时间（秒）"""
+        kind, params, x_range, shortest = self._fit(deck)
+        if kind == 'constant':
+            return params
+        # 超出样本范围时不外推，取边界值
+        (c0, c1, c2), x_mean = params
+        x = min(max(math.log10(value), x_range[0]), x_range[1]) - x_mean
+        predicted = c0 + c1 * x + c2 * x * x
+        # 下限取参与拟合的最短实测时间的一半，避免拟合曲线给出非正值
+        return max(predicted, shortest * 0.5)
+
+    def estimate_total(self, values, deck="", workers=1):
+        """预测一组参数点的总运行时间（秒），多进程时按理想并行折算"""
+        total = sum(self.predict(v, deck) for v in values)
+        return total / max(1, workers)
+
+    def describe(self, deck=""):
+        """模型来源的简要说明"""
+        kind, _, x_range, _ = self._fit(deck)
+        if x_range is None:
+            return f"{deck or '该输入文件'}无历史记录，按每个点{DEFAULT_SECONDS_PER_POINT / 60:.0f}分钟估算"
+        own = self.sample_count(deck)
+        if own >= MIN_SAMPLES_PER_DECK:
+            source = f"{deck}的{own}条记录"
+        else:
+            decks = self.fallback_decks(deck)
+            source = f"{'、'.join(sorted(decks))}的{sum(self.sample_count(d) for d in decks)}条记录"
+        return f"基于{source}（{'二次拟合' if kind == 'quadratic' else '平均值'}）"
+
+    def plan_batches(self, values, batch_seconds=1800, deck=""):
+        """按预测耗时把参数点顺序切分为若干批，每批约batch_seconds秒"""
+        batches = []
+        current = []
+        current_time = 0.0
+        for v in values:
+            t = self.predict(v, deck)
+            if current and current_time + t > batch_seconds:
+                batches.append(current)
+                current, current_time = [], 0.0
+            current.append(v)
+            current_time += t
+        if current:
+            batches.append(current)
+        return batches
+
+
+class EtaTracker:
+    """运行中的剩余时间估算
+
+    用模型预测剩余各点的耗时，并按本次研究中实测/预测的比值校正
+    """
+
+    def __init__(self, model, values, deck=""):
+        self.model = model
+        self.deck = deck
+        self.pending = {v: model.predict(v, deck) for v in values}
+        self.pending_total = sum(self.pending.values())
+        self.observed = 0.0
+        self.predicted_done = 0.0
+
+    def add(self, value):
+        """研究中途加入的点"""
+        if value not in self.pending:
+            self.pending[value] = self.model.predict(value, self.deck)
+            self.pending_total += self.pending[value]
+
+    def complete(self, value, wall_time):
+        """某个点完成，wall_time为None表示运行失败（只移出待算列表，不参与校正）"""
+        predicted = self.pending.pop(value, None)
+        if predicted is None:
+            return
+        self.pending_total -= predicted
+        if wall_time is not None:
+            self.observed += wall_time
+            self.predicted_done += predicted
+
+    def remaining_seconds(self, workers=1):
+        correction = self.observed / self.predicted_done if self.predicted_done > 0 else 1.0
+        return max(0.0, self.pending_total) * correction / max(1, workers)
+
+
+def format_duration(seconds):
+    """把秒数格式化为便于阅读的时长"""
+    if seconds < 60:
+        return f"{seconds:.0f}秒"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}分钟"
+    return f"{seconds / 3600:.1f}小时"
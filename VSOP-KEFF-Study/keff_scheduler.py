@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP并行计算调度模块
+按预测运行时间做最长作业优先（LPT）分配，每个工作线程维护自己的作业队列，
+空闲线程从剩余预测工作量最多的队列尾部窃取作业，尽量缩短整个研究的完工时间（makespan）
+多个研究共用线程池时按权重公平分配计算量；运行中可增删作业、调整优先级（配合控制通道）
+仅使用Python标准库
+"""
+
+import time
+import heapq
+import queue
+import threading
+from collections import deque
+
+
+class LPTScheduler:
+    """最长作业优先 + 工作窃取调度器
+
+    Args:
+        jobs: 作业列表（任意可哈希对象，如参数值）
+        predict: 预测单个作业运行时间（秒）的函数
+        workers: 并行工作线程数
+    """
+
+    def __init__(self, jobs, predict, workers):
+        self.workers = max(1, workers)
+        self.predicted = {job: max(predict(job), 1e-6) for job in jobs}
+        self.queues = [deque() for _ in range(self.workers)]
+        self.loads = [0.0] * self.workers  # 各队列剩余预测工作量
+        self.lock = threading.Lock()
+        self.steals = 0
+
+        # LPT：按预测时间从长到短，依次分给当前预测负载最小的工作线程
+        for job in sorted(jobs, key=lambda j: self.predicted[j], reverse=True):
+            target = min(range(self.workers), key=lambda w: self.loads[w])
+            self.queues[target].append(job)
+            self.loads[target] += self.predicted[job]
+        self.predicted_makespan = max(self.loads) if jobs else 0.0
+
+    def next_job(self, worker_id):
+        """取下一个作业：先取自己队列的头部（最长），为空时从最忙队列尾部（最短）窃取"""
+        with self.lock:
+            own = self.queues[worker_id]
+            if own:
+                job = own.popleft()
+                self.loads[worker_id] -= self.predicted[job]
+                return job
+            victim = max(range(self.workers), key=lambda w: self.loads[w] if self.queues[w] else -1)
+            if not self.queues[victim]:
+                return None
+            job = self.queues[victim].pop()
+            self.loads[victim] -= self.predicted[job]
+            self.steals += 1
+            return job
+
+    def pending_jobs(self):
+        """尚未开始的作业"""
+        with self.lock:
+            return [job for queue_ in self.queues for job in queue_]
+
+    def finish_job(self, job):
+        """作业执行完毕（在工作线程中调用），供可动态增删作业的调度器使用"""
+
+    def ideal_makespan(self, durations):
+        """给定实际耗时的理论下界：max(总工作量/核数, 最长单个作业)"""
+        if not durations:
+            return 0.0
+        return max(sum(durations) / self.workers, max(durations))
+
+    def run(self, func, on_result=None, on_tick=None, tick_interval=2.0, concurrency=None, deadline=None):
+        """用工作线程池执行全部作业
+
+        func(job) 在工作线程中执行；on_result(job, result, elapsed) 在调用线程中依次执行，
+        便于在主线程中更新图表；等待结果期间每隔tick_interval秒在调用线程中执行一次on_tick()
+        concurrency() 返回当前允许同时执行的作业数（如按资源自动调节），
+        超出时多余的工作线程在取作业前等待，它们队列中的作业由其他线程窃取；
+        到达deadline（time.time()时刻）后不再开始新作业，正在执行的作业照常完成
+
+        Returns:
+            调度报告字典
+        """
+        results = queue.Queue()
+        start = time.time()
+        busy = [0.0] * self.workers
+        gate = threading.Condition()
+        active = [0, 0]  # 正在执行的作业数, 峰值
+
+        def acquire():
+            with gate:
+                while concurrency is not None and active[0] >= max(1, concurrency()):
+                    # 限制可能在别处放宽（如可用内存增加），定期重新检查
+                    gate.wait(timeout=1.0)
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+
+        def release():
+            with gate:
+                active[0] -= 1
+                gate.notify_all()
+
+        def worker(worker_id):
+            while True:
+                acquire()
+                if deadline is not None and time.time() >= deadline:
+                    release()
+                    break
+                job = self.next_job(worker_id)
+                if job is None:
+                    release()
+                    break
+                job_start = time.time()
+                try:
+                    result = func(job)
+                except Exception as e:
+                    print(f"作业 {job} 执行出错: {e}")
+                    result = None
+                elapsed = time.time() - job_start
+                busy[worker_id] += elapsed
+                self.finish_job(job)
+                release()
+                results.put((job, result, elapsed))
+            results.put(None)
+
+        threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(self.workers)]
+        for t in threads:
+            t.start()
+
+        durations = []
+        finished_workers = 0
+        while finished_workers < self.workers:
+            try:
+                item = results.get(timeout=tick_interval if on_tick is not None else None)
+            except queue.Empty:
+                on_tick()
+                continue
+            if item is None:
+                finished_workers += 1
+                continue
+            job, result, elapsed = item
+            durations.append(elapsed)
+            if on_result is not None:
+                on_result(job, result, elapsed)
+
+        for t in threads:
+            t.join()
+
+        achieved = time.time() - start
+        ideal = self.ideal_makespan(durations)
+        return {
+            'workers': self.workers,
+            'jobs': len(durations),
+            'predicted_makespan': self.predicted_makespan,
+            'achieved_makespan': achieved,
+            'ideal_makespan': ideal,
+            'makespan_ratio': achieved / ideal if ideal > 0 else 1.0,
+            'utilization': sum(busy) / (self.workers * achieved) if achieved > 0 else 0.0,
+            'steals': self.steals,
+            'peak_concurrency': active[1],
+            'unstarted': len(self.pending_jobs()),
+        }
+
+
+class FairShareScheduler(LPTScheduler):
+    """多个研究共用一个工作线程池的公平份额调度器
+
+    每次取作业时，从已分配预测工作量/权重最小且还有作业的研究中取出预测时间最长的作业，
+    小研究不必等大研究算完，任何一个研究还有作业时都不会有空闲的工作线程
+
+    Args:
+        jobs: 作业列表，每个作业为 (研究名称, 作业)
+        predict: 预测单个作业（整个元组）运行时间（秒）的函数
+        workers: 并行工作线程数
+        weights: 研究名称 -> 权重（优先级），默认均为1
+    """
+
+    def __init__(self, jobs, predict, workers, weights=None):
+        self.workers = max(1, workers)
+        self.predicted = {job: max(predict(job), 1e-6) for job in jobs}
+        self.weights = {group: 1.0 for group, _ in jobs}
+        self.weights.update(weights or {})
+        self.groups = {}
+        for job in sorted(jobs, key=lambda j: self.predicted[j], reverse=True):
+            self.groups.setdefault(job[0], deque()).append(job)
+        self.served = {group: 0.0 for group in self.groups}  # 各研究已分配的预测工作量
+        self.lock = threading.Lock()
+        self.steals = 0
+        total = sum(self.predicted.values())
+        self.predicted_makespan = max(total / self.workers, max(self.predicted.values())) if jobs else 0.0
+
+    def pending_jobs(self):
+        with self.lock:
+            return [job for queue_ in self.groups.values() for job in queue_]
+
+    def next_job(self, worker_id):
+        with self.lock:
+            pending = [group for group, queue_ in self.groups.items() if queue_]
+            if not pending:
+                return None
+            group = min(pending, key=lambda g: self.served[g] / self.weights[g])
+            job = self.groups[group].popleft()
+            self.served[group] += self.predicted[job]
+            return job
+
+
+class OrderedScheduler(LPTScheduler):
+    """按给定顺序分发作业（先到先得）
+
+    用于由粗到细排序的扫描：任何时刻已开始的作业都是序列的一个前缀，
+    中途停止（如到达时间预算）时已完成的点仍均匀覆盖整个参数范围
+    """
+
+    def __init__(self, jobs, predict, workers):
+        self.workers = max(1, workers)
+        self.predicted = {job: max(predict(job), 1e-6) for job in jobs}
+        self.queue = deque(jobs)
+        self.lock = threading.Lock()
+        self.steals = 0
+        total = sum(self.predicted.values())
+        self.predicted_makespan = max(total / self.workers, max(self.predicted.values())) if jobs else 0.0
+
+    def pending_jobs(self):
+        with self.lock:
+            return list(self.queue)
+
+    def next_job(self, worker_id):
+        with self.lock:
+            return self.queue.popleft() if self.queue else None
+
+
+class PriorityScheduler(LPTScheduler):
+    """运行中可加入、取消作业和调整优先级的调度器
+
+    优先级高的作业先分发，同一优先级按加入顺序。队列为空但仍有作业在执行时，
+    空闲线程等待而不退出，以便执行之后加入的作业
+
+    Args:
+        jobs: 初始作业列表
+        predict: 预测单个作业运行时间（秒）的函数
+        workers: 工作线程数（线程池大小，实际并行数可由run的concurrency限制）
+    """
+
+    def __init__(self, jobs, predict, workers):
+        self.workers = max(1, workers)
+        self.predict = predict
+        self.predicted = {}
+        self.lock = threading.Condition()
+        self.steals = 0
+        self.heap = []  # [-优先级, 序号, 作业, 是否有效]
+        self.entries = {}  # 作业 -> heap条目
+        self.running = set()
+        self._sequence = 0
+        for job in jobs:
+            self.add(job)
+        total = sum(self.predicted.values())
+        self.predicted_makespan = max(total / self.workers, max(self.predicted.values())) if jobs else 0.0
+
+    def add(self, job, priority=0):
+        """加入作业，已在排队或执行中时返回False"""
+        with self.lock:
+            if job in self.entries or job in self.running:
+                return False
+            self.predicted[job] = max(self.predict(job), 1e-6)
+            self._push(job, priority)
+            self.lock.notify_all()
+            return True
+
+    def _push(self, job, priority):
+        self._sequence += 1
+        entry = [-priority, self._sequence, job, True]
+        self.entries[job] = entry
+        heapq.heappush(self.heap, entry)
+
+    def set_priority(self, job, priority):
+        """调整排队中作业的优先级，作业不在队列中时返回False"""
+        with self.lock:
+            entry = self.entries.get(job)
+            if entry is None:
+                return False
+            entry[3] = False
+            self._push(job, priority)
+            return True
+
+    def cancel(self, job):
+        """取消作业：返回 'queued'（已移出队列）、'running'（正在执行，需由调用方终止）或None"""
+        with self.lock:
+            entry = self.entries.pop(job, None)
+            if entry is not None:
+                entry[3] = False
+                return 'queued'
+            return 'running' if job in self.running else None
+
+    def pending_jobs(self):
+        with self.lock:
+            return [entry[2] for entry in sorted(self.heap) if entry[3]]
+
+    def next_job(self, worker_id):
+        with self.lock:
+            while True:
+                while self.heap:
+                    _, _, job, valid = heapq.heappop(self.heap)
+                    if valid:
+                        del self.entries[job]
+                        self.running.add(job)
+                        return job
+                if not self.running:
+                    return None
+                self.lock.wait(timeout=1.0)
+
+    def finish_job(self, job):
+        with self.lock:
+            self.running.discard(job)
+            self.lock.notify_all()
+
+
+def print_schedule_report(report):
+    """打印调度报告：实际完工时间与理论下界的对比"""
+    print("\n=== 并行调度报告 ===")
+    print(f"工作进程数: {report['workers']}，完成作业: {report['jobs']}，工作窃取次数: {report['steals']}")
+    if report.get('peak_concurrency', report['workers']) < min(report['workers'], report['jobs']):
+        print(f"受资源限制，最多同时运行{report['peak_concurrency']}个作业")
+    print(f"预测完工时间: {report['predicted_makespan']:.1f}秒")
+    print(f"实际完工时间: {report['achieved_makespan']:.1f}秒")
+    print(f"理论最短完工时间: {report['ideal_makespan']:.1f}秒（实际/理论 = {report['makespan_ratio']:.3f}）")
+    print(f"核心利用率: {report['utilization']:.1%}")
+    if report.get('unstarted'):
+        print(f"到达截止时间，{report['unstarted']}个作业未开始")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+临界搜索模块
+求使keff达到目标值（1.0或基准值）的第87行参数值：
+先在log10(参数值)空间中找到包围目标的区间，再用带保护的割线/逆二次插值（Brent思路）收敛，
+每轮可并行计算多个点，keff与目标之差小于容差时停止
+仅使用Python标准库
+"""
+
+import math
+
+
+class CriticalitySearch:
+    """临界搜索
+
+    Args:
+        evaluate: evaluate(values) -> {参数值: keff}，一轮计算多个点，失败的点可缺省或为None
+        target: 目标keff
+        lower, upper: 初始搜索范围（第87行参数值）
+        tolerance: keff容差
+        points_per_round: 每轮并行计算的点数
+        max_runs: 最多计算点数
+        max_expansions: 目标不在范围内时最多向外扩展的轮数
+    """
+
+    def __init__(self, evaluate, target, lower, upper, tolerance=1e-4, points_per_round=1,
+                 max_runs=12, max_expansions=4):
+        if not 0 < lower < upper:
+            raise ValueError("搜索范围必须满足 0 < 下限 < 上限")
+        self.evaluate = evaluate
+        self.target = target
+        self.lower = lower
+        self.upper = upper
+        self.tolerance = tolerance
+        self.points_per_round = max(1, points_per_round)
+        self.max_runs = max_runs
+        self.max_expansions = max_expansions
+        self.samples = []  # (log10参数值, keff - target)
+        self.history = []  # (轮次, 参数值, keff)
+        self.rounds = 0
+        self._last_estimate = None
+        self._last_width = None
+
+    @property
+    def runs(self):
+        return len(self.history)
+
+    def _run_round(self, xs):
+        """计算一轮点，返回成功的点数"""
+        values = [10 ** x for x in xs]
+        self.rounds += 1
+        keffs = self.evaluate(values)
+        added = 0
+        for x, value in zip(xs, values):
+            keff = keffs.get(value)
+            self.history.append((self.rounds, value, keff))
+            if keff is not None:
+                self.samples.append((x, keff - self.target))
+                added += 1
+        self.samples.sort()
+        return added
+
+    def best(self):
+        """与目标最接近的已计算点 (x, g)"""
+        return min(self.samples, key=lambda s: abs(s[1])) if self.samples else None
+
+    def bracket(self):
+        """包围目标的最窄相邻点对，没有时返回None"""
+        best = None
+        for (xa, ga), (xb, gb) in zip(self.samples, self.samples[1:]):
+            if ga * gb < 0 and (best is None or xb - xa < best[1][0] - best[0][0]):
+                best = ((xa, ga), (xb, gb))
+        return best
+
+    def _interpolate(self, bracket):
+        """区间内的根估计：优先用区间附近3点做逆二次插值，失败时用割线，再按Brent思路保护"""
+        (xa, ga), (xb, gb) = bracket
+        width = xb - xa
+        estimate = xa - ga * width / (gb - ga)
+
+        # 逆二次插值：取区间两端和区间外最近的一个点
+        others = [s for s in self.samples if s[0] < xa or s[0] > xb]
+        if others:
+            xc, gc = min(others, key=lambda s: min(abs(s[0] - xa), abs(s[0] - xb)))
+            if len({ga, gb, gc}) == 3:
+                iqi = (xa * gb * gc / ((ga - gb) * (ga - gc))
+                       + xb * ga * gc / ((gb - ga) * (gb - gc))
+                       + xc * ga * gb / ((gc - ga) * (gc - gb)))
+                if xa < iqi < xb:
+                    estimate = iqi
+
+        # 保护：估计值贴近端点，或上一轮区间没有缩小一半时改用二分
+        margin = 0.05 * width
+        if not xa + margin < estimate < xb - margin:
+            estimate = min(max(estimate, xa + margin), xb - margin)
+        if self._last_width is not None and width > 0.5 * self._last_width:
+            estimate = 0.5 * (estimate + 0.5 * (xa + xb))
+        return estimate
+
+    def _refine_points(self, bracket):
+        """区间内的下一轮计算点：以根估计为中心排布，点数为每轮并行数"""
+        (xa, _), (xb, _) = bracket
+        width = xb - xa
+        estimate = self._interpolate(bracket)
+        n = self.points_per_round
+        if n == 1:
+            points = [estimate]
+        else:
+            spacing = width / (n + 1)
+            if self._last_estimate is not None:
+                # 根估计已趋于稳定时收紧排布，使下一轮区间更窄
+                spacing = min(spacing, max(2 * abs(estimate - self._last_estimate), 0.01 * width) / (n - 1))
+            # 根估计本身加上两侧交替排布的点：0, -s, +s, -2s, ...
+            offsets = [0.0] + [(-1) ** k * ((k + 1) // 2) * spacing for k in range(1, n)]
+            low, high = xa + 0.5 * spacing, xb - 0.5 * spacing
+            points = [min(max(estimate + d, low), high) for d in offsets]
+        self._last_estimate = estimate
+        self._last_width = width
+        return sorted(set(points))
+
+    def _expansion_points(self):
+        """目标不在已计算范围内：沿keff接近目标的方向外推"""
+        xs = [s[0] for s in self.samples]
+        span = max(xs) - min(xs) or 1.0
+        (x1, g1), (x2, g2) = self.samples[0], self.samples[-1]
+        # 向|g|较小的一端外推，步长不超过当前范围宽度
+        near, far = ((x1, g1), (x2, g2)) if abs(g1) < abs(g2) else ((x2, g2), (x1, g1))
+        direction = 1.0 if near[0] > far[0] else -1.0
+        step = span
+        if g1 != g2:
+            root = near[0] - near[1] * (x2 - x1) / (g2 - g1)
+            if (root - near[0]) * direction > 0:
+                step = min(span, abs(root - near[0]) * 1.2)
+        n = self.points_per_round
+        return [near[0] + direction * step * (k + 1) / n for k in range(n)]
+
+    def converged(self):
+        best = self.best()
+        return best is not None and abs(best[1]) <= self.tolerance
+
+    def run(self):
+        """执行搜索，返回结果字典"""
+        n_initial = max(2, self.points_per_round)
+        x_low, x_high = math.log10(self.lower), math.log10(self.upper)
+        initial = [x_low + (x_high - x_low) * k / (n_initial - 1) for k in range(n_initial)]
+        message = None
+        if self._run_round(initial) < 2:
+            message = "初始点计算失败，无法开始搜索"
+
+        expansions = 0
+        while message is None and not self.converged():
+            if self.runs >= self.max_runs:
+                message = f"已达到最多计算点数{self.max_runs}"
+                break
+            bracket = self.bracket()
+            if bracket is None:
+                if expansions >= self.max_expansions:
+                    message = "扩展范围后仍未找到包围目标keff的区间"
+                    break
+                expansions += 1
+                points = self._expansion_points()
+            else:
+                (xa, _), (xb, _) = bracket
+                if xb - xa < 1e-9:
+                    message = "搜索区间已无法继续缩小"
+                    break
+                points = self._refine_points(bracket)
+            points = points[:self.max_runs - self.runs]
+            if self._run_round(points) == 0:
+                message = "本轮所有计算点均失败"
+                break
+
+        return self.result(message)
+
+    def result(self, message=None):
+        best = self.best()
+        bracket = self.bracket()
+        estimate = None
+        if bracket is not None:
+            (xa, ga), (xb, gb) = bracket
+            estimate = 10 ** (xa - ga * (xb - xa) / (gb - ga))
+        return {
+            'target': self.target,
+            'converged': self.converged(),
+            'value': 10 ** best[0] if best else None,
+            'keff': best[1] + self.target if best else None,
+            'estimate': estimate,
+            'bracket': (10 ** bracket[0][0], 10 ** bracket[1][0]) if bracket else None,
+            'runs': self.runs,
+            'rounds': self.rounds,
+            'history': list(self.history),
+            'message': message,
+        }
+
+
+def print_search_report(result, ratio=7.95 / 5.0):
+    """打印临界搜索结果和每轮计算记录"""
+    print("\n=== 临界搜索结果 ===")
+    print(f"目标keff: {result['target']:.5f}")
+    for round_no, value, keff in result['history']:
+        keff_text = f"{keff:.5f} ({keff - result['target']:+.5f})" if keff is not None else "失败"
+        print(f"  第{round_no}轮  {value:.6E}  keff = {keff_text}")
+    if result['value'] is not None:
+        status = "已收敛" if result['converged'] else "未收敛"
+        print(f"{status}：第87行参数值 = {result['value']:.6E}（第92行 = {result['value'] / ratio:.6E}），"
+              f"keff = {result['keff']:.5f}")
+    if result['estimate'] is not None:
+        low, high = result['bracket']
+        print(f"插值估计: {result['estimate']:.6E}（包围区间 {low:.6E} - {high:.6E}）")
+    if result['message']:
+        print(f"说明: {result['message']}")
+    print(f"共{result['rounds']}轮，{result['runs']}次VSOP计算")
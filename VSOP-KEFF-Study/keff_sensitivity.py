@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全局灵敏度筛选模块（Morris基本效应法）
+对用户选定的任意输入卡字段在给定范围内做Morris轨迹抽样：每条轨迹k+1次计算（k为字段数），
+每一步只改变一个字段，由keff的变化得到该字段的基本效应；按|基本效应|的均值μ*对字段排序，
+σ表示非线性或与其他字段的交互作用
+轨迹分批追加，直到每个字段μ*的置信区间半宽达到目标精度，尽量少用求解程序计算
+仅使用Python标准库
+"""
+
+import csv
+import math
+import random
+from statistics import mean, stdev
+
+from keff_abtest import t_quantile
+
+
+class DeckField:
+    """一个参与筛选的输入文件字段
+
+    Args:
+        line: 行号（从1开始）
+        field: 字段序号（从0开始，与apply_overrides一致）
+        low, high: 取值范围
+        log: 是否在对数空间均匀取值（跨数量级的参数）
+        name: 显示名称，默认为"L行号F字段序号"
+    """
+
+    def __init__(self, line, field, low, high, log=False, name=None):
+        if not low < high:
+            raise ValueError(f"第{line}行字段{field}: 下限必须小于上限")
+        if log and low <= 0:
+            raise ValueError(f"第{line}行字段{field}: 对数取值要求下限大于0")
+        self.line = line
+        self.field = field
+        self.low = low
+        self.high = high
+        self.log = log
+        self.name = name or f"L{line}F{field}"
+
+    def value(self, u):
+        """单位区间[0, 1]上的坐标对应的字段值"""
+        if self.log:
+            return math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low)))
+        return self.low + u * (self.high - self.low)
+
+    def unit(self, value):
+        """字段值对应的单位区间坐标（value的逆）"""
+        if self.log:
+            return (math.log(value) - math.log(self.low)) / (math.log(self.high) - math.log(self.low))
+        return (value - self.low) / (self.high - self.low)
+
+    def format(self, value, original):
+        """按原字段的写法格式化新值：整数仍为整数，科学计数法保持尾数位数和指数字母（E或D）
+
+        Returns:
+            (字段文本, 格式化后实际写入的数值)
+        """
+        text = original.strip()
+        exponent = next((c for c in text.upper() if c in 'ED'), None)
+        if exponent is None and text.lstrip('+-').isdigit():
+            value = int(round(value))
+            return str(value), float(value)
+        if exponent is not None:
+            mantissa = text.upper().split(exponent)[0]
+            decimals = len(mantissa.split('.')[1]) if '.' in mantissa else 0
+            formatted = f"{value:.{decimals}E}"
+            return formatted.replace('E', exponent), float(formatted)
+        decimals = len(text.split('.')[1]) if '.' in text else 0
+        formatted = f"{value:.{decimals}f}" if decimals else f"{value:g}"
+        if value != 0 and float(formatted) == 0:
+            # 小数位数不足以表示新值（如原值0.0001、新值1e-5），改用科学计数法
+            formatted = f"{value:.{max(decimals - 3, 1)}E}"
+        return formatted, float(formatted)
+
+    def describe(self):
+        scale = "，对数均匀" if self.log else ""
+        return f"{self.name}（第{self.line}行字段{self.field}）: {self.low:g} - {self.high:g}{scale}"
+
+
+class MorrisDesign:
+    """Morris轨迹生成：p个水平的网格，每步把一个字段改变Δ = p/(2(p-1))
+
+    Args:
+        fields: DeckField列表
+        levels: 网格水平数（偶数）
+        seed: 随机数种子，便于复现
+    """
+
+    def __init__(self, fields, levels=4, seed=None):
+        if levels < 2 or levels % 2:
+            raise ValueError("水平数必须为不小于2的偶数")
+        self.fields = list(fields)
+        self.levels = levels
+        self.delta = levels / (2 * (levels - 1))
+        self._rng = random.Random(seed)
+
+    def trajectory(self):
+        """一条轨迹：k+1个单位坐标点，相邻两点只有一个字段不同
+
+        Returns:
+            (点列表, 每一步改变的字段序号列表)
+        """
+        grid = self.levels - 1
+        point = []
+        for _ in self.fields:
+            # 起点取在网格上，低半区向上走Δ，高半区向下走Δ，保证不越界
+            level = self._rng.randrange(self.levels)
+            point.append(level / grid)
+        order = list(range(len(self.fields)))
+        self._rng.shuffle(order)
+        points = [tuple(point)]
+        for index in order:
+            step = self.delta if point[index] + self.delta <= 1 + 1e-12 else -self.delta
+            point[index] = min(1.0, max(0.0, point[index] + step))
+            points.append(tuple(point))
+        return points, order
+
+
+class MorrisEstimate:
+    """Morris基本效应的统计和停止判据
+
+    每个字段μ*置信区间的半宽都不超过 max(rel_precision × 最大μ*, abs_precision) 时停止；
+    轨迹数不足min_trajectories时不停止，达到max_trajectories时强制停止。
+    基本效应按单位区间坐标计算，即字段从下限变到上限时keff的变化
+
+    Args:
+        fields: DeckField列表
+        confidence: 置信水平
+        rel_precision: μ*置信区间半宽相对最大μ*的目标
+        abs_precision: μ*置信区间半宽的绝对目标（keff），低于计算噪声的影响不必再细分
+    """
+
+    def __init__(self, fields, confidence=0.95, rel_precision=0.1, abs_precision=5e-5,
+                 min_trajectories=4, max_trajectories=50):
+        self.fields = list(fields)
+        self.confidence = confidence
+        self.rel_precision = rel_precision
+        self.abs_precision = abs_precision
+        self.min_trajectories = min_trajectories
+        self.max_trajectories = max_trajectories
+        self.effects = [[] for _ in self.fields]
+        self.trajectories = 0
+        self.failures = 0  # 因计算失败缺少的基本效应
+
+    @property
+    def runs_per_trajectory(self):
+        return len(self.fields) + 1
+
+    def add(self, values, order, keffs):
+        """加入一条轨迹的计算结果
+
+        Args:
+            values: 每个点实际写入的字段值（元组），与轨迹的点一一对应
+            order: 每一步改变的字段序号
+            keffs: 每个点的keff，计算失败为None
+        """
+        self.trajectories += 1
+        for step, index in enumerate(order):
+            before, after = keffs[step], keffs[step + 1]
+            field = self.fields[index]
+            du = field.unit(values[step + 1][index]) - field.unit(values[step][index])
+            if before is None or after is None or abs(du) < 1e-12:
+                self.failures += 1
+                continue
+            self.effects[index].append((after - before) / du)
+
+    def summary(self, index):
+        """一个字段的 {'n', 'mu', 'mu_star', 'sigma', 'half_width'}"""
+        effects = self.effects[index]
+        n = len(effects)
+        result = {'n': n, 'mu': None, 'mu_star': None, 'sigma': None, 'half_width': None}
+        if n == 0:
+            return result
+        absolute = [abs(e) for e in effects]
+        result['mu'] = mean(effects)
+        result['mu_star'] = mean(absolute)
+        if n >= 2:
+            result['sigma'] = stdev(effects)
+            result['half_width'] = t_quantile(0.5 + self.confidence / 2, n - 1) * stdev(absolute) / math.sqrt(n)
+        return result
+
+    def target(self):
+        """μ*置信区间半宽的目标值"""
+        largest = max((s['mu_star'] or 0.0 for s in map(self.summary, range(len(self.fields)))), default=0.0)
+        return max(self.rel_precision * largest, self.abs_precision)
+
+    def done(self):
+        """返回 (是否停止, 原因)"""
+        if self.trajectories >= self.max_trajectories:
+            return True, f"已达到最大轨迹数{self.max_trajectories}"
+        if self.trajectories < self.min_trajectories:
+            return False, None
+        target = self.target()
+        for index in range(len(self.fields)):
+            half = self.summary(index)['half_width']
+            if half is None or half > target:
+                return False, None
+        return True, "各字段μ*的置信区间达到目标精度"
+
+    def batch_size(self, workers):
+        """下一批轨迹数：按各字段基本效应的离散程度估计还需要的轨迹数，
+        至少让每个进程有一次计算，不超过剩余上限"""
+        remaining = self.max_trajectories - self.trajectories
+        fill = int(math.ceil(workers / self.runs_per_trajectory))
+        if self.trajectories < self.min_trajectories:
+            needed = self.min_trajectories - self.trajectories
+        else:
+            # 半宽按1/sqrt(n)缩小
+            target = self.target()
+            z = t_quantile(0.5 + self.confidence / 2, max(self.trajectories - 1, 3))
+            needed = 0
+            for effects in self.effects:
+                if len(effects) >= 2:
+                    spread = stdev([abs(e) for e in effects])
+                    needed = max(needed, (z * spread / target) ** 2 - len(effects))
+            needed = min(needed, self.trajectories)  # 估计值不可靠，每批最多使轨迹数翻倍
+        return max(0, min(remaining, max(fill, int(math.ceil(needed)))))
+
+    def ranking(self):
+        """按μ*从大到小排列的 (字段, 统计)"""
+        items = [(field, self.summary(i)) for i, field in enumerate(self.fields)]
+        return sorted(items, key=lambda item: -(item[1]['mu_star'] or 0.0))
+
+    def report_lines(self):
+        pct = self.confidence * 100
+        lines = [f"轨迹数: {self.trajectories}（每条{self.runs_per_trajectory}次计算），"
+                 f"缺失的基本效应: {self.failures}",
+                 f"{'排名':<6}{'字段':<16}{'μ*':>12}{f'±{pct:.0f}%':>12}{'μ':>12}{'σ':>12}{'σ/μ*':>8}"]
+        for rank, (field, s) in enumerate(self.ranking(), 1):
+            if s['mu_star'] is None:
+                lines.append(f"{rank:<6}{field.name:<16}{'无数据':>12}")
+                continue
+            half = '-' if s['half_width'] is None else f"{s['half_width']:.2e}"
+            sigma = '-' if s['sigma'] is None else f"{s['sigma']:.2e}"
+            ratio = '-' if s['sigma'] is None or s['mu_star'] == 0 else f"{s['sigma'] / s['mu_star']:.2f}"
+            lines.append(f"{rank:<6}{field.name:<16}{s['mu_star']:>12.2e}{half:>12}{s['mu']:>+12.2e}"
+                         f"{sigma:>12}{ratio:>8}")
+        lines.append("μ*: 字段从下限变到上限时keff变化的平均幅度；σ/μ*较大表示非线性或与其他字段有交互作用")
+        return lines
+
+    def save_csv(self, filename):
+        """每个字段一行，按μ*排序"""
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Rank', 'Field', 'Line', 'Field_Index', 'Low', 'High', 'Log_Scale',
+                             'Mu_Star', 'Mu_Star_Half_Width', 'Mu', 'Sigma', 'Effects'])
+
+            def fmt(value):
+                return '' if value is None else f"{value:.6e}"
+
+            for rank, (field, s) in enumerate(self.ranking(), 1):
+                writer.writerow([rank, field.name, field.line, field.field, f"{field.low:g}", f"{field.high:g}",
+                                 int(field.log), fmt(s['mu_star']), fmt(s['half_width']), fmt(s['mu']),
+                                 fmt(s['sigma']), s['n']])
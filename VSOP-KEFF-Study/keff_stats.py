@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KEFF结果增量统计模块
+每得到一个结果只更新一次，实时显示、CSV、统计摘要和Excel输出共用同一份统计量
+仅使用Python标准库
+"""
+
+import math
+
+
+class P2Quantile:
+    """P²算法流式分位数估计（Jain & Chlamtac, 1985）
+
+    只保存5个标记点，内存和每次更新的开销均为O(1)
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def update(self, x):
+        """加入一个观测值"""
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        h = self.heights
+        n = self.positions
+
+        # 确定x所在的区间并更新极值
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= h[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # 调整中间3个标记点
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        h = self.heights
+        n = self.positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        """当前分位数估计值，样本不足5个时直接取有序样本"""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            index = int(round(self.q * (self.count - 1)))
+            return self.heights[index]
+        return self.heights[2]
+
+
+class KeffStatistics:
+    """KEFF结果增量统计器
+
+    使用Welford算法维护均值和方差，同时维护KEFF和两个参数的极值、
+    最小参数点的KEFF（作为变化百分比的参考值）以及流式分位数。
+    与基准值的偏差统计均由极值和均值直接推出，不再逐点重算。
+    """
+
+    def __init__(self, baseline_keff, quantiles=(0.25, 0.5, 0.75)):
+        self.baseline_keff = baseline_keff
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min_keff = None
+        self.max_keff = None
+        self.min_param1 = None
+        self.max_param1 = None
+        self.min_param2 = None
+        self.max_param2 = None
+        self.reference_keff = None  # 最小第87行参数值对应的keff
+        self._quantiles = {q: P2Quantile(q) for q in quantiles}
+
+    def update(self, param1, param2, keff):
+        """加入一个计算结果"""
+        self.count += 1
+        delta = keff - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (keff - self.mean)
+
+        if self.count == 1:
+            self.min_keff = self.max_keff = keff
+            self.min_param1 = self.max_param1 = param1
+            self.min_param2 = self.max_param2 = param2
+            self.reference_keff = keff
+        else:
+            self.min_keff = min(self.min_keff, keff)
+            self.max_keff = max(self.max_keff, keff)
+            if param1 < self.min_param1:
+                self.min_param1 = param1
+                self.reference_keff = keff
+            self.max_param1 = max(self.max_param1, param1)
+            self.min_param2 = min(self.min_param2, param2)
+            self.max_param2 = max(self.max_param2, param2)
+
+        for estimator in self._quantiles.values():
+            estimator.update(keff)
+
+    def update_result(self, result):
+        """加入一条结果记录（与results列表中的字典格式一致）"""
+        self.update(result['parameter_value_1'], result['parameter_value_2'], result['keff'])
+
+    @property
+    def variance(self):
+        """总体方差（与原先按n求标准差的口径一致）"""
+        return self._m2 / self.count if self.count > 0 else 0.0
+
+    @property
+    def sample_variance(self):
+        """样本方差（n-1）"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def keff_range(self):
+        return self.max_keff - self.min_keff if self.count else 0.0
+
+    @property
+    def max_change_percent(self):
+        """相对参考keff的最大变化百分比"""
+        if self.count < 2 or not self.reference_keff:
+            return 0.0
+        ref = self.reference_keff
+        return max(abs(self.max_keff - ref), abs(self.min_keff - ref)) / abs(ref) * 100
+
+    @property
+    def min_deviation(self):
+        return self.min_keff - self.baseline_keff
+
+    @property
+    def max_deviation(self):
+        return self.max_keff - self.baseline_keff
+
+    @property
+    def avg_deviation(self):
+        return self.mean - self.baseline_keff
+
+    @property
+    def max_abs_deviation(self):
+        return max(abs(self.min_deviation), abs(self.max_deviation))
+
+    @property
+    def deviation_range(self):
+        return self.max_deviation - self.min_deviation
+
+    def quantile(self, q):
+        """流式分位数估计值"""
+        estimator = self._quantiles.get(q)
+        return estimator.value() if estimator else None
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    def change_from_reference(self, keff):
+        """单个keff相对参考值的变化量和变化百分比"""
+        change = keff - self.reference_keff
+        return change, change / self.reference_keff * 100
+
+    def deviation_from_baseline(self, keff):
+        """单个keff相对基准值的偏差和偏差百分比"""
+        deviation = keff - self.baseline_keff
+        return deviation, deviation / self.baseline_keff * 100
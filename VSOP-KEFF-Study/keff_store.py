@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KEFF研究结果存储
+以JSON Lines格式逐条追加每次运行的记录（成功、失败、隔离等），
+可在研究进行中被其他进程读取；仅使用Python标准库
+"""
+
+import os
+import json
+import time
+import threading
+
+from keff_fidelity import FIDELITY_HIGH
+
+DEFAULT_STORE_FILE = "keff_results_store.jsonl"
+
+# 运行记录状态
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+STATUS_QUARANTINED = 'quarantined'
+STATUS_RELEASED = 'released'
+STATUS_RUNNING = 'running'  # 一次尝试开始，供监控服务显示正在计算的点
+STATUS_CANCELLED = 'cancelled'  # 通过控制通道取消的点
+
+# 研究级事件记录（没有point字段），供监控服务区分每次研究
+EVENT_STUDY_START = 'study_start'
+EVENT_STUDY_END = 'study_end'
+
+
+# 不属于参数扫描本身的运行所带的附加字段：A/B对比的求解程序、灵敏度筛选中修改过其他字段的输入、
+# 不确定性传播的样本序号（第92行参数不按比例）
+VARIANT_FIELDS = ('backend', 'input_hash', 'sample')
+
+
+def point_key(value):
+    """参数点的统一键（与输出文件名一致的6位科学计数法）"""
+    return f"{value:.6E}"
+
+
+def is_variant_record(record):
+    """记录是否来自变体运行（带VARIANT_FIELDS中的字段），这类记录不计入参数扫描的结果"""
+    return any(field in record for field in VARIANT_FIELDS)
+
+
+class ResultsStore:
+    """追加写入的运行记录存储，多线程写入安全"""
+
+    def __init__(self, path=DEFAULT_STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        """追加一条记录，自动补充时间戳"""
+        record = dict(record)
+        record.setdefault('timestamp', time.strftime('%Y-%m-%d %H:%M:%S'))
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        return record
+
+    def records(self):
+        """按写入顺序逐条读取记录，忽略写了一半的末行"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def quarantined(self, deck, fidelity=FIDELITY_HIGH):
+        """返回某个输入文件下当前处于隔离状态的参数点 {point_key: 记录}
+
+        没有保真度标记的记录视为高保真度；变体运行（A/B对比、灵敏度筛选、不确定性传播样本，
+        见VARIANT_FIELDS）不计入
+        """
+        state = {}
+        for record in self.records():
+            if record.get('deck') != deck or 'point' not in record or is_variant_record(record):
+                continue
+            if record.get('fidelity', FIDELITY_HIGH) != fidelity and record.get('status') != STATUS_RELEASED:
+                continue
+            status = record.get('status')
+            if status == STATUS_QUARANTINED:
+                state[record['point']] = record
+            elif status in (STATUS_RELEASED, STATUS_OK):
+                state.pop(record['point'], None)
+        return state
+
+    def completed(self, deck, fidelity=FIDELITY_HIGH):
+        """某个输入文件下已成功计算的参数点 {point_key: 最近一条成功记录}
+
+        变体运行（A/B对比、灵敏度筛选、不确定性传播样本，见VARIANT_FIELDS）的记录不计入
+        """
+        done = {}
+        for record in self.records():
+            if record.get('deck') != deck or record.get('status') != STATUS_OK or is_variant_record(record):
+                continue
+            if record.get('fidelity', FIDELITY_HIGH) == fidelity:
+                done[record['point']] = record
+        return done
+
+    def completed_inputs(self, deck):
+        """已成功计算过的输入文件内容 {input_hash: keff}，用于灵敏度筛选时复用相同输入的结果"""
+        cache = {}
+        for record in self.records():
+            if record.get('deck') == deck and record.get('status') == STATUS_OK and 'input_hash' in record:
+                cache[record['input_hash']] = record['keff']
+        return cache
+
+    def release(self, deck, points):
+        """解除隔离，使这些点在下次研究中重新计算"""
+        for point in points:
+            self.append({'deck': deck, 'point': point, 'status': STATUS_RELEASED})
@@ -13,6 +13,14 @@ import numpy as np
 import time
 from pathlib import Path
 
+from keff_stats import KeffStatistics
+from keff_runtime import RuntimeModel, EtaTracker, format_duration
+from keff_store import (ResultsStore, point_key, STATUS_OK, STATUS_FAILED, STATUS_QUARANTINED, STATUS_RUNNING,
+                        EVENT_STUDY_START, EVENT_STUDY_END)
+from keff_failures import (AdaptiveTimeout, RetryPolicy, classify_output_state, FAILURE_NAMES, FAILURE_TIMEOUT,
+                           FAILURE_CRASH, TRANSIENT_FAILURES)
+from vsop_output import STATE_LABELS
+
 class KeffStudyAutomation:
     def __init__(self):
         self.original_file = "first_begin.i"
@@ -20,7 +28,14 @@ class KeffStudyAutomation:
         self.target_line_1 = 87  # 第1个目标行号
         self.target_line_2 = 92  # 第2个目标行号
         self.ratio = 7.95 / 5.0  # 第1个数据与第2个数据的比例 (7.95:5)
+        self.baseline_keff = 1.22370  # 基准KEFF值
         self.results = []
+        self.stats = KeffStatistics(self.baseline_keff)  # 增量统计，每个结果更新一次
+        self.runtime_model = RuntimeModel()  # 基于历史记录的运行时间模型
+        self.store = ResultsStore()  # 每次运行的记录（成功、失败、隔离），与简化版共用
+        self.retry_policy = RetryPolicy()  # 瞬时失败重试3次，指数退避
+        self.timeouts = AdaptiveTimeout()  # 研究开始时按运行时间模型重新初始化
+        self.retry_quarantined = False  # 是否重新计算已隔离的参数点
         
     def backup_original_file(self):
         """备份原始文件"""
@@ -103,15 +118,22 @@ class KeffStudyAutomation:
             print("修改失败")
             return False
     
-    def run_vsop_program(self, value):
-        """运行VSOP程序"""
+    def run_vsop_program(self, value, timeout=600):
+        """运行VSOP程序并对失败进行分类
+        
+        Returns:
+            (输出文件名, 失败类型, 错误信息)，成功时失败类型为None
+        """
         output_filename = f"{value:.6E}.out"
+        process = None
         
         try:
             # 创建输入序列
             input_sequence = f"{self.original_file}\n{output_filename}\n"
             
-            print(f"正在运行VSOP程序，输出文件: {output_filename}")
+            print(f"正在运行VSOP程序，输出文件: {output_filename}（超时{timeout:.0f}秒）")
+            if os.path.exists(output_filename):
+                os.remove(output_filename)
             
             # 运行程序
             process = subprocess.Popen(
@@ -124,69 +146,108 @@ class KeffStudyAutomation:
             )
             
             # 发送输入
-            stdout, stderr = process.communicate(input=input_sequence, timeout=600)  # 10分钟超时
+            stdout, stderr = process.communicate(input=input_sequence, timeout=timeout)
             
             if process.returncode == 0:
                 print(f"程序运行成功，输出文件: {output_filename}")
-                return output_filename
+                return output_filename, None, None
             else:
                 print(f"程序运行失败，返回码: {process.returncode}")
                 print(f"错误信息: {stderr}")
-                return None
+                return None, FAILURE_CRASH, f"返回码 {process.returncode}: {stderr.strip()[-500:]}"
                 
         except subprocess.TimeoutExpired:
-            print("程序运行超时（10分钟）")
+            print(f"程序运行超时（{timeout:.0f}秒）")
             process.kill()
-            return None
+            process.communicate()
+            return None, FAILURE_TIMEOUT, f"超过{timeout:.0f}秒未结束"
         except Exception as e:
             print(f"运行程序时发生错误: {e}")
-            return None
+            if process is not None and process.poll() is None:
+                process.kill()
+            return None, FAILURE_CRASH, str(e)
     
-    def extract_keff_value(self, output_file):
-        """从输出文件中提取keff值"""
-        try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # 搜索标题行
-            target_header = "TIME (D)   K-EFF    POW-DENS   POW/BALL   FUEL TEMP    DISCH.-BU   POWER    TEMP.   TEMP."
-            header_line_index = -1
-            
-            for i, line in enumerate(lines):
-                if target_header in line:
-                    header_line_index = i
-                    print(f"找到标题行于第{i+1}行")
-                    break
-            
-            if header_line_index == -1:
-                print(f"错误：未找到标题行 '{target_header}'")
-                return None
+    def solve_point(self, value):
+        """运行一个计算点并提取keff，失败分类、自适应超时、重试和隔离与简化版相同
+        
+        Returns:
+            {'output_file', 'keff', 'state', 'solver_time'}，失败时返回None
+        """
+        deck = os.path.basename(self.original_file)
+        failure = None
+        timeout = None
+        failures = []
+        
+        for attempt in range(1, self.retry_policy.max_attempts + 1):
+            timeout = self.timeouts.for_attempt(failure, timeout)
+            self.store.append({'deck': deck, 'point': point_key(value), 'parameter_value_1': value,
+                               'status': STATUS_RUNNING, 'attempt': attempt})
+            solver_start = time.time()
+            output_file, failure, message = self.run_vsop_program(value, timeout)
+            solver_time = time.time() - solver_start
             
-            # 获取标题行下方第3行
-            target_line_index = header_line_index + 3
-            if target_line_index >= len(lines):
-                print(f"错误：标题行下方第3行超出文件范围")
-                return None
+            keff_value = None
+            state = {}
+            if failure is None:
+                keff_value, state, failure, message = classify_output_state(output_file)
             
-            target_line = lines[target_line_index]
-            print(f"数据行（第{target_line_index+1}行）: {target_line.strip()}")
+            record = {
+                'deck': deck,
+                'point': point_key(value),
+                'parameter_value_1': value,
+                'attempt': attempt,
+                'wall_time': round(solver_time, 3),
+                'timeout': round(timeout, 1),
+            }
+            if failure is None:
+                print(f"提取到keff值: {keff_value}")
+                self.timeouts.observe(solver_time)
+                self.store.append(dict(record, status=STATUS_OK, keff=keff_value, output_file=output_file,
+                                       state=state))
+                return {'output_file': output_file, 'keff': keff_value, 'state': state, 'solver_time': solver_time}
             
-            parts = target_line.split()
-            if len(parts) >= 3:
-                try:
-                    keff_value = float(parts[2])  # 第三个值
-                    print(f"提取到keff值: {keff_value}")
-                    return keff_value
-                except ValueError:
-                    print(f"错误：无法解析keff值 '{parts[2]}'")
-                    return None
+            print(f"第{attempt}次尝试失败：{FAILURE_NAMES[failure]}（{message}）")
+            failures.append(failure)
+            self.store.append(dict(record, status=STATUS_FAILED, failure=failure, message=message))
+            if not self.retry_policy.should_retry(failure, attempt):
+                break
+            delay = self.retry_policy.backoff(attempt)
+            print(f"{delay:.0f}秒后重试...")
+            time.sleep(delay)
+        
+        # 确定性失败，或所有尝试都以同一种方式失败：隔离该点
+        if failure not in TRANSIENT_FAILURES or len(set(failures)) == 1:
+            self.store.append({
+                'deck': deck,
+                'point': point_key(value),
+                'parameter_value_1': value,
+                'status': STATUS_QUARANTINED,
+                'failure': failure,
+                'attempts': len(failures),
+            })
+            print(f"参数点 {value:.6E} 已隔离（{FAILURE_NAMES[failure]}），后续研究将跳过该点")
+        return None
+    
+    def skip_quarantined(self, parameter_values):
+        """去掉结果存储中已隔离的参数点（retry_quarantined为True时解除隔离后重新计算）"""
+        deck = os.path.basename(self.original_file)
+        quarantined = self.store.quarantined(deck)
+        remaining = []
+        for value in parameter_values:
+            record = quarantined.get(point_key(value))
+            if record is None:
+                remaining.append(value)
+            elif self.retry_quarantined:
+                self.store.release(deck, [point_key(value)])
+                remaining.append(value)
             else:
-                print(f"错误：数据行格式不正确，仅有{len(parts)}个字段")
-                return None
-                
-        except Exception as e:
-            print(f"提取keff值时发生错误: {e}")
-            return None
+                print(f"跳过已隔离的参数点 {value:.6E}（{FAILURE_NAMES.get(record.get('failure'), '未知失败')}）")
+        return remaining
+    
+    def record_result(self, result):
+        """记录一个计算结果，并增量更新统计信息"""
+        self.results.append(result)
+        self.stats.update_result(result)
     
     def generate_parameter_values(self, start=1e-8, end=9e-7, num_points=9):
         """生成参数值序列"""
@@ -200,6 +261,10 @@ class KeffStudyAutomation:
         """运行完整的研究"""
         if parameter_values is None:
             parameter_values = self.generate_parameter_values()
+        parameter_values = self.skip_quarantined(list(parameter_values))
+        if not parameter_values:
+            print("没有需要计算的参数点")
+            return
         
         print(f"开始keff研究，共{len(parameter_values)}个参数值")
         print(f"参数范围: {parameter_values[0]:.2E} 到 {parameter_values[-1]:.2E}")
@@ -209,6 +274,13 @@ class KeffStudyAutomation:
         self.backup_original_file()
         
         start_time = time.time()
+        deck = os.path.basename(self.original_file)
+        eta = EtaTracker(self.runtime_model, parameter_values, deck)
+        print(f"预计总运行时间: {format_duration(eta.remaining_seconds())}（{self.runtime_model.describe(deck)}）")
+        self.timeouts = AdaptiveTimeout.from_model(self.runtime_model, parameter_values, deck)
+        print(f"初始超时时间: {self.timeouts.current():.0f}秒（之后按实测运行时间P95自适应调整）")
+        self.store.append({'event': EVENT_STUDY_START, 'deck': deck, 'mode': 'sweep',
+                           'planned': len(parameter_values), 'workers': 1, 'started_at': time.time()})
         
         for i, value in enumerate(parameter_values, 1):
             print(f"\n=== 运行 {i}/{len(parameter_values)}: 第87行参数值 = {value:.6E} ===")
@@ -218,31 +290,35 @@ class KeffStudyAutomation:
             
             # 修改输入文件
             if not self.modify_input_file(value):
+                eta.complete(value, None)
                 continue
             
-            # 运行程序
-            output_file = self.run_vsop_program(value)
-            if output_file is None:
+            # 运行程序并提取keff值（失败时自动分类、重试或隔离）
+            outcome = self.solve_point(value)
+            if outcome is None:
+                eta.complete(value, None)
                 continue
-            
-            # 提取keff值
-            keff_value = self.extract_keff_value(output_file)
-            if keff_value is not None:
-                self.results.append({
-                    'parameter_value_1': value,
-                    'parameter_value_2': value_2,
-                    'keff': keff_value,
-                    'output_file': output_file
-                })
+            self.runtime_model.record(value, value_2, outcome['solver_time'], deck)
+            eta.complete(value, outcome['solver_time'])
+            self.record_result({
+                'parameter_value_1': value,
+                'parameter_value_2': value_2,
+                'keff': outcome['keff'],
+                'output_file': outcome['output_file'],
+                **outcome['state']
+            })
             
             iteration_time = time.time() - iteration_start
-            print(f"完成 {i}/{len(parameter_values)}, 用时: {iteration_time:.1f}秒")
+            print(f"完成 {i}/{len(parameter_values)}, 用时: {iteration_time:.1f}秒, 预计剩余: {format_duration(eta.remaining_seconds())}")
         
         # 恢复原始文件
         self.restore_original_file()
         
         total_time = time.time() - start_time
+        self.store.append({'event': EVENT_STUDY_END, 'deck': deck, 'results': len(self.results),
+                           'finished_at': time.time()})
         print(f"\n研究完成！共获得{len(self.results)}个有效结果，总用时: {total_time/60:.1f}分钟")
+        print(f"详细记录见: {self.store.path}")
         
     def restore_original_file(self):
         """恢复原始文件"""
@@ -263,16 +339,19 @@ class KeffStudyAutomation:
         # 创建DataFrame
         df = pd.DataFrame(self.results)
         
-        # 计算统计信息
-        first_keff = df['keff'].iloc[0]
-        df['keff_change'] = df['keff'] - first_keff
-        df['keff_change_percent'] = (df['keff_change'] / first_keff) * 100
+        # 统计信息由增量统计器提供
+        st = self.stats
+        df['keff_change'] = df['keff'] - st.reference_keff
+        df['keff_change_percent'] = (df['keff_change'] / st.reference_keff) * 100
         
-        # 重新排列列顺序
-        df = df[['parameter_value_1', 'parameter_value_2', 'keff', 'keff_change', 'keff_change_percent', 'output_file']]
+        # 重新排列列顺序，运行状态列（K-EFF表中keff所在行）放在最后
+        state_fields = [name for name in STATE_LABELS if name in df.columns]
+        df = df[['parameter_value_1', 'parameter_value_2', 'keff', 'keff_change', 'keff_change_percent', 'output_file']
+                + state_fields]
         
         # 重命名列
-        df.columns = ['第87行参数值', '第92行参数值', 'keff值', 'keff变化', 'keff变化百分比(%)', '输出文件']
+        df.columns = (['第87行参数值', '第92行参数值', 'keff值', 'keff变化', 'keff变化百分比(%)', '输出文件']
+                      + [STATE_LABELS[name] for name in state_fields])
         
         # 保存到Excel
         with pd.ExcelWriter(filename, engine='openpyxl') as writer:
@@ -289,17 +368,27 @@ class KeffStudyAutomation:
                     'keff变化范围',
                     '最大变化百分比',
                     '平均keff值',
+                    'keff标准差',
+                    'keff中位数',
+                    'keff四分位数(Q1 - Q3)',
+                    '与基准值平均偏差',
+                    '与基准值最大绝对偏差',
                     '总计算次数'
                 ],
                 '值': [
-                    f"{df['第87行参数值'].min():.2E} - {df['第87行参数值'].max():.2E}",
-                    f"{df['第92行参数值'].min():.2E} - {df['第92行参数值'].max():.2E}",
+                    f"{st.min_param1:.2E} - {st.max_param1:.2E}",
+                    f"{st.min_param2:.2E} - {st.max_param2:.2E}",
                     f"7.95:5 = {self.ratio:.3f}",
-                    f"{df['keff值'].min():.6f} - {df['keff值'].max():.6f}",
-                    f"{df['keff值'].max() - df['keff值'].min():.6f}",
-                    f"{df['keff变化百分比(%)'].abs().max():.4f}%",
-                    f"{df['keff值'].mean():.6f}",
-                    f"{len(df)}"
+                    f"{st.min_keff:.6f} - {st.max_keff:.6f}",
+                    f"{st.keff_range:.6f}",
+                    f"{st.max_change_percent:.4f}%",
+                    f"{st.mean:.6f}",
+                    f"{st.std:.6f}",
+                    f"{st.median:.6f}",
+                    f"{st.quantile(0.25):.6f} - {st.quantile(0.75):.6f}",
+                    f"{st.avg_deviation:+.6f}",
+                    f"{st.max_abs_deviation:.6f}",
+                    f"{st.count}"
                 ]
             }
             
@@ -310,11 +399,11 @@ class KeffStudyAutomation:
         
         # 显示简要统计
         print(f"\n=== 结果统计 ===")
-        print(f"第87行参数值范围: {df['第87行参数值'].min():.2E} - {df['第87行参数值'].max():.2E}")
-        print(f"第92行参数值范围: {df['第92行参数值'].min():.2E} - {df['第92行参数值'].max():.2E}")
-        print(f"keff值范围: {df['keff值'].min():.6f} - {df['keff值'].max():.6f}")
-        print(f"keff变化范围: {df['keff值'].max() - df['keff值'].min():.6f}")
-        print(f"最大变化百分比: {df['keff变化百分比(%)'].abs().max():.4f}%")
+        print(f"第87行参数值范围: {st.min_param1:.2E} - {st.max_param1:.2E}")
+        print(f"第92行参数值范围: {st.min_param2:.2E} - {st.max_param2:.2E}")
+        print(f"keff值范围: {st.min_keff:.6f} - {st.max_keff:.6f}")
+        print(f"keff变化范围: {st.keff_range:.6f}")
+        print(f"最大变化百分比: {st.max_change_percent:.4f}%")
 
 def main():
     """主函数"""
@@ -361,7 +450,9 @@ def main():
         ratio_check = val / val_2
         print(f"{i:2d}   | {val:.6E} | {val_2:.6E} | {ratio_check:.3f}")
     
-    print(f"\n预计总运行时间: 约{len(parameter_values) * 2}分钟")
+    deck = os.path.basename(automation.original_file)
+    estimated = automation.runtime_model.estimate_total(parameter_values, deck)
+    print(f"\n预计总运行时间: 约{format_duration(estimated)}（{automation.runtime_model.describe(deck)}）")
     
     # 确认继续
     response = input("\n是否继续运行研究？(y/n): ")
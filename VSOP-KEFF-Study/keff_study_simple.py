@@ -12,14 +12,42 @@ import csv
 import math
 import time
 import sys
+import threading
+import random
+import copy
+import hashlib
+import heapq
+from contextlib import nullcontext
+
+from keff_stats import KeffStatistics
+from keff_runtime import RuntimeModel, EtaTracker, format_duration
+from keff_scheduler import (LPTScheduler, FairShareScheduler, OrderedScheduler, PriorityScheduler,
+                            print_schedule_report)
+from keff_store import (ResultsStore, point_key, STATUS_OK, STATUS_FAILED, STATUS_QUARANTINED, STATUS_RUNNING,
+                        STATUS_CANCELLED, EVENT_STUDY_START, EVENT_STUDY_END)
+from keff_failures import (AdaptiveTimeout, RetryPolicy, classify_output_state, FAILURE_NAMES,
+                           FAILURE_TIMEOUT, FAILURE_STALLED, FAILURE_CRASH, FAILURE_INTERNAL, TRANSIENT_FAILURES)
+from keff_watchdog import SolverWatchdog, WAIT_TIMEOUT, WAIT_STALLED
+from vsop_output import OutputFifo, move_with_index, STATE_LABELS
+from keff_search import CriticalitySearch, print_search_report
+from keff_uncertainty import CorrelatedLognormalSampler, UncertaintyEstimate
+from keff_abtest import PairedComparison
+from keff_sensitivity import DeckField, MorrisDesign, MorrisEstimate
+from keff_profile import PhaseProfiler, profiled, SOLVER_PHASE
+from keff_resources import ConcurrencyTuner, ScratchSpace, default_scratch_root
+from keff_pipeline import Pipeline, Stage, Requeue, print_pipeline_report
+from keff_control import ControlChannel, DEFAULT_CONTROL_FILE, CMD_ADD, CMD_PRIORITY, CMD_CANCEL, CMD_WORKERS
+from keff_preflight import DeckValidator, format_issues
+from keff_fidelity import (FIDELITY_HIGH, FIDELITY_LOW, FidelityCalibration, relax_convergence,
+                           apply_overrides, select_promotions)
 
 # 尝试导入matplotlib进行可视化
 try:
     import matplotlib.pyplot as plt
     import matplotlib.patches as patches
     from matplotlib.animation import FuncAnimation
-    import numpy as np
     import matplotlib.font_manager as fm
+    from keff_report import render_report, decimate, annotation_indices, DENSE_THRESHOLD
     
     def setup_fonts():
         """设置matplotlib字体"""
@@ -129,6 +157,43 @@ except ImportError:
     print("未检测到matplotlib，将以纯文本模式运行")
     print("如需可视化功能，请安装: pip install matplotlib")
 
+def coarse_to_fine_order(n):
+    """n个等距网格点的由粗到细顺序（下标）：先两端，再反复取最大间隙的中点
+    
+    n = 2^k + 1 时即二进细分，同一层内按van der Corput序列排列，使任意前缀都尽量均匀覆盖整个范围；
+    点数从 2^k + 1 增加到 2^(k+1) + 1 时原有的点全部保留
+    """
+    if n <= 2:
+        return list(range(n))
+    
+    def radical_inverse(i):
+        result, scale = 0.0, 0.5
+        while i:
+            result += (i & 1) * scale
+            i >>= 1
+            scale /= 2
+        return result
+    
+    order = [0, n - 1]
+    gaps = [(-(n - 1), 0.0, 0, n - 1)]
+    while gaps:
+        _, _, left, right = heapq.heappop(gaps)
+        if right - left < 2:
+            continue
+        middle = (left + right) // 2
+        order.append(middle)
+        for l, r in ((left, middle), (middle, right)):
+            heapq.heappush(gaps, (-(r - l), radical_inverse(l // (r - l)), l, r))
+    return order
+
+def _link_or_copy(src, dst):
+    """优先创建硬链接，跨文件系统或不支持时复制文件"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
 class KeffStudySimple:
     def __init__(self):
         self.original_file = "first_begin.i"
@@ -140,6 +205,70 @@ class KeffStudySimple:
         self.fixed_value_line99 = 201  # 第99行的固定值
         self.baseline_keff = 1.22370  # 基准KEFF值
         self.results = []
+        self.stats = KeffStatistics(self.baseline_keff)  # 增量统计，每个结果更新一次
+        self.runtime_model = RuntimeModel()  # 基于历史记录的运行时间模型
+        
+        # 失败处理相关
+        self.store = ResultsStore()  # 每次运行的记录（成功、失败、隔离）
+        self.retry_policy = RetryPolicy()  # 瞬时失败重试3次，指数退避
+        self.timeouts = AdaptiveTimeout()  # 研究开始时按运行时间模型重新初始化
+        self.retry_quarantined = False  # 是否重新计算已隔离的参数点
+        self.failure_counts = {}
+        self._failure_lock = threading.Lock()
+        self.stall_window = 180.0  # 输出文件、CPU时间、程序输出均无变化超过该秒数即判定为停滞
+        self.live_progress = {}  # 正在运行的 (参数值, 标签) -> (燃耗步, 时间, keff)
+        self._progress_lock = threading.Lock()
+        self._progress_counts = (0, 0)  # (已完成点数, 总点数)
+        
+        # 并行计算相关
+        self.max_workers = 1  # 并行运行的VSOP进程数，1为原有的顺序模式
+        self.tuner = None  # 启用自动调节后为ConcurrencyTuner，max_workers为其上限
+        self.runs_dir = "runs"  # 并行模式下每个计算点的独立工作目录
+        self.support_files = ["Libraries", "rstcit"]  # 需要放入工作目录的库文件和输入文件
+        self.scratch = None  # 启用内存盘后为ScratchSpace，工作目录优先建在内存盘上
+        self.keep_files = []  # 运行结束后随输出文件保留的其他文件（如"rstnew"），保存为 <输出文件>.<文件名>
+        
+        # 流式输出：输出文件名换成命名管道，边写边解析，只保存K-EFF表等已知段落（见vsop_output.OutputFifo）；
+        # stream_archive为True时另存完整输出的gzip副本 <输出文件>.gz
+        self.stream_output = False
+        self.stream_archive = False
+        
+        # 求解程序的stdout/stderr逐行写入 logs_dir 下每次运行的gzip日志，内存中每个流只保留最后log_tail_chars个字符；
+        # 日志路径记入结果存储（stdout_log、stderr_log），solver_logs为False时不写日志
+        self.solver_logs = True
+        self.logs_dir = "logs"
+        self.log_tail_chars = 4096
+        
+        # 控制通道（见keff_control.py）：设置控制文件后，参数扫描运行中可加点、调整优先级、取消和调整进程数
+        self.control_file = None
+        self._cancelled = set()  # 已取消的参数点（point_key）
+        self._processes = {}  # 正在运行的 (参数值, 标签) -> VSOP进程，标签区分同一参数点同时进行的多次运行
+        
+        # 为True时参数扫描按流水线运行（见keff_pipeline.py）：输入文件生成、求解、keff提取、输出文件保存重叠进行，
+        # 每个点在runs/下的独立工作目录中计算，只放入support_files；默认关闭：单进程在原目录逐点顺序计算，
+        # 多进程使用LPT线程池
+        self.pipelined = False
+        
+        # 多保真度相关
+        self.screening_convergence = 1e-3  # 筛选计算的V 6卡收敛判据（原为0.0001）
+        self.screening_overrides = []  # 筛选计算额外覆盖的字段 [(行号, 字段序号, 新值)]，如减少燃耗步
+        self.screening_dir = "screening"  # 低保真度输出文件目录
+        self.screening_results = []
+        self.uncertainty_dir = "uncertainty"  # 不确定性传播样本的输出文件目录
+        self.sensitivity_dir = "sensitivity"  # 灵敏度筛选的输出文件目录（按输入内容摘要命名）
+        
+        # 求解程序A/B对比相关：名称 -> 程序路径或命令列表（如 ["python3", "vsop_stub.py"]）
+        self.solver_backends = {
+            "MS": "VSOP99_11-MS.exe",
+            "ZUT": "VSOP99_11-ZUT.exe",
+        }
+        self.abtest_dir = "abtest"  # A/B对比的输出文件目录（按求解程序分子目录）
+        
+        # 多输入文件研究相关：每个输入文件的输出文件、CSV和摘要放在campaign_dir下以输入文件命名的子目录
+        self.campaign_dir = "campaign"
+        
+        # 性能剖析（设置环境变量KEFF_PROFILE启用，见keff_profile.py）
+        self.profiler = PhaseProfiler.from_env()
         
         # 可视化相关
         self.enable_visualization = MATPLOTLIB_AVAILABLE
@@ -199,6 +328,7 @@ class KeffStudySimple:
         plt.ion()  # 开启交互模式
         plt.show()
         
+    @profiled()
     def update_progress_bar(self, current, total, status_text=""):
         """更新进度条"""
         if not self.enable_visualization or self.ax_progress is None:
@@ -224,14 +354,16 @@ class KeffStudySimple:
         plt.draw()
         plt.pause(0.001)
         
+    @profiled()
     def update_keff_plot(self):
         """更新KEFF值图表"""
         if not self.enable_visualization or self.ax_keff is None or len(self.results) == 0:
             return
             
-        # 提取数据
-        param_values = [r['parameter_value_1'] for r in self.results]
-        keff_values = [r['keff'] for r in self.results]
+        # 提取数据（按参数值排序）
+        sorted_data = sorted((r['parameter_value_1'], r['keff']) for r in self.results)
+        param_values = [p for p, _ in sorted_data]
+        keff_values = [k for _, k in sorted_data]
         
         self.ax_keff.clear()
         self.ax_keff.set_title('KEFF Value Changes', fontsize=14)
@@ -239,8 +371,10 @@ class KeffStudySimple:
         self.ax_keff.set_ylabel('KEFF Value')
         self.ax_keff.grid(True, alpha=0.3)
         
-        # 绘制数据点和连线
-        self.ax_keff.plot(param_values, keff_values, 'bo-', linewidth=2, markersize=6, label='KEFF Values')
+        # 绘制数据点和连线（点数较多时降采样并取消逐点标记）
+        plot_x, plot_y = decimate(param_values, keff_values, log_x=True)
+        marker = 'o' if len(plot_x) <= DENSE_THRESHOLD else None
+        self.ax_keff.plot(plot_x, plot_y, 'b-', marker=marker, linewidth=2, markersize=6, label='KEFF Values')
         self.ax_keff.set_xscale('log')
         
         # 添加基准线
@@ -248,8 +382,9 @@ class KeffStudySimple:
             self.ax_keff.axhline(y=self.baseline_keff, color='red', linestyle='--', linewidth=2, 
                                 alpha=0.8, label=f'Baseline: {self.baseline_keff:.5f}')
         
-        # 添加数值标签和与基准值的偏差
-        for i, (x, y) in enumerate(zip(param_values, keff_values)):
+        # 添加数值标签和与基准值的偏差（最多标注MAX_ANNOTATIONS个点）
+        for i in annotation_indices(len(param_values)):
+            x, y = param_values[i], keff_values[i]
             deviation = y - self.baseline_keff
             self.ax_keff.annotate(f'{y:.4f}\n({deviation:+.4f})', (x, y), textcoords="offset points", 
                                 xytext=(0,10), ha='center', fontsize=8)
@@ -258,6 +393,7 @@ class KeffStudySimple:
         plt.draw()
         plt.pause(0.001)
         
+    @profiled()
     def update_params_plot(self):
         """更新参数关系图"""
         if not self.enable_visualization or self.ax_params is None or len(self.results) == 0:
@@ -273,8 +409,11 @@ class KeffStudySimple:
         self.ax_params.set_ylabel('Line 92 Parameter Value')
         self.ax_params.grid(True, alpha=0.3)
         
-        # 绘制数据点和理论直线
-        self.ax_params.plot(param1_values, param2_values, 'ro-', linewidth=2, markersize=6, label='Actual Values')
+        # 绘制数据点和理论直线（点数较多时降采样并取消逐点标记）
+        order = sorted(range(len(param1_values)), key=param1_values.__getitem__)
+        plot_x, plot_y = decimate([param1_values[i] for i in order], [param2_values[i] for i in order], log_x=True)
+        marker = 'o' if len(plot_x) <= DENSE_THRESHOLD else None
+        self.ax_params.plot(plot_x, plot_y, 'r-', marker=marker, linewidth=2, markersize=6, label='Actual Values')
         
         # 绘制理论比例线
         if param1_values:
@@ -289,6 +428,7 @@ class KeffStudySimple:
         plt.draw()
         plt.pause(0.001)
         
+    @profiled()
     def update_stats_display(self):
         """更新统计信息显示"""
         if not self.enable_visualization or self.ax_stats is None or len(self.results) == 0:
@@ -298,49 +438,30 @@ class KeffStudySimple:
         self.ax_stats.set_title('Real-time Statistics', fontsize=14)
         self.ax_stats.axis('off')
         
-        # 计算统计信息
-        keff_values = [r['keff'] for r in self.results]
-        param1_values = [r['parameter_value_1'] for r in self.results]
-        param2_values = [r['parameter_value_2'] for r in self.results]
-        
-        min_keff = min(keff_values)
-        max_keff = max(keff_values)
-        avg_keff = sum(keff_values) / len(keff_values)
-        keff_range = max_keff - min_keff
-        
-        # 基准值比较统计
-        deviations = [k - self.baseline_keff for k in keff_values]
-        min_deviation = min(deviations)
-        max_deviation = max(deviations)
-        avg_deviation = sum(deviations) / len(deviations)
-        max_abs_deviation = max(abs(d) for d in deviations)
-        
-        if len(keff_values) > 1:
-            first_keff = keff_values[0]
-            max_change_percent = max(abs((k - first_keff) / first_keff * 100) for k in keff_values)
-        else:
-            max_change_percent = 0
+        # 统计信息由增量统计器提供
+        st = self.stats
         
         # 创建统计信息文本
         stats_text = f"""
-Current Results: {len(self.results)}
+Current Results: {st.count}
         
 KEFF Statistics:
-• Minimum: {min_keff:.6f}
-• Maximum: {max_keff:.6f}
-• Average: {avg_keff:.6f}
-• Range: {keff_range:.6f}
-• Max Change: {max_change_percent:.4f}%
+• Minimum: {st.min_keff:.6f}
+• Maximum: {st.max_keff:.6f}
+• Average: {st.mean:.6f}
+• Median: {st.median:.6f}
+• Range: {st.keff_range:.6f}
+• Max Change: {st.max_change_percent:.4f}%
 
 Baseline Comparison ({self.baseline_keff:.5f}):
-• Min Deviation: {min_deviation:+.6f}
-• Max Deviation: {max_deviation:+.6f}
-• Avg Deviation: {avg_deviation:+.6f}
-• Max Abs Dev: {max_abs_deviation:.6f}
+• Min Deviation: {st.min_deviation:+.6f}
+• Max Deviation: {st.max_deviation:+.6f}
+• Avg Deviation: {st.avg_deviation:+.6f}
+• Max Abs Dev: {st.max_abs_deviation:.6f}
 
 Parameter Range:
-• Line 87: {min(param1_values):.2E} - {max(param1_values):.2E}
-• Line 92: {min(param2_values):.2E} - {max(param2_values):.2E}
+• Line 87: {st.min_param1:.2E} - {st.max_param1:.2E}
+• Line 92: {st.min_param2:.2E} - {st.max_param2:.2E}
 • Ratio Check: {self.ratio:.3f}
         """
         
@@ -369,22 +490,24 @@ Parameter Range:
             shutil.copy2(self.original_file, backup_name)
             print(f"已备份原始文件到: {backup_name}")
     
-    def modify_input_file(self, new_value_1):
-        """修改输入文件中的参数值
+    @profiled()
+    def render_input_lines(self, new_value_1, fidelity=FIDELITY_HIGH, new_value_2=None, base_lines=None,
+                           verbose=True):
+        """生成一个参数点的输入文件内容（不写文件）
         
         Args:
-            new_value_1: 第87行第2个数据的新值
+            base_lines: 原始输入文件的行列表，批量生成时传入以避免重复读文件
+            verbose: 是否打印修改过程
+        
+        Returns:
+            行列表，失败时返回None
         """
-        try:
-            with open(self.original_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        except UnicodeDecodeError:
-            # 如果UTF-8失败，尝试其他编码
-            with open(self.original_file, 'r', encoding='gbk') as f:
-                lines = f.readlines()
+        log = print if verbose else (lambda *args, **kwargs: None)
+        lines = list(base_lines) if base_lines is not None else self.read_input_lines()
         
         # 根据比例计算第2个数据的值
-        new_value_2 = new_value_1 / self.ratio  # 第2个数据 = 第1个数据 / (7.95/5)
+        if new_value_2 is None:
+            new_value_2 = new_value_1 / self.ratio  # 第2个数据 = 第1个数据 / (7.95/5)
         
         success = True
         
@@ -397,12 +520,12 @@ Parameter Range:
                 # 替换第2个数据，保持格式一致
                 new_line_1 = f"   {parts_1[0]}    {new_value_1:.6E}                                                        D 17\n"
                 lines[target_line_1_index] = new_line_1
-                print(f"已修改第{self.target_line_1}行参数值为: {new_value_1:.6E}")
+                log(f"已修改第{self.target_line_1}行参数值为: {new_value_1:.6E}")
             else:
-                print(f"错误：无法解析第{self.target_line_1}行")
+                log(f"错误：无法解析第{self.target_line_1}行")
                 success = False
         else:
-            print(f"错误：第{self.target_line_1}行超出文件范围")
+            log(f"错误：第{self.target_line_1}行超出文件范围")
             success = False
         
         # 修改第92行的第2个数据
@@ -414,12 +537,12 @@ Parameter Range:
             # 替换第2个数据，保持格式一致
                 new_line_2 = f"   {parts_2[0]}    {new_value_2:.6E}                                                        D 17\n"
                 lines[target_line_2_index] = new_line_2
-                print(f"已修改第{self.target_line_2}行参数值为: {new_value_2:.6E}")
+                log(f"已修改第{self.target_line_2}行参数值为: {new_value_2:.6E}")
             else:
-                print(f"错误：无法解析第{self.target_line_2}行")
+                log(f"错误：无法解析第{self.target_line_2}行")
                 success = False
         else:
-            print(f"错误：第{self.target_line_2}行超出文件范围")
+            log(f"错误：第{self.target_line_2}行超出文件范围")
             success = False
         
         # 修改第99行为固定格式（保持最后的数字"2"不变）
@@ -428,24 +551,58 @@ Parameter Range:
             # 设置第99行为完整的固定格式
             fixed_line_99 = "   201     0     0     0                0.                       0     2    V  7\n"
             lines[target_line_3_index] = fixed_line_99
-            print(f"已设置第{self.target_line_3}行为固定格式: 201 ... 2")
+            log(f"已设置第{self.target_line_3}行为固定格式: 201 ... 2")
         else:
-            print(f"错误：第{self.target_line_3}行超出文件范围")
+            log(f"错误：第{self.target_line_3}行超出文件范围")
             success = False
         
         # 验证比例关系
         if success:
             actual_ratio = new_value_1 / new_value_2
             expected_ratio = self.ratio
-            print(f"比例验证: {new_value_1:.6E} / {new_value_2:.6E} = {actual_ratio:.3f} (期望: {expected_ratio:.3f})")
+            log(f"比例验证: {new_value_1:.6E} / {new_value_2:.6E} = {actual_ratio:.3f} (期望: {expected_ratio:.3f})")
         
-        if success:
+        if success and fidelity == FIDELITY_LOW:
+            try:
+                lines = relax_convergence(lines, self.screening_convergence)
+                lines = apply_overrides(lines, self.screening_overrides)
+                log(f"低保真度设置: 收敛判据 {self.screening_convergence:g}")
+            except (ValueError, IndexError) as e:
+                log(f"错误：无法生成低保真度输入: {e}")
+                success = False
+        
+        return lines if success else None
+    
+    def read_input_lines(self):
+        """读取原始输入文件的全部行"""
+        try:
+            with open(self.original_file, 'r', encoding='utf-8') as f:
+                return f.readlines()
+        except UnicodeDecodeError:
+            # 如果UTF-8失败，尝试其他编码
+            with open(self.original_file, 'r', encoding='gbk') as f:
+                return f.readlines()
+    
+    @profiled()
+    def modify_input_file(self, new_value_1, target_file=None, fidelity=FIDELITY_HIGH, new_value_2=None):
+        """修改输入文件中的参数值
+        
+        Args:
+            new_value_1: 第87行第2个数据的新值
+            target_file: 写入的文件路径，默认直接修改原始输入文件（并行模式下写入各点的工作目录）
+            fidelity: 低保真度时放宽V 6卡收敛判据并应用screening_overrides
+            new_value_2: 第92行第2个数据的新值，默认按比例由new_value_1计算（不确定性传播时单独抽样）
+        """
+        lines = self.render_input_lines(new_value_1, fidelity, new_value_2)
+        
+        if lines is not None:
             # 写回文件
+            target_file = target_file or self.original_file
             try:
-                with open(self.original_file, 'w', encoding='utf-8') as f:
+                with open(target_file, 'w', encoding='utf-8') as f:
                     f.writelines(lines)
             except UnicodeDecodeError:
-                with open(self.original_file, 'w', encoding='gbk') as f:
+                with open(target_file, 'w', encoding='gbk') as f:
                     f.writelines(lines)
             
             print(f"已成功修改两个参数值，保持比例 7.95:5")
@@ -454,113 +611,723 @@ Parameter Range:
             print("修改失败")
             return False
     
-    def run_vsop_program(self, value):
-        """运行VSOP程序"""
+    def run_vsop_program(self, value, workdir=None, timeout=600):
+        """运行VSOP程序
+        
+        Args:
+            value: 第87行参数值，用于命名输出文件
+            workdir: 工作目录，默认当前目录（并行模式下为各点的独立目录）
+            timeout: 超时时间（秒）
+        
+        Returns:
+            输出文件名，失败时返回None
+        """
+        output_filename, _, _ = self.run_solver(value, workdir, timeout)
+        return output_filename
+    
+    def solver_command(self, program=None, workdir=None):
+        """求解程序的命令行
+        
+        program可以是程序路径或命令列表，默认为program_path；
+        在独立工作目录中运行时，存在的相对路径转换为绝对路径
+        """
+        program = self.program_path if program is None else program
+        command = [program] if isinstance(program, str) else list(program)
+        if workdir:
+            command = [os.path.abspath(part) if os.path.exists(part) else part for part in command]
+        return command
+    
+    @profiled()
+    def run_solver(self, value, workdir=None, timeout=600, program=None, usage=None, tag=None):
+        """运行VSOP程序并对失败进行分类
+        
+        Args:
+            program: 求解程序路径或命令列表，默认为program_path
+            usage: 传入字典时写入本次运行的CPU时间和峰值内存（'cpu_time'、'peak_memory'）
+            tag: 同一参数点同时进行多次运行时（如灵敏度变体、A/B对比）区分各次运行，与工作目录的tag一致
+        
+        Returns:
+            (输出文件名, 失败类型, 错误信息)，成功时失败类型为None
+        """
         output_filename = f"{value:.6E}.out"
+        run_key = (value, tag or '')
+        process = None
+        stream = None
         
         try:
             # 创建输入序列
-            input_sequence = f"{self.original_file}\n{output_filename}\n"
+            input_sequence = f"{os.path.basename(self.original_file)}\n{output_filename}\n"
+            
+            print(f"正在运行VSOP程序，输出文件: {output_filename}（超时{timeout:.0f}秒）")
             
-            print(f"正在运行VSOP程序，输出文件: {output_filename}")
+            # 删除旧的同名输出文件，避免看门狗把上次的内容当作本次进度
+            output_path = os.path.join(workdir or os.getcwd(), output_filename)
+            for path in (output_path, output_path + '.gz'):
+                if os.path.lexists(path):
+                    os.remove(path)
+            stream = self.open_output_stream(output_path)
             
-            # 运行程序
-            process = subprocess.Popen(
-                [self.program_path],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=os.getcwd()
-            )
+            # 启用自动调节时，进程运行期间独占一个核
+            with self.tuner.slot() if self.tuner else nullcontext([]) as cores:
+                # 运行程序
+                process = subprocess.Popen(
+                    self.solver_command(program, workdir),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    cwd=workdir or os.getcwd()
+                )
+                if self.tuner:
+                    self.tuner.apply(process.pid, cores)
+                with self._progress_lock:
+                    self._processes[run_key] = process
+                
+                # 发送输入后由看门狗监视运行进度
+                process.stdin.write(input_sequence)
+                process.stdin.close()
+                watchdog = SolverWatchdog(
+                    process, output_path,
+                    stall_window=self.stall_window,
+                    on_progress=lambda progress: self.report_solver_progress(run_key, progress),
+                    stream=stream,
+                    log_prefix=self.solver_log_prefix(value, process.pid),
+                    tail_limit=self.log_tail_chars
+                )
+                with self.profiler.phase(SOLVER_PHASE):
+                    outcome = watchdog.wait(timeout)
+            if usage is not None:
+                usage['stdout_log'] = watchdog.stdout_log.path
+                usage['stderr_log'] = watchdog.stderr_log.path
+            if stream is not None:
+                stream.finish()
+                stream = None
             
-            # 发送输入
-            stdout, stderr = process.communicate(input=input_sequence, timeout=600)  # 10分钟超时
+            if outcome == WAIT_TIMEOUT:
+                print(f"程序运行超时（{timeout:.0f}秒）")
+                return None, FAILURE_TIMEOUT, f"超过{timeout:.0f}秒未结束"
+            if outcome == WAIT_STALLED:
+                print(f"程序运行停滞（{self.stall_window:.0f}秒内无任何进展），已终止")
+                return None, FAILURE_STALLED, (f"{self.stall_window:.0f}秒内输出文件、CPU时间均无变化，"
+                                               f"停在第{watchdog.progress.steps}个燃耗步")
             
+            stderr = watchdog.stderr_text
+            if usage is not None:
+                usage['cpu_time'] = watchdog.cpu_time
+                usage['peak_memory'] = watchdog.peak_memory
             if process.returncode == 0:
                 print(f"程序运行成功，输出文件: {output_filename}")
-                return output_filename
+                return output_filename, None, None
             else:
                 print(f"程序运行失败，返回码: {process.returncode}")
                 if stderr:
-                    print(f"错误信息: {stderr}")
-                return None
+                    log = watchdog.stderr_log.path
+                    print(f"错误信息{f'（最后部分，完整内容见 {log}）' if log else ''}: {stderr}")
+                return None, FAILURE_CRASH, f"返回码 {process.returncode}: {stderr.strip()[-500:]}"
                 
-        except subprocess.TimeoutExpired:
-            print("程序运行超时（10分钟）")
-            process.kill()
-            return None
         except Exception as e:
             print(f"运行程序时发生错误: {e}")
+            if process is not None and process.poll() is None:
+                process.kill()
+            return None, FAILURE_CRASH, str(e)
+        finally:
+            if stream is not None:
+                stream.finish()
+            with self._progress_lock:
+                self.live_progress.pop(run_key, None)
+                self._processes.pop(run_key, None)
+    
+    def solver_log_prefix(self, value, pid):
+        """一次运行的stdout/stderr日志路径前缀：<logs_dir>/<参数值>_<时间>_<进程号>，未启用日志时为None"""
+        if not self.solver_logs:
             return None
+        return os.path.join(self.logs_dir, f"{value:.6E}_{time.strftime('%Y%m%d_%H%M%S')}_{pid}")
     
-    def extract_keff_value(self, output_file):
-        """从输出文件中提取keff值"""
+    def open_output_stream(self, output_path):
+        """启用流式输出时在输出文件路径上创建命名管道，未启用或不支持（如Windows）时返回None"""
+        if not self.stream_output:
+            return None
+        if not OutputFifo.supported():
+            print("当前系统不支持命名管道，输出文件按普通文件写入")
+            self.stream_output = False
+            return None
         try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # 搜索标题行
-            target_header = "TIME (D)   K-EFF    POW-DENS   POW/BALL   FUEL TEMP    DISCH.-BU   POWER    TEMP.   TEMP."
-            header_line_index = -1
-            
-            for i, line in enumerate(lines):
-                if target_header in line:
-                    header_line_index = i
-                    print(f"找到标题行于第{i+1}行")
-                    break
-            
-            if header_line_index == -1:
-                print(f"错误：未找到标题行 '{target_header}'")
+            return OutputFifo(output_path, archive=self.stream_archive)
+        except OSError as e:
+            print(f"无法创建命名管道（{e}），输出文件按普通文件写入")
+            return None
+    
+    def report_solver_progress(self, run_key, progress):
+        """看门狗回调：记录正在运行的点当前输出到第几个燃耗步
+        
+        run_key为 (参数值, 标签)；在工作线程中调用时只记录，由主线程定时刷新显示
+        """
+        with self._progress_lock:
+            self.live_progress[run_key] = (progress.steps, progress.last_time, progress.last_keff)
+        print(f"  {self.describe_run(run_key)}: 燃耗步 {progress.steps}，时间 {progress.last_time:.1f} 天，keff = {progress.last_keff:.5f}")
+        if threading.current_thread() is threading.main_thread():
+            self.show_live_progress()
+    
+    @staticmethod
+    def describe_run(run_key, digits=6):
+        """显示用的运行名称：参数值，带标签时附上标签"""
+        value, tag = run_key
+        return f"{value:.{digits}E}" + (f" [{tag}]" if tag else "")
+    
+    def show_live_progress(self):
+        """在进度条标题中显示正在运行的点及其当前燃耗步"""
+        with self._progress_lock:
+            running = sorted(self.live_progress.items())
+        completed, total = self._progress_counts
+        if running:
+            status_text = ", ".join(f"{self.describe_run(key, 2)} step {steps}" for key, (steps, _, _) in running[:4])
+            if len(running) > 4:
+                status_text += f" (+{len(running) - 4})"
+        else:
+            status_text = f"已完成{completed}个参数值"
+        self.update_progress_bar(completed, total, status_text)
+    
+    @profiled()
+    def solve_point(self, value, workdir=None, fidelity=FIDELITY_HIGH, backend=None, labels=None, failures=None,
+                    tag=None):
+        """运行一个计算点并提取keff，带失败分类、自适应超时和自动重试
+        
+        输入文件需事先生成。瞬时失败按退避时间重试，
+        确定性失败或重试用尽的点记入结果存储并隔离
+        
+        Args:
+            backend: solver_backends中的求解程序名称，默认使用program_path
+            labels: 附加到每条记录的字段（如灵敏度筛选的input_hash），带附加字段的运行不用于调整超时
+            failures: 可选列表，追加各次失败尝试的失败类型，供调用方决定以后是否再次计算该点
+            tag: 同一参数点同时进行多次运行时区分各次运行（见run_solver）
+        
+        Returns:
+            {'output_file', 'keff', 'state', 'solver_time', 'cpu_time', 'peak_memory'}，失败时返回None；
+            state为keff所在行的运行状态（功率密度、燃料温度、卸料燃耗等）
+        """
+        run = self.new_point_run(value, workdir, fidelity, backend, labels, tag)
+        outcome = None
+        while self.begin_attempt(run):
+            self.run_attempt(run)
+            outcome = self.finish_attempt(run)
+            if outcome is not None or run['retry_delay'] is None:
+                break
+            print(f"{run['retry_delay']:.0f}秒后重试...")
+            time.sleep(run['retry_delay'])
+        if failures is not None:
+            failures.extend(run['failures'])
+        return outcome
+    
+    def new_point_run(self, value, workdir=None, fidelity=FIDELITY_HIGH, backend=None, labels=None, tag=None):
+        """一个计算点各次尝试的状态，供solve_point和流水线的求解、提取环节共用（参数同solve_point）"""
+        extra = dict(labels or {})
+        if backend:
+            extra['backend'] = backend  # A/B对比的记录带有求解程序名称
+        return {
+            'value': value,
+            'workdir': workdir or os.getcwd(),
+            'tag': tag,
+            'fidelity': fidelity,
+            'program': self.solver_backends[backend] if backend else None,
+            'extra': extra,
+            'deck': os.path.basename(self.original_file),
+            'attempt': 0,
+            'failure': None,
+            'timeout': None,
+            'failures': [],
+            'retry_delay': None,
+        }
+    
+    def begin_attempt(self, run):
+        """开始下一次尝试：确定超时时间并记录running；该点已取消（如在重试等待期间）时记录后返回False"""
+        run['attempt'] += 1
+        value = run['value']
+        record = {'deck': run['deck'], 'point': point_key(value), 'parameter_value_1': value,
+                  'attempt': run['attempt'], 'fidelity': run['fidelity'], **run['extra']}
+        if point_key(value) in self._cancelled:
+            self.store.append(dict(record, status=STATUS_CANCELLED))
+            return False
+        run['timeout'] = self.timeouts.for_attempt(run['failure'], run['timeout'])
+        self.store.append(dict(record, status=STATUS_RUNNING))
+        return True
+    
+    def run_attempt(self, run):
+        """运行一次求解程序，不读取输出文件"""
+        usage = {}
+        solver_start = time.time()
+        run['output_file'], run['failure'], run['message'] = self.run_solver(
+            run['value'], run['workdir'], run['timeout'], run['program'], usage, run['tag'])
+        run['solver_time'] = time.time() - solver_start
+        run['usage'] = usage
+    
+    def finish_attempt(self, run):
+        """提取keff并记录一次尝试的结果
+        
+        Returns:
+            成功时为结果字典（同solve_point）；失败时返回None，run['retry_delay']为重试前应等待的秒数，
+            不再重试（已隔离或已取消）时为None
+        """
+        value = run['value']
+        workdir = run['workdir']
+        output_file = run['output_file']
+        failure, message = run['failure'], run['message']
+        usage = run['usage']
+        extra = run['extra']
+        keff_value = None
+        state = {}
+        if failure is None:
+            with self.profiler.phase('extract_keff'):
+                keff_value, state, failure, message = classify_output_state(os.path.join(workdir, output_file))
+        run['failure'] = failure
+        run['retry_delay'] = None
+        
+        record = {
+            'deck': run['deck'],
+            'point': point_key(value),
+            'parameter_value_1': value,
+            'attempt': run['attempt'],
+            'wall_time': round(run['solver_time'], 3),
+            'timeout': round(run['timeout'], 1),
+            'fidelity': run['fidelity'],
+            **extra,
+        }
+        for name in ('stdout_log', 'stderr_log'):
+            if usage.get(name):
+                record[name] = usage[name]
+        
+        if failure is None:
+            print(f"提取到keff值: {keff_value}")
+            if run['fidelity'] == FIDELITY_HIGH and not extra:
+                self.timeouts.observe(run['solver_time'])
+            if self.tuner:
+                self.tuner.observe(usage.get('peak_memory'),
+                                   os.path.getsize(os.path.join(workdir, output_file)), run['solver_time'])
+            self.store.append(dict(record, status=STATUS_OK, keff=keff_value, output_file=output_file, state=state,
+                                   cpu_time=usage.get('cpu_time'), peak_memory=usage.get('peak_memory')))
+            return {'output_file': output_file, 'keff': keff_value, 'state': state, 'solver_time': run['solver_time'],
+                    'cpu_time': usage.get('cpu_time'), 'peak_memory': usage.get('peak_memory')}
+        
+        if point_key(value) in self._cancelled:
+            print(f"参数点 {value:.6E} 已取消")
+            self.store.append(dict(record, status=STATUS_CANCELLED))
+            return None
+        print(f"第{run['attempt']}次尝试失败：{FAILURE_NAMES[failure]}（{message}）")
+        run['failures'].append(failure)
+        with self._failure_lock:
+            self.failure_counts[failure] = self.failure_counts.get(failure, 0) + 1
+        self.store.append(dict(record, status=STATUS_FAILED, failure=failure, message=message))
+        
+        if self.retry_policy.should_retry(failure, run['attempt']):
+            run['retry_delay'] = self.retry_policy.backoff(run['attempt'])
+            return None
+        
+        # 确定性失败，或所有尝试都以同一种方式失败：隔离该点
+        if failure not in TRANSIENT_FAILURES or len(set(run['failures'])) == 1:
+            self.store.append({
+                'deck': run['deck'],
+                'point': point_key(value),
+                'parameter_value_1': value,
+                'status': STATUS_QUARANTINED,
+                'failure': failure,
+                'attempts': len(run['failures']),
+                'fidelity': run['fidelity'],
+                **extra,
+            })
+            print(f"参数点 {value:.6E} 已隔离（{FAILURE_NAMES[failure]}），后续研究将跳过该点")
+        return None
+    
+    @profiled()
+    def prepare_run_directory(self, value, tag=None):
+        """为并行模式准备一个计算点的独立工作目录
+        
+        库文件等支持文件优先使用硬链接（目录逐文件链接），失败时复制；
+        同一参数点可能同时运行多次时（如A/B对比）用tag区分目录。
+        启用内存盘时工作目录优先建在内存盘上，支持文件用符号链接指向原文件，不占用内存
+        """
+        name = f"{value:.6E}" if tag is None else f"{value:.6E}-{tag}"
+        workdir = self.scratch.allocate(os.path.join(self.runs_dir, name)) if self.scratch else None
+        on_scratch = workdir is not None
+        if not on_scratch:
+            workdir = os.path.join(self.runs_dir, name)
+            if os.path.exists(workdir):
+                shutil.rmtree(workdir, ignore_errors=True)
+            os.makedirs(workdir)
+        
+        for name in self.support_files:
+            if not os.path.exists(name):
+                continue
+            target = os.path.join(workdir, os.path.basename(name))
+            if on_scratch:
+                try:
+                    os.symlink(os.path.abspath(name), target, target_is_directory=os.path.isdir(name))
+                    continue
+                except OSError:
+                    pass
+            if os.path.isdir(name):
+                shutil.copytree(name, target, copy_function=_link_or_copy)
+            else:
+                _link_or_copy(name, target)
+        return workdir
+    
+    def release_run_directory(self, workdir):
+        """删除计算点的工作目录（需要保留的文件应已用harvest_output移出）"""
+        if self.scratch and self.scratch.owns(workdir):
+            self.scratch.release(workdir)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    def harvest_output(self, workdir, output_name, target):
+        """把输出文件（及keep_files中的文件）从工作目录移到持久目录，其余临时文件随工作目录删除"""
+        move_with_index(os.path.join(workdir, output_name), target)
+        if os.path.isfile(os.path.join(workdir, output_name) + '.gz'):
+            shutil.move(os.path.join(workdir, output_name) + '.gz', target + '.gz')
+        for name in self.keep_files:
+            source = os.path.join(workdir, name)
+            if os.path.isfile(source):
+                shutil.move(source, f"{target}.{name}")
+    
+    def enable_scratch(self, root=None, limit_mb=2048, min_free_memory_mb=1024):
+        """在内存盘（默认/dev/shm）上运行各计算点，没有可用内存盘时返回None
+        
+        内存盘上的工作目录总大小不超过limit_mb；预留空间不足或系统可用内存低于min_free_memory_mb时，
+        新的计算点退回磁盘上的runs_dir运行。结束后只有输出文件（及keep_files）移到持久目录
+        """
+        try:
+            self.scratch = ScratchSpace(root, limit_mb * 2 ** 20, min_free_memory_mb * 2 ** 20)
+        except OSError as e:
+            print(f"无法使用内存盘: {e}")
+            self.scratch = None
+        return self.scratch
+    
+    @profiled()
+    def run_point(self, value, fidelity=FIDELITY_HIGH, value_2=None, output_dir=None, backend=None, tag=None,
+                  output_name=None, labels=None):
+        """在独立工作目录中完成一个计算点：生成输入文件、运行程序、提取keff
+        
+        输出文件移回当前目录，与顺序模式的输出位置一致；
+        指定output_dir时放入该目录，低保真度的输出文件默认放入screening_dir；
+        backend为solver_backends中的求解程序名称，tag区分同一参数点的多次运行（工作目录和进程）；
+        output_name指定收回后的输出文件名，默认与求解程序的输出文件同名；labels同solve_point
+        
+        Returns:
+            结果字典（含solver_time），失败时返回None
+        """
+        if value_2 is None:
+            value_2 = value / self.ratio
+        if output_dir is None and fidelity == FIDELITY_LOW:
+            output_dir = self.screening_dir
+        workdir = self.prepare_run_directory(value, tag)
+        try:
+            deck_path = os.path.join(workdir, os.path.basename(self.original_file))
+            if not self.modify_input_file(value, target_file=deck_path, fidelity=fidelity, new_value_2=value_2):
                 return None
             
-            # 获取标题行下方第3行
-            target_line_index = header_line_index + 3
-            if target_line_index >= len(lines):
-                print(f"错误：标题行下方第3行超出文件范围")
+            outcome = self.solve_point(value, workdir, fidelity, backend, labels=labels, tag=tag)
+            if outcome is None:
                 return None
             
-            target_line = lines[target_line_index]
-            print(f"数据行（第{target_line_index+1}行）: {target_line.strip()}")
-            
-            parts = target_line.split()
-            if len(parts) >= 3:
-                try:
-                    keff_value = float(parts[2])  # 第三个值
-                    print(f"提取到keff值: {keff_value}")
-                    return keff_value
-                except ValueError:
-                    print(f"错误：无法解析keff值 '{parts[2]}'")
-                    return None
+            output_file = output_name or outcome['output_file']
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                output_file = os.path.join(output_dir, output_file)
+            self.harvest_output(workdir, outcome['output_file'], output_file)
+            return {
+                'parameter_value_1': value,
+                'parameter_value_2': value_2,
+                'keff': outcome['keff'],
+                'state': outcome['state'],
+                'output_file': output_file,
+                'solver_time': outcome['solver_time'],
+                'cpu_time': outcome['cpu_time'],
+                'peak_memory': outcome['peak_memory'],
+                'fidelity': fidelity
+            }
+        finally:
+            self.release_run_directory(workdir)
+    
+    @profiled()
+    def preflight(self, parameter_values, fidelity=FIDELITY_HIGH):
+        """启动计算前预检：完整检查原始输入文件，再批量检查设计中每个参数点生成的输入
+        
+        Returns:
+            通过检查的参数值列表，原始输入文件有错误时返回空列表
+        """
+        start = time.time()
+        validator = DeckValidator.from_file(self.original_file)
+        for name in self.support_files:
+            if not os.path.exists(name):
+                print(f"警告：找不到支持文件 {name}")
+        if validator.issues:
+            print(f"输入文件 {self.original_file} 预检发现{len(validator.issues)}个问题:")
+            print(format_issues(validator.issues))
+        if validator.errors:
+            print("输入文件预检未通过，请修复后重试")
+            return []
+        
+        invalid = {}
+        variants = []
+        for value in parameter_values:
+            lines = self.render_input_lines(value, fidelity, base_lines=validator.base_lines, verbose=False)
+            if lines is None:
+                if not invalid:
+                    # 重新生成第一个失败的点并打印原因
+                    self.render_input_lines(value, fidelity, base_lines=validator.base_lines)
+                invalid[value] = [('error', 0, "无法生成输入文件")]
             else:
-                print(f"错误：数据行格式不正确，仅有{len(parts)}个字段")
-                return None
-                
-        except Exception as e:
-            print(f"提取keff值时发生错误: {e}")
+                variants.append((value, lines))
+        invalid.update(validator.validate_design(variants))
+        
+        for value, issues in sorted(invalid.items()):
+            print(f"参数点 {value:.6E} 的输入文件未通过预检，已跳过:")
+            print(format_issues(issues, limit=5))
+        elapsed = (time.time() - start) * 1000
+        print(f"输入文件预检: {len(parameter_values) - len(invalid)}/{len(parameter_values)}个参数点通过，用时{elapsed:.0f}毫秒")
+        return [value for value in parameter_values if value not in invalid]
+    
+    def enable_auto_tuning(self, max_workers=None, **kwargs):
+        """按实测资源自动调节并行度（见keff_resources.py）
+        
+        max_workers为并行进程数上限，默认为可用核数；实际同时运行的进程数在每次运行结束后
+        按可用内存、单进程峰值内存和磁盘吞吐量重新评估，每个进程绑定到独占的核
+        """
+        self.tuner = ConcurrencyTuner(max_workers, **kwargs)
+        self.max_workers = self.tuner.max_workers
+        return self.tuner
+    
+    def concurrency_limit(self):
+        """传给LPTScheduler.run的并行度函数，未启用自动调节和控制通道时为None
+        
+        启用控制通道时线程池按本机核数创建，实际并行数取当前的max_workers（可由控制命令调整）
+        """
+        if self.tuner is None and not self.control_file:
             return None
+        
+        def limit():
+            return min(self.max_workers, self.tuner.limit()) if self.tuner else self.max_workers
+        return limit
+    
+    def cancel_point(self, value):
+        """取消参数点：之后不再重试；正在运行时终止其全部VSOP进程（包括同一参数点的各个变体）"""
+        self._cancelled.add(point_key(value))
+        with self._progress_lock:
+            processes = [process for (run_value, _), process in self._processes.items() if run_value == value]
+        killed = False
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+                killed = True
+        return killed
+    
+    def apply_control(self, channel, scheduler, known, eta):
+        """执行控制文件中的新命令
+        
+        Args:
+            channel: ControlChannel
+            scheduler: PriorityScheduler
+            known: point_key -> 参数值，本次研究中出现过的全部参数点（加点时更新）
+            eta: EtaTracker
+        
+        Returns:
+            待算点数的变化：加入的点数减去取消的排队中的点数
+        """
+        deck = os.path.basename(self.original_file)
+        added = 0
+        for command in channel.poll():
+            cmd = command['cmd']
+            if cmd == CMD_ADD:
+                priority = float(command.get('priority', 0))
+                for text in command['values']:
+                    value = known.setdefault(point_key(float(text)), float(text))
+                    self._cancelled.discard(point_key(value))
+                    if not scheduler.add(value, priority):
+                        print(f"控制命令: {value:.6E} 已在队列中或正在计算，未重复加入")
+                        continue
+                    eta.add(value)
+                    added += 1
+                    print(f"控制命令: 加入参数点 {value:.6E}（优先级 {priority:g}）")
+            elif cmd == CMD_PRIORITY:
+                value = known.get(point_key(float(command['value'])))
+                if value is not None and scheduler.set_priority(value, float(command['priority'])):
+                    print(f"控制命令: {value:.6E} 的优先级调整为 {float(command['priority']):g}")
+                else:
+                    print(f"控制命令: {float(command['value']):.6E} 不在队列中，无法调整优先级")
+            elif cmd == CMD_CANCEL:
+                for text in command['values']:
+                    value = known.get(point_key(float(text)))
+                    state = None if value is None else scheduler.cancel(value)
+                    if state == 'queued':
+                        self._cancelled.add(point_key(value))
+                        self.store.append({'deck': deck, 'point': point_key(value), 'parameter_value_1': value,
+                                           'status': STATUS_CANCELLED, 'attempt': 0})
+                        eta.complete(value, None)
+                        added -= 1
+                        print(f"控制命令: 已取消排队中的参数点 {value:.6E}")
+                    elif state == 'running':
+                        self.cancel_point(value)
+                        print(f"控制命令: 已终止正在计算的参数点 {value:.6E}")
+                    else:
+                        print(f"控制命令: {float(text):.6E} 不在队列中也未在计算")
+            elif cmd == CMD_WORKERS:
+                count = min(int(command['count']), scheduler.workers)
+                if count < int(command['count']):
+                    print(f"控制命令: 进程数不能超过线程池大小{scheduler.workers}")
+                self.max_workers = count
+                print(f"控制命令: 并行进程数调整为{count}（正在运行的计算不受影响）")
+        return added
+    
+    def prepare_study(self, parameter_values, mode='sweep', planned=None, announce=True):
+        """研究开始前的准备：输入文件预检，按运行时间模型设定初始超时，跳过已隔离的参数点
+        
+        准备完成后在结果存储中写入研究开始事件，供监控服务（keff_monitor.py）显示进度
+        
+        Args:
+            mode: 研究模式，只用于监控显示
+            planned: 计划完成的点数，默认为剩余参数点数
+            announce: 是否写入研究开始事件并开始性能剖析（多输入文件研究中由整个研究统一写入）
+        """
+        if announce:
+            self.profiler.start(mode)
+        parameter_values = self.preflight(parameter_values)
+        if not parameter_values:
+            return []
+        deck = os.path.basename(self.original_file)
+        self.failure_counts = {}
+        self.timeouts = AdaptiveTimeout.from_model(self.runtime_model, parameter_values, deck)
+        print(f"初始超时时间: {self.timeouts.current():.0f}秒（之后按实测运行时间P95自适应调整）")
+        if self.tuner:
+            print(f"并行度自动调节: {self.tuner.describe()}")
+        
+        quarantined = self.store.quarantined(deck)
+        remaining = []
+        for value in parameter_values:
+            record = quarantined.get(point_key(value))
+            if record is None:
+                remaining.append(value)
+            elif self.retry_quarantined:
+                self.store.release(deck, [point_key(value)])
+                remaining.append(value)
+            else:
+                print(f"跳过已隔离的参数点 {value:.6E}（{FAILURE_NAMES.get(record.get('failure'), '未知失败')}）")
+        
+        if remaining and announce:
+            self.store.append({
+                'event': EVENT_STUDY_START,
+                'deck': deck,
+                'mode': mode,
+                'planned': planned or len(remaining),
+                'workers': self.max_workers,
+                'started_at': time.time(),
+            })
+        return remaining
+    
+    def end_study(self):
+        """在结果存储中写入研究结束事件；启用性能剖析时停止cProfile和tracemalloc并写入剖析结果"""
+        self.store.append({
+            'event': EVENT_STUDY_END,
+            'deck': os.path.basename(self.original_file),
+            'results': len(self.results),
+            'finished_at': time.time(),
+        })
+        if self.scratch:
+            print(f"内存盘工作目录: {self.scratch.describe()}")
+            self.scratch.cleanup()
+        self.profiler.stop()
+        prefix = self.profiler.write()
+        if prefix:
+            print(f"性能剖析结果已保存到: {prefix}.folded（火焰图）和 {prefix}_summary.txt")
+    
+    def print_failure_summary(self):
+        """打印本次研究的失败分类统计"""
+        if not self.failure_counts:
+            return
+        print("\n=== 失败统计 ===")
+        for failure, count in sorted(self.failure_counts.items()):
+            print(f"{FAILURE_NAMES[failure]}: {count}次")
+        print(f"详细记录见: {self.store.path}")
+    
+    @profiled()
+    def record_result(self, result):
+        """记录一个计算结果，并增量更新统计信息"""
+        self.results.append(result)
+        self.stats.update_result(result)
     
-    def generate_parameter_values(self, start=1e-8, end=9e-7, num_points=9):
-        """生成参数值序列"""
+    def generate_parameter_values(self, start=1e-8, end=9e-7, num_points=9, order='ascending'):
+        """生成参数值序列
+        
+        Args:
+            order: 'ascending' 从小到大；'coarse_to_fine' 由粗到细（见coarse_to_fine_order），
+                   中途停止时已算的点均匀覆盖整个范围，点数按 2^k + 1 加密时原有的点全部复用
+        """
         # 对数均匀分布
         log_start = math.log10(start)
         log_end = math.log10(end)
-        step = (log_end - log_start) / (num_points - 1)
         
         values = []
         for i in range(num_points):
-            log_value = log_start + i * step
+            log_value = log_start + (log_end - log_start) * i / (num_points - 1)
             values.append(10 ** log_value)
         
+        if order == 'coarse_to_fine':
+            values = [values[i] for i in coarse_to_fine_order(num_points)]
         return values
     
-    def run_study(self, parameter_values=None):
-        """运行完整的研究"""
+    def reuse_completed_points(self, parameter_values):
+        """结果存储中已成功计算过的点直接计入结果，返回仍需计算的参数值（保持原顺序）"""
+        deck = os.path.basename(self.original_file)
+        completed = self.store.completed(deck)
+        remaining = []
+        for value in parameter_values:
+            record = completed.get(point_key(value))
+            if record is None:
+                remaining.append(value)
+                continue
+            self.record_result({
+                'parameter_value_1': value,
+                'parameter_value_2': value / self.ratio,
+                'keff': record['keff'],
+                'state': record.get('state', {}),
+                'output_file': record.get('output_file', f"{value:.6E}.out"),
+            })
+        if len(remaining) < len(parameter_values):
+            print(f"复用已有结果{len(parameter_values) - len(remaining)}个，还需计算{len(remaining)}个参数值")
+        return remaining
+    
+    def run_study(self, parameter_values=None, budget=None, ordered=False, reuse=False):
+        """运行完整的研究
+        
+        Args:
+            budget: 时间预算（秒），用完后不再开始新的计算，正在运行的计算照常完成
+            ordered: 按给定顺序计算（由粗到细排序的参数值），并行时不按预测运行时间重排
+            reuse: 结果存储中已成功计算过的点直接复用
+        """
         if parameter_values is None:
             parameter_values = self.generate_parameter_values()
         
+        deadline = time.time() + budget if budget else None
+        parameter_values = self.prepare_study(parameter_values)
+        if reuse:
+            parameter_values = self.reuse_completed_points(parameter_values)
+        if not parameter_values:
+            print("没有需要计算的参数点")
+            if self.results:
+                self.generate_final_plots()
+            self.end_study()
+            return
+        
+        if self.control_file:
+            # 控制通道需要可动态增删作业的调度器
+            self.run_study_parallel(parameter_values, deadline, ordered)
+            return
+        if self.pipelined:
+            self.run_study_pipeline(parameter_values, deadline, ordered)
+            return
+        if self.max_workers > 1 or self.scratch:
+            # 启用内存盘时即使只有一个进程也在独立工作目录中运行
+            self.run_study_parallel(parameter_values, deadline, ordered)
+            return
+        
         print(f"开始keff研究，共{len(parameter_values)}个参数值")
-        print(f"参数范围: {parameter_values[0]:.2E} 到 {parameter_values[-1]:.2E}")
+        print(f"参数范围: {min(parameter_values):.2E} 到 {max(parameter_values):.2E}")
         print(f"比例关系: 第87行:第92行 = 7.95:5")
         
         # 初始化可视化
@@ -570,34 +1337,42 @@ Parameter Range:
         self.backup_original_file()
         
         start_time = time.time()
+        deck = os.path.basename(self.original_file)
+        eta = EtaTracker(self.runtime_model, parameter_values, deck)
+        print(f"预计总运行时间: {format_duration(eta.remaining_seconds())}（{self.runtime_model.describe(deck)}）")
         
         for i, value in enumerate(parameter_values, 1):
+            if deadline is not None and time.time() >= deadline:
+                print(f"\n时间预算已用完，剩余{len(parameter_values) - i + 1}个参数值未计算")
+                break
             print(f"\n=== 运行 {i}/{len(parameter_values)}: 第87行参数值 = {value:.6E} ===")
             value_2 = value / self.ratio
             print(f"    对应第92行参数值 = {value_2:.6E}")
             iteration_start = time.time()
             
             # 更新进度条
+            self._progress_counts = (i-1, len(parameter_values))
             self.update_progress_bar(i-1, len(parameter_values), f"正在处理第{i}个参数值")
             self.print_progress_bar(i-1, len(parameter_values))
             
             # 修改输入文件
             if not self.modify_input_file(value):
+                eta.complete(value, None)
                 continue
             
-            # 运行程序
-            output_file = self.run_vsop_program(value)
-            if output_file is None:
-                continue
-            
-            # 提取keff值
-            keff_value = self.extract_keff_value(output_file)
-            if keff_value is not None:
-                self.results.append({
+            # 运行程序并提取keff值（失败时自动分类、重试或隔离）
+            outcome = self.solve_point(value)
+            if outcome is None:
+                eta.complete(value, None)
+            else:
+                self.runtime_model.record(value, value_2, outcome['solver_time'], deck)
+                eta.complete(value, outcome['solver_time'])
+                self.record_result({
                     'parameter_value_1': value,
                     'parameter_value_2': value_2,
-                    'keff': keff_value,
-                    'output_file': output_file
+                    'keff': outcome['keff'],
+                    'state': outcome['state'],
+                    'output_file': outcome['output_file']
                 })
                 
                 # 更新实时图表
@@ -606,7 +1381,7 @@ Parameter Range:
                 self.update_stats_display()
             
             iteration_time = time.time() - iteration_start
-            print(f"完成 {i}/{len(parameter_values)}, 用时: {iteration_time:.1f}秒")
+            print(f"完成 {i}/{len(parameter_values)}, 用时: {iteration_time:.1f}秒, 预计剩余: {format_duration(eta.remaining_seconds())}")
         
         # 最终更新进度条
         self.update_progress_bar(len(parameter_values), len(parameter_values), "计算完成")
@@ -617,157 +1392,1008 @@ Parameter Range:
         
         total_time = time.time() - start_time
         print(f"\n\n研究完成！共获得{len(self.results)}个有效结果，总用时: {total_time/60:.1f}分钟")
+        self.print_failure_summary()
         
         # 生成最终图表
         self.generate_final_plots()
+        self.end_study()
+        
+    def run_study_pipeline(self, parameter_values, deadline=None, ordered=False):
+        """按流水线运行研究（见keff_pipeline.py）
+        
+        环节: 设计生成 -> 输入文件生成 -> 求解（max_workers个进程）-> keff提取 -> 输出文件保存 -> 报告（主线程）。
+        第一个输入文件生成后即开始求解，其余按需生成；求解线程不等待提取、文件移动和图表刷新。
+        每个点在独立工作目录中运行，原始输入文件不被修改；ordered时按给定顺序计算，否则按预测运行时间从长到短；
+        deadline（time.time()时刻）之后不再开始新的计算，正在运行的计算和重试照常完成
+        """
+        total = len(parameter_values)
+        deck = os.path.basename(self.original_file)
+        print(f"开始keff研究（流水线模式，{self.max_workers}个进程），共{total}个参数值")
+        print(f"参数范围: {min(parameter_values):.2E} 到 {max(parameter_values):.2E}")
+        print(f"比例关系: 第87行:第92行 = 7.95:5")
+        
+        self.init_visualization(total)
+        
+        start_time = time.time()
+        eta = EtaTracker(self.runtime_model, parameter_values, deck)
+        print(f"预计总运行时间: {format_duration(eta.remaining_seconds(self.max_workers))}"
+              f"（{self.runtime_model.describe(deck)}）")
+        if ordered:
+            order = list(parameter_values)
+        else:
+            order = sorted(parameter_values, key=lambda v: self.runtime_model.predict(v, deck), reverse=True)
+        skipped = [0]
+        
+        def design():
+            # 设计生成：由下游的背压控制生成速度
+            for i, value in enumerate(order):
+                if deadline is not None and time.time() >= deadline:
+                    skipped[0] += total - i
+                    return
+                yield {'value': value, 'value_2': value / self.ratio, 'start': time.time()}
+        
+        def render(job):
+            job['workdir'] = self.prepare_run_directory(job['value'])
+            deck_path = os.path.join(job['workdir'], deck)
+            job['run'] = None
+            if self.modify_input_file(job['value'], target_file=deck_path, new_value_2=job['value_2']):
+                job['run'] = self.new_point_run(job['value'], job['workdir'])
+            return job
+        
+        def solve(job):
+            run = job['run']
+            if run is None:
+                return job
+            if run['attempt'] == 0 and deadline is not None and time.time() >= deadline:
+                skipped[0] += 1
+                job['run'] = None
+                job['skipped'] = True
+            elif self.begin_attempt(run):
+                self.run_attempt(run)
+            else:
+                job['run'] = None  # 已取消
+            return job
+        
+        def extract(job):
+            run = job['run']
+            job['outcome'] = None
+            if run is not None:
+                job['outcome'] = self.finish_attempt(run)
+                if job['outcome'] is None and run['retry_delay'] is not None:
+                    print(f"{job['value']:.6E}: {run['retry_delay']:.0f}秒后重试...")
+                    return Requeue('solve', job, run['retry_delay'])
+            return job
+        
+        def persist(job):
+            try:
+                if job['outcome'] is not None:
+                    output_file = job['outcome']['output_file']
+                    self.harvest_output(job['workdir'], output_file, output_file)
+            finally:
+                self.release_run_directory(job['workdir'])
+            return job
+        
+        def on_error(stage, job, error):
+            # 环节出错：记录失败并清理工作目录，该点仍交给报告环节计入进度
+            value = job['value']
+            run = job.get('run')
+            with self._failure_lock:
+                self.failure_counts[FAILURE_INTERNAL] = self.failure_counts.get(FAILURE_INTERNAL, 0) + 1
+            self.store.append({'deck': deck, 'point': point_key(value), 'parameter_value_1': value,
+                               'attempt': run['attempt'] if run else 0, 'fidelity': FIDELITY_HIGH,
+                               'status': STATUS_FAILED, 'failure': FAILURE_INTERNAL,
+                               'message': f"{stage}环节出错: {error}"})
+            if job.get('workdir'):
+                self.release_run_directory(job['workdir'])
+            job['outcome'] = None
+            return job
+        
+        completed = [0]
+        
+        def on_output(job):
+            # 报告环节：在主线程中依次更新统计和图表
+            value = job['value']
+            outcome = job['outcome']
+            if job.get('skipped'):
+                eta.complete(value, None)
+                return
+            completed[0] += 1
+            if outcome is not None:
+                self.runtime_model.record(value, job['value_2'], outcome['solver_time'], deck)
+                eta.complete(value, outcome['solver_time'])
+                self.record_result({
+                    'parameter_value_1': value,
+                    'parameter_value_2': job['value_2'],
+                    'keff': outcome['keff'],
+                    'state': outcome['state'],
+                    'output_file': outcome['output_file'],
+                    'cpu_time': outcome['cpu_time'],
+                    'peak_memory': outcome['peak_memory'],
+                    'fidelity': FIDELITY_HIGH
+                })
+                self.update_keff_plot()
+                self.update_params_plot()
+                self.update_stats_display()
+            else:
+                eta.complete(value, None)
+            print(f"完成 {completed[0]}/{total}（{value:.6E}）, 用时: {time.time() - job['start']:.1f}秒, "
+                  f"预计剩余: {format_duration(eta.remaining_seconds(self.max_workers))}")
+            self._progress_counts = (completed[0], total)
+            self.update_progress_bar(completed[0], total, f"已完成{completed[0]}个参数值")
+            self.print_progress_bar(completed[0], total)
+        
+        workers = self.max_workers
+        pipeline = Pipeline(design(), [
+            Stage('render', render, workers=1, capacity=1),
+            # 每个求解线程都有一个已生成的输入文件等待，空出的进程立即开始下一个计算
+            Stage('solve', solve, workers=workers, capacity=workers, concurrency=self.concurrency_limit()),
+            Stage('extract', extract, workers=1, capacity=workers),
+            Stage('persist', persist, workers=1, capacity=workers),
+        ], on_error=on_error)
+        self._progress_counts = (0, total)
+        report = pipeline.run(on_output, on_tick=self.show_live_progress)
+        self.last_pipeline_report = report
+        try:
+            os.rmdir(self.runs_dir)  # 只在工作目录已全部清理时删除
+        except OSError:
+            pass
+        
+        self.update_progress_bar(total, total, "计算完成")
+        
+        total_time = time.time() - start_time
+        if skipped[0]:
+            print(f"\n时间预算已用完，剩余{skipped[0]}个参数值未计算")
+        print(f"\n\n研究完成！共获得{len(self.results)}个有效结果，总用时: {total_time/60:.1f}分钟")
+        print_pipeline_report(report)
+        self.print_failure_summary()
+        
+        self.generate_final_plots()
+        self.end_study()
+    
+    def run_study_parallel(self, parameter_values, deadline=None, ordered=False):
+        """并行运行研究：按预测运行时间做LPT调度，多个VSOP进程同时计算
+        
+        每个点在独立工作目录中运行，原始输入文件不被修改；
+        ordered时按给定顺序分发，deadline（time.time()时刻）之后不再开始新的计算。
+        设置了control_file时按给定顺序分发，并在等待结果时执行控制命令（加点、优先级、取消、进程数）
+        """
+        total = len(parameter_values)
+        deck = os.path.basename(self.original_file)
+        print(f"开始keff研究（并行模式，{self.max_workers}个进程），共{total}个参数值")
+        print(f"参数范围: {min(parameter_values):.2E} 到 {max(parameter_values):.2E}")
+        print(f"比例关系: 第87行:第92行 = 7.95:5")
+        
+        self.init_visualization(total)
+        
+        start_time = time.time()
+        eta = EtaTracker(self.runtime_model, parameter_values, deck)
+        print(f"预计总运行时间: {format_duration(eta.remaining_seconds(self.max_workers))}"
+              f"（{self.runtime_model.describe(deck)}）")
+        
+        channel = None
+        if self.control_file:
+            channel = ControlChannel(self.control_file)
+            known = {point_key(v): v for v in parameter_values}
+            self._cancelled = set()
+            scheduler = PriorityScheduler(parameter_values, lambda v: self.runtime_model.predict(v, deck),
+                                          max(self.max_workers, os.cpu_count() or 1))
+            print(f"控制通道: {os.path.abspath(self.control_file)}（python keff_control.py --help 查看命令）")
+        elif ordered:
+            scheduler = OrderedScheduler(parameter_values, lambda v: self.runtime_model.predict(v, deck),
+                                         self.max_workers)
+        else:
+            scheduler = LPTScheduler(parameter_values, lambda v: self.runtime_model.predict(v, deck),
+                                     self.max_workers)
+        completed = [0]
+        
+        def poll_control():
+            nonlocal total
+            if channel is not None:
+                total += self.apply_control(channel, scheduler, known, eta)
+        
+        def on_tick():
+            poll_control()
+            self.show_live_progress()
+        
+        def on_result(value, result, elapsed):
+            # 在主线程中依次处理结果，更新统计和图表
+            poll_control()
+            completed[0] += 1
+            if result is not None:
+                solver_time = result.pop('solver_time')
+                self.runtime_model.record(value, result['parameter_value_2'], solver_time, deck)
+                eta.complete(value, solver_time)
+                self.record_result(result)
+                self.update_keff_plot()
+                self.update_params_plot()
+                self.update_stats_display()
+            else:
+                eta.complete(value, None)
+            print(f"完成 {completed[0]}/{total}（{value:.6E}）, 用时: {elapsed:.1f}秒, "
+                  f"预计剩余: {format_duration(eta.remaining_seconds(self.max_workers))}")
+            self._progress_counts = (completed[0], total)
+            self.update_progress_bar(completed[0], total, f"已完成{completed[0]}个参数值")
+            self.print_progress_bar(completed[0], total)
+        
+        self._progress_counts = (0, total)
+        report = scheduler.run(self.run_point, on_result, on_tick=on_tick, tick_interval=1.0 if channel else 2.0,
+                               concurrency=self.concurrency_limit(), deadline=deadline)
+        self.last_schedule_report = report
+        try:
+            os.rmdir(self.runs_dir)  # 只在工作目录已全部清理时删除
+        except OSError:
+            pass
+        
+        self.update_progress_bar(total, total, "计算完成")
+        
+        total_time = time.time() - start_time
+        if report['unstarted']:
+            print(f"\n时间预算已用完，剩余{report['unstarted']}个参数值未计算")
+        print(f"\n\n研究完成！共获得{len(self.results)}个有效结果，总用时: {total_time/60:.1f}分钟")
+        print_schedule_report(report)
+        self.print_failure_summary()
+        
+        self.generate_final_plots()
+        self.end_study()
+        
+    def run_batch(self, values, fidelity=FIDELITY_HIGH, progress_total=None, label="计算"):
+        """在LPT线程池中计算一批点，供临界搜索和多保真度模式使用
+        
+        高保真度结果记入results并更新实时图表，低保真度结果记入screening_results
+        
+        Returns:
+            {参数值: 结果字典}，只包含成功的点
+        """
+        deck = os.path.basename(self.original_file)
+        model_deck = deck if fidelity == FIDELITY_HIGH else f"{deck}:{fidelity}"
+        done_before = self._progress_counts[0] if progress_total else 0
+        progress_total = progress_total or len(values)
+        completed = [done_before]
+        results = {}
+        
+        def on_result(value, result, elapsed):
+            completed[0] += 1
+            if result is not None:
+                solver_time = result.pop('solver_time')
+                self.runtime_model.record(value, result['parameter_value_2'], solver_time, model_deck)
+                results[value] = result
+                if fidelity == FIDELITY_HIGH:
+                    self.record_result(result)
+                    self.update_keff_plot()
+                    self.update_params_plot()
+                    self.update_stats_display()
+                else:
+                    self.screening_results.append(result)
+            self._progress_counts = (completed[0], progress_total)
+            self.update_progress_bar(completed[0], progress_total, f"{label} 已计算{completed[0]}个点")
+        
+        scheduler = LPTScheduler(values, lambda v: self.runtime_model.predict(v, model_deck),
+                                 min(self.max_workers, len(values)))
+        scheduler.run(lambda v: self.run_point(v, fidelity), on_result, on_tick=self.show_live_progress, concurrency=self.concurrency_limit())
+        try:
+            os.rmdir(self.runs_dir)
+        except OSError:
+            pass
+        return results
+    
+    def run_search(self, target=None, lower=1e-8, upper=9e-7, tolerance=1e-4, max_runs=12):
+        """临界搜索：求使keff达到目标值的第87行参数值
+        
+        先找到包围目标的区间，再用带保护的割线/逆二次插值收敛；
+        每轮并行计算max_workers个点，与目标之差小于tolerance时停止。
+        扩展区间和插值得到的每个新点都先经DeckValidator预检，未通过的点不计算，按失败的点处理
+        
+        Args:
+            target: 目标keff，默认为基准值
+        
+        Returns:
+            搜索结果字典（见 keff_search.CriticalitySearch.result）
+        """
+        target = self.baseline_keff if target is None else target
+        print(f"开始临界搜索：目标keff = {target:.5f}，容差 {tolerance:g}，"
+              f"初始范围 {lower:.2E} 到 {upper:.2E}，每轮{self.max_workers}个点")
+        
+        if not self.prepare_study([lower, upper], mode='search', planned=max_runs):
+            return None
+        validator = DeckValidator.from_file(self.original_file)
+        self.init_visualization(max_runs)
+        self._progress_counts = (0, max_runs)
+        start_time = time.time()
+        
+        def evaluate(values):
+            valid = []
+            for value in values:
+                lines = self.render_input_lines(value, base_lines=validator.base_lines, verbose=False)
+                issues = [('error', 0, "无法生成输入文件")] if lines is None else validator.validate_variant(lines)
+                if issues:
+                    print(f"参数点 {value:.6E} 的输入文件未通过预检，已跳过:")
+                    print(format_issues(issues, limit=5))
+                else:
+                    valid.append(value)
+            # 跳过的点同样计入搜索的计算次数
+            self._progress_counts = (self._progress_counts[0] + len(values) - len(valid), max_runs)
+            results = self.run_batch(valid, progress_total=max_runs, label="临界搜索") if valid else {}
+            for value, result in sorted(results.items()):
+                print(f"  {value:.6E}: keff = {result['keff']:.5f}（与目标相差 {result['keff'] - target:+.5f}）")
+            return {value: result['keff'] for value, result in results.items()}
+        
+        search = CriticalitySearch(evaluate, target, lower, upper, tolerance=tolerance,
+                                   points_per_round=self.max_workers, max_runs=max_runs)
+        result = search.run()
+        self.last_search = result
+        
+        print(f"\n\n临界搜索结束，总用时: {(time.time() - start_time)/60:.1f}分钟")
+        print_search_report(result, self.ratio)
+        self.print_failure_summary()
+        self.generate_final_plots()
+        self.end_study()
+        return result
+    
+    def run_multifidelity(self, parameter_values, target=None, band=0.005, anchors=3):
+        """多保真度研究：先用放宽的设置筛选全部点，再对有价值的区域做完整计算
+        
+        筛选结果按同一参数点的低/高保真度keff校准，未提升的点给出校准后的估计值
+        
+        Args:
+            target: 关注的keff值，默认为基准值
+            band: 校准后keff与目标相差不超过band的点提升为高保真度计算
+            anchors: 均匀分布的校准锚点数
+        
+        Returns:
+            FidelityCalibration
+        """
+        target = self.baseline_keff if target is None else target
+        deck = os.path.basename(self.original_file)
+        self.screening_results = []
+        parameter_values = self.preflight(parameter_values, FIDELITY_LOW)
+        parameter_values = self.prepare_study(parameter_values, mode='multifidelity') if parameter_values else []
+        if not parameter_values:
+            print("没有需要计算的参数点")
+            return None
+        
+        print(f"开始多保真度研究，共{len(parameter_values)}个参数值")
+        print(f"筛选设置: 收敛判据 {self.screening_convergence:g}"
+              + (f"，另覆盖{len(self.screening_overrides)}个字段" if self.screening_overrides else ""))
+        self.init_visualization(len(parameter_values))
+        self._progress_counts = (0, len(parameter_values))
+        start_time = time.time()
+        
+        # 第1阶段：低保真度筛选
+        screening = self.run_batch(parameter_values, FIDELITY_LOW, label="筛选")
+        screening_time = time.time() - start_time
+        if not screening:
+            print("筛选计算全部失败")
+            self.print_failure_summary()
+            self.end_study()
+            return None
+        
+        # 第2阶段：提升有价值的点。先算校准锚点，再按校准后的keff选择其余点
+        calibration = FidelityCalibration()
+        points = [(value, result['keff']) for value, result in screening.items()]
+        promoted = select_promotions(points, target, 0.0, anchors)
+        self._progress_counts = (0, len(parameter_values))
+        for value, result in self.run_batch(promoted, label="校准").items():
+            calibration.add(screening[value]['keff'], result['keff'])
+        print(f"校准: {calibration.describe()}")
+        
+        corrected = [(value, calibration.correct(keff)) for value, keff in points]
+        remaining = [v for v in select_promotions(corrected, target, band, 0) if v not in promoted]
+        if remaining:
+            for value, result in self.run_batch(remaining, progress_total=len(promoted) + len(remaining),
+                                                label="提升").items():
+                calibration.add(screening[value]['keff'], result['keff'])
+            print(f"校准（更新）: {calibration.describe()}")
+        self.last_calibration = calibration
+        
+        high_points = len(self.results)
+        full_cost = sum(self.runtime_model.predict(v, deck) for v in parameter_values)
+        total_time = time.time() - start_time
+        print(f"\n\n多保真度研究完成！筛选{len(screening)}个点（用时{screening_time/60:.1f}分钟），"
+              f"高保真度计算{high_points}个点，总用时: {total_time/60:.1f}分钟")
+        if full_cost > 0:
+            print(f"全部点高保真度计算预计需要{format_duration(full_cost / self.max_workers)}，"
+                  f"实际用时为其{total_time / (full_cost / self.max_workers):.0%}")
+        self.print_failure_summary()
+        self.save_multifidelity_csv(calibration)
+        self.generate_final_plots()
+        self.end_study()
+        return calibration
+    
+    def run_uncertainty(self, sampler, estimate, samples_file="keff_uncertainty_samples.csv",
+                        summary_file="keff_uncertainty_summary.txt"):
+        """蒙特卡罗不确定性传播：按相关分布抽样第87行和第92行参数，统计keff分布
+        
+        样本分批送入LPT线程池，每个结果只用于流式更新estimate并追加写入samples_file，
+        置信区间达到目标宽度（或达到最大样本数）时停止
+        
+        Args:
+            sampler: CorrelatedLognormalSampler
+            estimate: UncertaintyEstimate
+        
+        Returns:
+            estimate
+        """
+        deck = os.path.basename(self.original_file)
+        print(f"开始不确定性传播: {sampler.describe()}")
+        print(f"停止条件: 均值{estimate.confidence:.0%}置信区间全宽 ≤ {estimate.target_width:g}，"
+              f"标准差区间相对全宽 ≤ {estimate.std_precision:.0%}，样本数 {estimate.min_samples} - {estimate.max_samples}")
+        if not self.prepare_study([sampler.nominal_1], mode='uncertainty', planned=estimate.max_samples):
+            return estimate
+        self.init_visualization(estimate.max_samples)
+        start_time = time.time()
+        next_index = [0]
+        
+        with open(samples_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Sample', 'Line87_Parameter', 'Line92_Parameter', 'KEFF_Value', 'Running_Mean', 'Running_Std'])
+            
+            def on_result(job, result, elapsed):
+                index, value_1, value_2 = job
+                if result is None:
+                    estimate.failures += 1
+                else:
+                    self.runtime_model.record(value_1, value_2, result['solver_time'], deck)
+                    estimate.update(value_1, value_2, result['keff'])
+                    writer.writerow([index, f"{value_1:.6E}", f"{value_2:.6E}", f"{result['keff']:.6f}",
+                                     f"{estimate.stats.mean:.6f}", f"{estimate.stats.std:.6f}"])
+                    f.flush()
+                done = estimate.count + estimate.failures
+                self._progress_counts = (done, estimate.max_samples)
+                self.update_progress_bar(done, estimate.max_samples,
+                                         f"Monte Carlo n={estimate.count} mean={estimate.stats.mean:.5f}")
+            
+            def run_sample(job):
+                # 样本记录带sample字段，不作为参数扫描的结果复用或隔离；输出文件按样本序号命名
+                index, value_1, value_2 = job
+                return self.run_point(value_1, value_2=value_2, output_dir=self.uncertainty_dir,
+                                      tag=f"sample-{index}", output_name=f"sample-{index:05d}.out",
+                                      labels={'sample': index, 'parameter_value_2': value_2})
+            
+            while True:
+                stop, reason = estimate.done()
+                if stop:
+                    break
+                jobs = []
+                for _ in range(estimate.batch_size(self.max_workers)):
+                    next_index[0] += 1
+                    jobs.append((next_index[0],) + sampler.sample())
+                scheduler = LPTScheduler(jobs, lambda job: self.runtime_model.predict(job[1], deck),
+                                         min(self.max_workers, len(jobs)))
+                scheduler.run(run_sample, on_result, on_tick=self.show_live_progress, concurrency=self.concurrency_limit())
+                interval = estimate.mean_interval()
+                if interval is not None:
+                    print(f"已完成{estimate.count}个样本: keff均值 {estimate.stats.mean:.6f}，"
+                          f"置信区间全宽 {interval[1] - interval[0]:.2e}，标准差 {estimate.stats.std:.6f}")
+                if estimate.count == 0 and estimate.failures >= estimate.min_samples:
+                    reason = "样本计算持续失败"
+                    break
+        try:
+            os.rmdir(self.runs_dir)
+        except OSError:
+            pass
+        
+        total_time = time.time() - start_time
+        lines = estimate.report_lines()
+        print(f"\n\n不确定性传播结束（{reason}），总用时: {total_time/60:.1f}分钟")
+        print("\n=== keff不确定性 ===")
+        for line in lines:
+            print(line)
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write("KEFF Uncertainty Propagation Summary\n")
+            f.write("=" * 40 + "\n\n")
+            f.write(f"输入分布: {sampler.describe()}\n")
+            f.write(f"停止原因: {reason}\n\n")
+            for line in lines:
+                f.write(line + "\n")
+        print(f"样本记录已保存到: {samples_file}，摘要已保存到: {summary_file}")
+        self.print_failure_summary()
+        self.end_study()
+        return estimate
+    
+    def run_sensitivity(self, fields, estimate, value=None, levels=4, seed=None,
+                        csv_file="keff_sensitivity.csv", summary_file="keff_sensitivity_summary.txt"):
+        """全局灵敏度筛选（Morris基本效应法）：在给定范围内改变选定的输入卡字段，按对keff的影响排序
+        
+        轨迹分批生成，每个输入变体先经DeckValidator预检，每批的计算去重后送入LPT线程池；相同输入内容
+        （含之前研究中）已成功计算过的直接复用结果存储中的keff，不再运行求解程序。计算失败的输入在后续
+        批次中再次出现时按重试策略决定是否重新计算。各字段μ*的置信区间达到目标精度时停止
+        
+        Args:
+            fields: DeckField列表
+            estimate: MorrisEstimate
+            value: 第87行参数值（第92行按比例），默认取原始输入文件中的值
+            levels: Morris网格水平数
+        
+        Returns:
+            estimate
+        """
+        deck = os.path.basename(self.original_file)
+        base = self.read_input_lines()
+        if value is None:
+            try:
+                value = float(base[self.target_line_1 - 1].split()[1])
+            except (IndexError, ValueError):
+                print(f"错误：无法读取第{self.target_line_1}行的参数值")
+                return estimate
+        nominal = self.render_input_lines(value, base_lines=base, verbose=False)
+        if nominal is None:
+            print("错误：无法生成输入文件")
+            return estimate
+        base_dir = os.path.dirname(os.path.abspath(self.original_file))
+        validator = DeckValidator(nominal, (os.path.join(base_dir, 'Libraries'), base_dir))
+        if validator.errors:
+            print(f"输入文件 {self.original_file} 预检未通过，请修复后重试:")
+            print(format_issues(validator.errors))
+            return estimate
+        originals = []
+        for field in fields:
+            try:
+                original = nominal[field.line - 1].split()[field.field]
+                for bound in (field.low, field.high):
+                    apply_overrides(nominal, [(field.line, field.field, field.format(bound, original)[0])])
+            except (IndexError, ValueError) as e:
+                print(f"错误：字段 {field.describe()} 无法修改: {e}")
+                return estimate
+            originals.append(original)
+        
+        print(f"开始灵敏度筛选（Morris，{levels}个水平），{len(fields)}个字段，每条轨迹{estimate.runs_per_trajectory}次计算:")
+        for field in fields:
+            print(f"  {field.describe()}")
+        print(f"停止条件: 各字段μ*的{estimate.confidence:.0%}置信区间半宽 ≤ max({estimate.rel_precision:.0%} × 最大μ*, "
+              f"{estimate.abs_precision:g})，轨迹数 {estimate.min_trajectories} - {estimate.max_trajectories}")
+        if not self.prepare_study([value], mode='sensitivity',
+                                  planned=estimate.max_trajectories * estimate.runs_per_trajectory):
+            return estimate
+        
+        design = MorrisDesign(fields, levels, seed)
+        cache = self.store.completed_inputs(deck)
+        reused = len(cache)
+        skipped = {}  # 未通过预检或不再重试的输入 {摘要: 原因}
+        failed = {}  # 本次研究中计算失败的输入 {摘要: 失败次数}
+        last_failure = {}  # {摘要: 最近一次计算最后一次尝试的失败类型}
+        solver_runs = [0]
+        cache_hits = [0]
+        start_time = time.time()
+        
+        def variant(point):
+            """单位坐标点 -> (输入内容摘要, 覆盖列表, 实际写入的字段值)"""
+            overrides = []
+            values = []
+            for field, original, u in zip(fields, originals, point):
+                text, actual = field.format(field.value(u), original)
+                overrides.append((field.line, field.field, text))
+                values.append(actual)
+            lines = apply_overrides(nominal, overrides)
+            digest = hashlib.sha1((os.path.basename(self.program_path) + "\n" + "".join(lines)).encode('utf-8'))
+            digest = digest.hexdigest()
+            if digest not in cache and digest not in skipped:
+                issues = validator.validate_variant(lines)
+                if issues:
+                    print(f"输入变体 {digest[:12]} 未通过预检，已跳过:")
+                    print(format_issues(issues, limit=5))
+                    skipped[digest] = "未通过预检"
+            return digest, tuple(overrides), tuple(values)
+        
+        def run_variant(job):
+            digest, overrides = job
+            failures = []
+            workdir = self.prepare_run_directory(value, tag=digest[:12])
+            try:
+                lines = apply_overrides(nominal, overrides)
+                with open(os.path.join(workdir, deck), 'w', encoding='utf-8') as f:
+                    f.writelines(lines)
+                outcome = self.solve_point(value, workdir, labels={'input_hash': digest}, failures=failures,
+                                           tag=digest[:12])
+                last_failure[digest] = failures[-1] if failures else None
+                if outcome is None:
+                    return None
+                os.makedirs(self.sensitivity_dir, exist_ok=True)
+                self.harvest_output(workdir, outcome['output_file'],
+                                    os.path.join(self.sensitivity_dir, f"{digest[:12]}.out"))
+                return outcome
+            finally:
+                self.release_run_directory(workdir)
+        
+        def on_result(job, outcome, elapsed):
+            digest = job[0]
+            solver_runs[0] += 1
+            if outcome is not None:
+                cache[digest] = outcome['keff']
+                # 变体修改了收敛判据等字段，运行时间单独记录，不影响原输入文件的运行时间模型
+                self.runtime_model.record(value, value / self.ratio, outcome['solver_time'], f"{deck}@sensitivity")
+                return
+            # 失败的输入不缓存，以后的轨迹再用到时重新计算；确定性失败、已取消或重试用尽的不再计算
+            failed[digest] = failed.get(digest, 0) + 1
+            failure = last_failure.get(digest)
+            if failure is None or not self.retry_policy.should_retry(failure, failed[digest]):
+                skipped[digest] = "计算失败"
+        
+        with open(csv_file.replace('.csv', '_runs.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Trajectory', 'Step', 'Changed_Field', 'Input_Hash', 'KEFF_Value']
+                            + [field.name for field in fields])
+            while True:
+                stop, reason = estimate.done()
+                if stop:
+                    break
+                trajectories = []
+                jobs = {}
+                for _ in range(estimate.batch_size(self.max_workers)):
+                    points, order = design.trajectory()
+                    variants = [variant(point) for point in points]
+                    trajectories.append((variants, order))
+                    for digest, overrides, _ in variants:
+                        if digest in skipped:
+                            continue
+                        if digest in cache or digest in jobs:
+                            cache_hits[0] += 1
+                        else:
+                            jobs[digest] = (digest, overrides)
+                if jobs:
+                    scheduler = LPTScheduler(list(jobs.values()), lambda job: self.runtime_model.predict(value, deck),
+                                             min(self.max_workers, len(jobs)))
+                    scheduler.run(run_variant, on_result, on_tick=self.show_live_progress,
+                                  concurrency=self.concurrency_limit())
+                for variants, order in trajectories:
+                    keffs = [cache.get(digest) for digest, _, _ in variants]
+                    estimate.add([values for _, _, values in variants], order, keffs)
+                    for step, ((digest, _, values), keff) in enumerate(zip(variants, keffs)):
+                        writer.writerow([estimate.trajectories, step, '' if step == 0 else fields[order[step - 1]].name,
+                                         digest[:12], '' if keff is None else f"{keff:.6f}"]
+                                        + [f"{v:g}" for v in values])
+                f.flush()
+                leader, summary = estimate.ranking()[0]
+                self._progress_counts = (estimate.trajectories, estimate.max_trajectories)
+                self.update_progress_bar(estimate.trajectories, estimate.max_trajectories,
+                                         f"Morris r={estimate.trajectories}")
+                print(f"已完成{estimate.trajectories}条轨迹（求解程序计算{solver_runs[0]}次，复用{cache_hits[0]}次），"
+                      f"影响最大: {leader.name}" + ("" if summary['mu_star'] is None else f" μ* = {summary['mu_star']:.2e}"))
+                if estimate.trajectories >= estimate.min_trajectories and not cache:
+                    reason = "计算持续失败"
+                    break
+        try:
+            os.rmdir(self.runs_dir)
+        except OSError:
+            pass
+        
+        total_time = time.time() - start_time
+        lines = estimate.report_lines()
+        lines.insert(1, f"求解程序计算 {solver_runs[0]} 次，复用已有结果 {cache_hits[0]} 次"
+                        f"（结果存储中原有{reused}个可复用输入），跳过输入 {len(skipped)} 个"
+                        f"（未通过预检{sum(1 for r in skipped.values() if r == '未通过预检')}个）")
+        print(f"\n\n灵敏度筛选结束（{reason}），总用时: {total_time/60:.1f}分钟")
+        print("\n=== 字段影响排序 ===")
+        for line in lines:
+            print(line)
+        estimate.save_csv(csv_file)
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write("KEFF Sensitivity Screening Summary (Morris)\n")
+            f.write("=" * 40 + "\n\n")
+            f.write(f"第{self.target_line_1}行参数: {value:.6E}，水平数: {levels}\n")
+            for field in fields:
+                f.write(f"{field.describe()}\n")
+            f.write(f"停止原因: {reason}\n\n")
+            for line in lines:
+                f.write(line + "\n")
+        print(f"字段排序已保存到: {csv_file}，逐点记录: {csv_file.replace('.csv', '_runs.csv')}，摘要: {summary_file}")
+        self.print_failure_summary()
+        self.end_study()
+        return estimate
+    
+    def run_abtest(self, parameter_values, backend_a="MS", backend_b="ZUT", repeats=1, keff_tolerance=5e-5,
+                   csv_file="keff_abtest.csv", summary_file="keff_abtest_summary.txt", seed=None):
+        """求解程序A/B对比：同一组参数点分别用两个求解程序计算，按点配对比较
+        
+        两个求解程序的作业在同一个LPT线程池中交错运行（每个点两者的先后顺序随机），
+        使两边受到相同的机器负载；结果只写入对比报告，不计入研究结果
+        
+        Args:
+            backend_a, backend_b: solver_backends中的求解程序名称
+            repeats: 每个点每个求解程序的重复次数
+            keff_tolerance: keff差值超过该值的点报告为不一致
+        
+        Returns:
+            PairedComparison
+        """
+        deck = os.path.basename(self.original_file)
+        for backend in (backend_a, backend_b):
+            command = self.solver_command(self.solver_backends[backend])
+            if not os.path.exists(command[0]) and shutil.which(command[0]) is None:
+                print(f"错误：找不到求解程序 {backend}: {command[0]}")
+                return None
+        
+        parameter_values = self.prepare_study(parameter_values, mode='abtest',
+                                              planned=2 * repeats * len(parameter_values))
+        if not parameter_values:
+            print("没有需要计算的参数点")
+            return None
         
-    def generate_final_plots(self):
-        """生成最终的分析图表"""
+        rng = random.Random(seed)
+        jobs = []
+        for value in parameter_values:
+            for repeat in range(1, repeats + 1):
+                pair = [backend_a, backend_b]
+                rng.shuffle(pair)
+                jobs.extend((value, backend, repeat) for backend in pair)
+        total = len(jobs)
+        print(f"开始求解程序A/B对比: {backend_a} vs {backend_b}，{len(parameter_values)}个参数点 × {repeats}次重复，"
+              f"共{total}次计算，{self.max_workers}个并行进程")
+        
+        self.init_visualization(total)
+        self._progress_counts = (0, total)
+        start_time = time.time()
+        outcomes = {}
+        
+        def run_job(job):
+            value, backend, repeat = job
+            # 同一点的各次重复分别保留输出文件
+            return self.run_point(value, backend=backend, tag=f"{backend}-{repeat}",
+                                  output_dir=os.path.join(self.abtest_dir, backend),
+                                  output_name=f"{value:.6E}-{repeat}.out")
+        
+        def on_result(job, result, elapsed):
+            value, backend, repeat = job
+            if result is not None:
+                result['wall_time'] = result.pop('solver_time')
+                self.runtime_model.record(value, result['parameter_value_2'], result['wall_time'], f"{deck}@{backend}")
+                print(f"  {backend} {value:.6E}: keff = {result['keff']:.5f}，用时 {result['wall_time']:.1f}秒")
+            outcomes[job] = result
+            self._progress_counts = (len(outcomes), total)
+            self.update_progress_bar(len(outcomes), total, f"A/B {len(outcomes)}/{total}")
+            self.print_progress_bar(len(outcomes), total)
+        
+        scheduler = LPTScheduler(jobs, lambda job: self.runtime_model.predict(job[0], deck), self.max_workers)
+        scheduler.run(run_job, on_result, on_tick=self.show_live_progress, concurrency=self.concurrency_limit())
+        try:
+            os.rmdir(self.runs_dir)
+        except OSError:
+            pass
+        
+        comparison = PairedComparison(backend_a, backend_b, keff_tolerance=keff_tolerance)
+        for value in parameter_values:
+            for repeat in range(1, repeats + 1):
+                comparison.add(value, repeat, outcomes.get((value, backend_a, repeat)),
+                               outcomes.get((value, backend_b, repeat)))
+        self.last_abtest = comparison
+        
+        total_time = time.time() - start_time
+        lines = comparison.report_lines()
+        print(f"\n\nA/B对比完成，总用时: {total_time/60:.1f}分钟")
+        print("\n=== 求解程序A/B对比 ===")
+        for line in lines:
+            print(line)
+        comparison.save_csv(csv_file)
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write("Solver A/B Comparison Summary\n")
+            f.write("=" * 40 + "\n\n")
+            for backend in (backend_a, backend_b):
+                f.write(f"{backend}: {' '.join(self.solver_command(self.solver_backends[backend]))}\n")
+            f.write(f"参数点: {len(parameter_values)}，重复: {repeats}，并行进程: {self.max_workers}\n\n")
+            for line in lines:
+                f.write(line + "\n")
+        print(f"逐点对比已保存到: {csv_file}，摘要已保存到: {summary_file}")
+        self.print_failure_summary()
+        self.end_study()
+        return comparison
+    
+    def deck_study(self, deck):
+        """为多输入文件研究创建一个输入文件的子研究
+        
+        复制当前的全部设置（求解程序、行号、重试策略等），共用结果存储、运行时间模型、
+        并行度调节器和运行进度显示；结果、统计、超时和失败统计各自独立，
+        输出文件和工作目录放在以输入文件命名的子目录中
+        """
+        name = os.path.splitext(os.path.basename(deck))[0]
+        study = copy.copy(self)
+        study.original_file = deck
+        study.results = []
+        study.stats = KeffStatistics(self.baseline_keff)
+        study.timeouts = AdaptiveTimeout()
+        study.failure_counts = {}
+        study.screening_results = []
+        study.runs_dir = os.path.join(self.runs_dir, name)
+        study.output_dir = os.path.join(self.campaign_dir, name)
+        study.logs_dir = os.path.join(study.output_dir, "logs")
+        study.profiler = PhaseProfiler()  # 剖析由整个研究统一记录
+        study.fig = None
+        study.ax_progress = study.ax_keff = study.ax_params = None
+        return study
+    
+    def run_campaign(self, decks):
+        """多输入文件研究：多个基础输入文件各自的参数设计共用一个工作线程池
+        
+        按公平份额调度（FairShareScheduler）：每次取作业时优先分给已分配工作量/权重最小的输入文件，
+        小研究不必排在大研究之后，任何输入文件还有作业时都不会有空闲进程
+        
+        Args:
+            decks: [{'deck': 输入文件路径, 'values': 参数值列表, 'weight': 权重（默认1）}, ...]
+        
+        Returns:
+            输入文件名称 -> 子研究（KeffStudySimple）
+        """
+        self.profiler.start('campaign')
+        studies = {}
+        weights = {}
+        jobs = []
+        for spec in decks:
+            study = self.deck_study(spec['deck'])
+            name = os.path.basename(study.output_dir)
+            if name in studies:
+                print(f"错误：输入文件名称重复: {name}")
+                return None
+            print(f"\n=== 输入文件 {spec['deck']} ===")
+            values = study.prepare_study(spec['values'], mode='campaign', announce=False)
+            studies[name] = study
+            weights[name] = float(spec.get('weight', 1.0))
+            jobs.extend((name, value) for value in values)
+        if not jobs:
+            print("没有需要计算的参数点")
+            return studies
+        
+        total = len(jobs)
+        counts = {name: sum(1 for job in jobs if job[0] == name) for name in studies}
+        print(f"\n开始多输入文件研究，共{len(studies)}个输入文件、{total}个参数点，{self.max_workers}个并行进程")
+        for name, study in studies.items():
+            predicted = sum(self.runtime_model.predict(value, os.path.basename(study.original_file))
+                            for group, value in jobs if group == name)
+            print(f"  {name}: {counts[name]}个点，权重 {weights[name]:g}，预计计算量 {format_duration(predicted)}")
+        self.store.append({
+            'event': EVENT_STUDY_START,
+            'deck': ", ".join(os.path.basename(study.original_file) for study in studies.values()),
+            'mode': 'campaign',
+            'planned': total,
+            'workers': self.max_workers,
+            'started_at': time.time(),
+        })
+        
+        start_time = time.time()
+        done = {name: 0 for name in studies}
+        finished_at = {}
+        
+        def predict(job):
+            return self.runtime_model.predict(job[1], os.path.basename(studies[job[0]].original_file))
+        
+        def run_job(job):
+            study = studies[job[0]]
+            return study.run_point(job[1], output_dir=study.output_dir)
+        
+        def on_result(job, result, elapsed):
+            name, value = job
+            study = studies[name]
+            done[name] += 1
+            if result is not None:
+                solver_time = result.pop('solver_time')
+                self.runtime_model.record(value, result['parameter_value_2'], solver_time,
+                                          os.path.basename(study.original_file))
+                study.record_result(result)
+            if done[name] == counts[name]:
+                finished_at[name] = time.time() - start_time
+                print(f"输入文件 {name} 已全部完成（{len(study.results)}/{counts[name]}个有效结果），"
+                      f"用时 {format_duration(finished_at[name])}")
+            completed = sum(done.values())
+            print(f"完成 {completed}/{total}（{name} {value:.6E}）, 用时: {elapsed:.1f}秒")
+            self.print_progress_bar(completed, total)
+        
+        scheduler = FairShareScheduler(jobs, predict, self.max_workers, weights)
+        report = scheduler.run(run_job, on_result, concurrency=self.concurrency_limit())
+        self.last_schedule_report = report
+        for path in [study.runs_dir for study in studies.values()] + [self.runs_dir]:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        
+        total_time = time.time() - start_time
+        print(f"\n\n多输入文件研究完成，总用时: {total_time/60:.1f}分钟")
+        for name, study in studies.items():
+            print(f"\n=== {name} ===")
+            if name in finished_at:
+                print(f"完成时间: {format_duration(finished_at[name])}")
+            if study.results:
+                study.save_results_csv(os.path.join(study.output_dir, "keff_study_results.csv"),
+                                       os.path.join(study.output_dir, "keff_study_summary.txt"))
+                study.generate_final_plots(os.path.join(study.output_dir, "keff_study_analysis.png"), show=False)
+            study.print_failure_summary()
+        print_schedule_report(report)
+        self.store.append({
+            'event': EVENT_STUDY_END,
+            'deck': ", ".join(os.path.basename(study.original_file) for study in studies.values()),
+            'results': sum(len(study.results) for study in studies.values()),
+            'finished_at': time.time(),
+        })
+        if self.scratch:
+            print(f"内存盘工作目录: {self.scratch.describe()}")
+            self.scratch.cleanup()
+        self.profiler.stop()
+        prefix = self.profiler.write()
+        if prefix:
+            print(f"性能剖析结果已保存到: {prefix}.folded（火焰图）和 {prefix}_summary.txt")
+        return studies
+    
+    @profiled()
+    def save_multifidelity_csv(self, calibration, filename="keff_multifidelity.csv"):
+        """保存多保真度结果：每个点的筛选keff、校准后的估计值和高保真度keff"""
+        high = {r['parameter_value_1']: r['keff'] for r in self.results}
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Line87_Parameter', 'Line92_Parameter', 'Low_Fidelity_KEFF',
+                             'Calibrated_KEFF', 'High_Fidelity_KEFF', 'Best_KEFF', 'Best_Fidelity'])
+            for result in sorted(self.screening_results, key=lambda r: r['parameter_value_1']):
+                value = result['parameter_value_1']
+                calibrated = calibration.correct(result['keff'])
+                high_keff = high.get(value)
+                writer.writerow([
+                    f"{value:.6E}", f"{result['parameter_value_2']:.6E}", f"{result['keff']:.6f}",
+                    f"{calibrated:.6f}", f"{high_keff:.6f}" if high_keff is not None else "",
+                    f"{high_keff if high_keff is not None else calibrated:.6f}",
+                    FIDELITY_HIGH if high_keff is not None else FIDELITY_LOW
+                ])
+        print(f"多保真度结果已保存到: {filename}")
+        
+    @profiled()
+    def generate_final_plots(self, filename='keff_study_analysis.png', show=True):
+        """生成最终的分析图表
+
+        Args:
+            filename: 图表保存路径
+            show: 是否显示图表窗口并等待用户关闭（离线分析时为False）
+        """
         if not self.enable_visualization or len(self.results) == 0:
             return
             
-        # 创建最终分析图表
-        fig_final = plt.figure(figsize=(16, 12))
         font_name = 'Times New Roman' if english_font == 'Times New Roman' else english_font
-        fig_final.suptitle('VSOP KEFF Study Results Analysis', fontsize=18, fontweight='bold', 
-                          fontname=font_name if font_name else 'DejaVu Sans')
         
-        # 准备数据
-        param1_values = [r['parameter_value_1'] for r in self.results]
-        param2_values = [r['parameter_value_2'] for r in self.results]
-        keff_values = [r['keff'] for r in self.results]
-        
-        # 按参数值排序
-        sorted_data = sorted(zip(param1_values, param2_values, keff_values))
-        param1_sorted, param2_sorted, keff_sorted = zip(*sorted_data)
-        
-        # 子图1: KEFF vs 第87行参数值
-        ax1 = fig_final.add_subplot(2, 3, 1)
-        ax1.plot(param1_sorted, keff_sorted, 'bo-', linewidth=2, markersize=8, label='KEFF Values')
-        ax1.axhline(y=self.baseline_keff, color='red', linestyle='--', linewidth=2, alpha=0.8, 
-                   label=f'Baseline: {self.baseline_keff:.5f}')
-        ax1.set_xlabel('Line 87 Parameter Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax1.set_ylabel('KEFF Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax1.set_title('KEFF vs Line 87 Parameter', fontname=font_name if font_name else 'DejaVu Sans')
-        ax1.set_xscale('log')
-        ax1.grid(True, alpha=0.3)
-        legend1 = ax1.legend(fontsize=9)
-        for text in legend1.get_texts():
-            text.set_fontname(font_name if font_name else 'DejaVu Sans')
-        
-        # 子图2: KEFF vs 第92行参数值
-        ax2 = fig_final.add_subplot(2, 3, 2)
-        ax2.plot(param2_sorted, keff_sorted, 'ro-', linewidth=2, markersize=8, label='KEFF Values')
-        ax2.axhline(y=self.baseline_keff, color='red', linestyle='--', linewidth=2, alpha=0.8, 
-                   label=f'Baseline: {self.baseline_keff:.5f}')
-        ax2.set_xlabel('Line 92 Parameter Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax2.set_ylabel('KEFF Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax2.set_title('KEFF vs Line 92 Parameter', fontname=font_name if font_name else 'DejaVu Sans')
-        ax2.set_xscale('log')
-        ax2.grid(True, alpha=0.3)
-        legend2 = ax2.legend(fontsize=9)
-        for text in legend2.get_texts():
-            text.set_fontname(font_name if font_name else 'DejaVu Sans')
-        
-        # 子图3: 参数关系验证
-        ax3 = fig_final.add_subplot(2, 3, 3)
-        ax3.plot(param1_sorted, param2_sorted, 'go-', linewidth=2, markersize=8, label='Actual Values')
-        # 理论直线
-        x_theory = np.array(param1_sorted)
-        y_theory = x_theory / self.ratio
-        ax3.plot(x_theory, y_theory, 'b--', linewidth=2, alpha=0.7, label='Theoretical Ratio Line')
-        ax3.set_xlabel('Line 87 Parameter Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax3.set_ylabel('Line 92 Parameter Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax3.set_title('Parameter Relationship (7.95:5)', fontname=font_name if font_name else 'DejaVu Sans')
-        ax3.set_xscale('log')
-        ax3.set_yscale('log')
-        legend = ax3.legend()
-        for text in legend.get_texts():
-            text.set_fontname(font_name if font_name else 'DejaVu Sans')
-        ax3.grid(True, alpha=0.3)
-        
-        # 子图4: 基准值偏差
-        ax4 = fig_final.add_subplot(2, 3, 4)
-        deviations = [k - self.baseline_keff for k in keff_sorted]
-        ax4.plot(param1_sorted, deviations, 'mo-', linewidth=2, markersize=8)
-        ax4.set_xlabel('Line 87 Parameter Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax4.set_ylabel('Deviation from Baseline', fontname=font_name if font_name else 'DejaVu Sans')
-        ax4.set_title('KEFF Deviation from Baseline', fontname=font_name if font_name else 'DejaVu Sans')
-        ax4.set_xscale('log')
-        ax4.grid(True, alpha=0.3)
-        ax4.axhline(y=0, color='red', linestyle='--', linewidth=2, alpha=0.8, 
-                   label=f'Baseline: {self.baseline_keff:.5f}')
-        legend4 = ax4.legend(fontsize=9)
-        for text in legend4.get_texts():
-            text.set_fontname(font_name if font_name else 'DejaVu Sans')
-        
-        # 子图5: KEFF值分布直方图
-        ax5 = fig_final.add_subplot(2, 3, 5)
-        ax5.hist(keff_values, bins=min(10, len(keff_values)), alpha=0.7, edgecolor='black')
-        ax5.set_xlabel('KEFF Value', fontname=font_name if font_name else 'DejaVu Sans')
-        ax5.set_ylabel('Frequency', fontname=font_name if font_name else 'DejaVu Sans')
-        ax5.set_title('KEFF Value Distribution', fontname=font_name if font_name else 'DejaVu Sans')
-        ax5.grid(True, alpha=0.3)
-        
-        # 子图6: 统计信息表格
-        ax6 = fig_final.add_subplot(2, 3, 6)
-        ax6.axis('off')
-        
-        # 计算统计信息
-        min_keff = min(keff_values)
-        max_keff = max(keff_values)
-        avg_keff = sum(keff_values) / len(keff_values)
-        std_keff = math.sqrt(sum((k - avg_keff)**2 for k in keff_values) / len(keff_values))
-        
-        first_keff = keff_sorted[0]
-        max_change_percent = max(abs((k - first_keff) / first_keff * 100) for k in keff_values)
-        
-        # 基准值比较统计
-        deviations = [k - self.baseline_keff for k in keff_values]
-        min_deviation = min(deviations)
-        max_deviation = max(deviations)
-        avg_deviation = sum(deviations) / len(deviations)
-        max_abs_deviation = max(abs(d) for d in deviations)
+        # 统计信息由增量统计器提供
+        st = self.stats
         
         stats_text = f"""
 Statistics:
 ━━━━━━━━━━━━━━━━
-• Calculation Points: {len(self.results)}
-• KEFF Minimum: {min_keff:.6f}
-• KEFF Maximum: {max_keff:.6f}
-• KEFF Average: {avg_keff:.6f}
-• KEFF Std Dev: {std_keff:.6f}
-• KEFF Range: {max_keff - min_keff:.6f}
-• Max Change Rate: {max_change_percent:.4f}%
+• Calculation Points: {st.count}
+• KEFF Minimum: {st.min_keff:.6f}
+• KEFF Maximum: {st.max_keff:.6f}
+• KEFF Average: {st.mean:.6f}
+• KEFF Std Dev: {st.std:.6f}
+• KEFF Median: {st.median:.6f}
+• KEFF Q1 - Q3: {st.quantile(0.25):.6f} - {st.quantile(0.75):.6f}
+• KEFF Range: {st.keff_range:.6f}
+• Max Change Rate: {st.max_change_percent:.4f}%
 
 Baseline Comparison:
 ━━━━━━━━━━━━━━━━
 • Baseline: {self.baseline_keff:.5f}
-• Min Deviation: {min_deviation:+.6f}
-• Max Deviation: {max_deviation:+.6f}
-• Avg Deviation: {avg_deviation:+.6f}
-• Max Abs Dev: {max_abs_deviation:.6f}
+• Min Deviation: {st.min_deviation:+.6f}
+• Max Deviation: {st.max_deviation:+.6f}
+• Avg Deviation: {st.avg_deviation:+.6f}
+• Max Abs Dev: {st.max_abs_deviation:.6f}
 
 Parameter Range:
 ━━━━━━━━━━━━━━━━
-• Line 87: {min(param1_values):.2E} 
-  to {max(param1_values):.2E}
-• Line 92: {min(param2_values):.2E} 
-  to {max(param2_values):.2E}
+• Line 87: {st.min_param1:.2E} 
+  to {st.max_param1:.2E}
+• Line 92: {st.min_param2:.2E} 
+  to {st.max_param2:.2E}
 • Ratio: 7.95:5 = {self.ratio:.3f}
         """
         
-        ax6.text(0.1, 0.9, stats_text, transform=ax6.transAxes, fontsize=11, 
-                verticalalignment='top', fontfamily='monospace', 
-                fontname=font_name if font_name else 'DejaVu Sans')
-        
-        plt.tight_layout()
-        
-        # 保存图表
-        plt.savefig('keff_study_analysis.png', dpi=300, bbox_inches='tight')
-        print("分析图表已保存为: keff_study_analysis.png")
+        # 无界面渲染：大数组降采样后6个子图并行渲染再拼接
+        render_report(
+            [r['parameter_value_1'] for r in self.results],
+            [r['parameter_value_2'] for r in self.results],
+            [r['keff'] for r in self.results],
+            self.baseline_keff, self.ratio, stats_text,
+            filename=filename, dpi=300, font_name=font_name
+        )
+        print(f"分析图表已保存为: {filename}")
+        
+        if not show:
+            return
         
         # 显示图表
+        fig_final = plt.figure(figsize=(16, 12))
+        ax = fig_final.add_axes([0, 0, 1, 1])
+        ax.imshow(plt.imread(filename))
+        ax.axis('off')
         plt.show()
         
         # 保持图表窗口打开
@@ -782,8 +2408,9 @@ Parameter Range:
             shutil.copy2(backup_name, self.original_file)
             print("已恢复原始文件")
     
-    def save_results_csv(self, filename="keff_study_results.csv"):
-        """保存结果到CSV文件"""
+    @profiled()
+    def save_results_csv(self, filename="keff_study_results.csv", summary_filename="keff_study_summary.txt"):
+        """保存结果到CSV文件和统计摘要"""
         if not self.results:
             print("没有结果需要保存")
             return
@@ -791,23 +2418,27 @@ Parameter Range:
         # 按第1个参数值排序
         self.results.sort(key=lambda x: x['parameter_value_1'])
         
-        # 计算统计信息
-        keff_values = [r['keff'] for r in self.results]
-        first_keff = keff_values[0]
+        # 统计信息由增量统计器提供
+        st = self.stats
         
         # 写入CSV文件
+        # 运行状态列（K-EFF表中keff所在行），只写入结果中出现过的字段
+        state_fields = [name for name in STATE_LABELS if any(name in r.get('state', {}) for r in self.results)]
+        
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
             fieldnames = ['Index', 'Line87_Parameter', 'Line92_Parameter', 'KEFF_Value', 'KEFF_Change', 'KEFF_Change_Percent', 'Baseline_Deviation', 'Baseline_Deviation_Percent', 'Output_File']
+            fieldnames += [STATE_LABELS[name] for name in state_fields]
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             
             writer.writeheader()
             for i, result in enumerate(self.results, 1):
-                keff_change = result['keff'] - first_keff
-                keff_change_percent = (keff_change / first_keff) * 100
-                baseline_deviation = result['keff'] - self.baseline_keff
-                baseline_deviation_percent = (baseline_deviation / self.baseline_keff) * 100
+                keff_change, keff_change_percent = st.change_from_reference(result['keff'])
+                baseline_deviation, baseline_deviation_percent = st.deviation_from_baseline(result['keff'])
                 
+                row = {STATE_LABELS[name]: f"{result['state'][name]:g}"
+                       for name in state_fields if name in result.get('state', {})}
                 writer.writerow({
+                    **row,
                     'Index': i,
                     'Line87_Parameter': f"{result['parameter_value_1']:.6E}",
                     'Line92_Parameter': f"{result['parameter_value_2']:.6E}",
@@ -822,62 +2453,137 @@ Parameter Range:
         print(f"结果已保存到: {filename}")
         
         # 保存统计摘要
-        summary_filename = "keff_study_summary.txt"
         with open(summary_filename, 'w', encoding='utf-8') as f:
             f.write("KEFF Study Results Summary\n")
             f.write("=" * 40 + "\n\n")
             f.write("Parameter Settings:\n")
-            f.write(f"  Line 87 Parameter Range: {min(r['parameter_value_1'] for r in self.results):.2E} - {max(r['parameter_value_1'] for r in self.results):.2E}\n")
-            f.write(f"  Line 92 Parameter Range: {min(r['parameter_value_2'] for r in self.results):.2E} - {max(r['parameter_value_2'] for r in self.results):.2E}\n")
+            f.write(f"  Line 87 Parameter Range: {st.min_param1:.2E} - {st.max_param1:.2E}\n")
+            f.write(f"  Line 92 Parameter Range: {st.min_param2:.2E} - {st.max_param2:.2E}\n")
             f.write(f"  Ratio Relationship: 7.95:5 = {self.ratio:.3f}\n\n")
             f.write("Results Statistics:\n")
-            f.write(f"  KEFF Value Range: {min(keff_values):.6f} - {max(keff_values):.6f}\n")
-            f.write(f"  KEFF Change Range: {max(keff_values) - min(keff_values):.6f}\n")
-            
-            max_change_percent = max(abs((k - first_keff) / first_keff * 100) for k in keff_values)
-            f.write(f"  Max Change Percentage: {max_change_percent:.4f}%\n")
-            f.write(f"  Average KEFF Value: {sum(keff_values) / len(keff_values):.6f}\n")
-            f.write(f"  Total Calculations: {len(self.results)}\n\n")
+            f.write(f"  KEFF Value Range: {st.min_keff:.6f} - {st.max_keff:.6f}\n")
+            f.write(f"  KEFF Change Range: {st.keff_range:.6f}\n")
+            f.write(f"  Max Change Percentage: {st.max_change_percent:.4f}%\n")
+            f.write(f"  Average KEFF Value: {st.mean:.6f}\n")
+            f.write(f"  KEFF Std Dev: {st.std:.6f}\n")
+            f.write(f"  KEFF Median: {st.median:.6f}\n")
+            f.write(f"  KEFF Quartiles (Q1 - Q3): {st.quantile(0.25):.6f} - {st.quantile(0.75):.6f}\n")
+            f.write(f"  Total Calculations: {st.count}\n\n")
             
             # 基准值比较统计
-            deviations = [k - self.baseline_keff for k in keff_values]
-            min_deviation = min(deviations)
-            max_deviation = max(deviations)
-            avg_deviation = sum(deviations) / len(deviations)
-            max_abs_deviation = max(abs(d) for d in deviations)
-            
             f.write("Baseline Comparison Statistics:\n")
             f.write(f"  Baseline KEFF Value: {self.baseline_keff:.5f}\n")
-            f.write(f"  Min Deviation: {min_deviation:+.6f}\n")
-            f.write(f"  Max Deviation: {max_deviation:+.6f}\n")
-            f.write(f"  Average Deviation: {avg_deviation:+.6f}\n")
-            f.write(f"  Max Absolute Deviation: {max_abs_deviation:.6f}\n")
-            f.write(f"  Deviation Range: {max_deviation - min_deviation:.6f}\n")
+            f.write(f"  Min Deviation: {st.min_deviation:+.6f}\n")
+            f.write(f"  Max Deviation: {st.max_deviation:+.6f}\n")
+            f.write(f"  Average Deviation: {st.avg_deviation:+.6f}\n")
+            f.write(f"  Max Absolute Deviation: {st.max_abs_deviation:.6f}\n")
+            f.write(f"  Deviation Range: {st.deviation_range:.6f}\n")
         
         print(f"统计摘要已保存到: {summary_filename}")
         
         # 打印简要统计
         print("\n=== Results Statistics ===")
-        print(f"Line 87 Parameter Range: {min(r['parameter_value_1'] for r in self.results):.2E} - {max(r['parameter_value_1'] for r in self.results):.2E}")
-        print(f"Line 92 Parameter Range: {min(r['parameter_value_2'] for r in self.results):.2E} - {max(r['parameter_value_2'] for r in self.results):.2E}")
-        print(f"KEFF Value Range: {min(keff_values):.6f} - {max(keff_values):.6f}")
-        print(f"KEFF Change Range: {max(keff_values) - min(keff_values):.6f}")
-        max_change_percent = max(abs((k - first_keff) / first_keff * 100) for k in keff_values)
-        print(f"Max Change Percentage: {max_change_percent:.4f}%")
+        print(f"Line 87 Parameter Range: {st.min_param1:.2E} - {st.max_param1:.2E}")
+        print(f"Line 92 Parameter Range: {st.min_param2:.2E} - {st.max_param2:.2E}")
+        print(f"KEFF Value Range: {st.min_keff:.6f} - {st.max_keff:.6f}")
+        print(f"KEFF Change Range: {st.keff_range:.6f}")
+        print(f"Max Change Percentage: {st.max_change_percent:.4f}%")
         
         # 基准值比较统计
-        deviations = [k - self.baseline_keff for k in keff_values]
-        min_deviation = min(deviations)
-        max_deviation = max(deviations)
-        avg_deviation = sum(deviations) / len(deviations)
-        max_abs_deviation = max(abs(d) for d in deviations)
-        
         print(f"\n=== Baseline Comparison (Baseline: {self.baseline_keff:.5f}) ===")
-        print(f"Min Deviation: {min_deviation:+.6f}")
-        print(f"Max Deviation: {max_deviation:+.6f}")
-        print(f"Average Deviation: {avg_deviation:+.6f}")
-        print(f"Max Absolute Deviation: {max_abs_deviation:.6f}")
-        print(f"Deviation Range: {max_deviation - min_deviation:.6f}")
+        print(f"Min Deviation: {st.min_deviation:+.6f}")
+        print(f"Max Deviation: {st.max_deviation:+.6f}")
+        print(f"Average Deviation: {st.avg_deviation:+.6f}")
+        print(f"Max Absolute Deviation: {st.max_abs_deviation:.6f}")
+        print(f"Deviation Range: {st.deviation_range:.6f}")
+
+def ask_campaign_settings(automation):
+    """交互设置多输入文件研究：每个输入文件的参数范围、点数和权重"""
+    names = input(f"输入文件（逗号分隔，默认 {automation.original_file}）: ").strip()
+    decks = []
+    for deck in [name.strip() for name in names.split(',') if name.strip()] or [automation.original_file]:
+        if not os.path.exists(deck):
+            print(f"错误：找不到输入文件 {deck}")
+            return None
+        while True:
+            try:
+                print(f"\n{deck} (Line 87 parameter values):")
+                start_val = float(input("  Start value (default 1e-8): ") or "1e-8")
+                end_val = float(input("  End value (default 9e-7): ") or "9e-7")
+                num_points = int(input("  Number of points (default 9): ") or "9")
+                weight = float(input("  权重（优先级，默认1）: ") or "1")
+                if start_val >= end_val or num_points < 2 or weight <= 0:
+                    print("错误：起始值必须小于结束值，点数不少于2，权重大于0")
+                    continue
+                break
+            except ValueError:
+                print("错误：请输入有效的数值")
+        decks.append({'deck': deck, 'weight': weight,
+                      'values': automation.generate_parameter_values(start_val, end_val, num_points)})
+    return decks
+
+def ask_sensitivity_settings(automation):
+    """交互设置灵敏度筛选的字段、范围和停止条件"""
+    print("\n输入要筛选的字段，每行一个: 行号 字段序号(从0开始) 下限 上限 [log]，空行结束")
+    print(f"  例如 '{automation.target_line_1} 1 1e-8 9e-7 log' 或 '97 7 1e-4 1e-3'")
+    lines = automation.read_input_lines()
+    fields = []
+    while True:
+        text = input(f"字段{len(fields) + 1}: ").strip()
+        if not text:
+            break
+        parts = text.split()
+        try:
+            line_no, index = int(parts[0]), int(parts[1])
+            field = DeckField(line_no, index, float(parts[2]), float(parts[3]),
+                              log=len(parts) > 4 and parts[4].lower() == 'log')
+            original = lines[line_no - 1].split()[index]
+        except (IndexError, ValueError) as e:
+            print(f"输入无效: {e}")
+            continue
+        print(f"  {field.describe()}，原值 {original}（{lines[line_no - 1].rstrip()[-5:].strip()}卡）")
+        fields.append(field)
+    if len(fields) < 2:
+        print("至少需要2个字段")
+        return None, None
+    
+    estimate = MorrisEstimate(fields)
+    try:
+        estimate.rel_precision = float(input(f"μ*置信区间半宽相对最大μ*的目标 (默认 {estimate.rel_precision:g}): ")
+                                       or estimate.rel_precision)
+        estimate.max_trajectories = int(input(f"最大轨迹数 (默认 {estimate.max_trajectories}，"
+                                              f"每条{estimate.runs_per_trajectory}次计算): ")
+                                        or estimate.max_trajectories)
+    except ValueError:
+        print("输入无效，使用默认设置")
+    return fields, estimate
+
+def ask_uncertainty_settings(automation):
+    """交互设置不确定性传播的输入分布和停止条件"""
+    nominal = 5e-8
+    try:
+        with open(automation.original_file, 'r', encoding='utf-8', errors='replace') as f:
+            nominal = float(f.readlines()[automation.target_line_1 - 1].split()[1])
+    except (OSError, IndexError, ValueError):
+        pass
+    
+    while True:
+        try:
+            nominal_1 = float(input(f"第87行参数名义值 (默认 {nominal:.6E}): ") or nominal)
+            nominal_2 = float(input(f"第92行参数名义值 (默认按比例 {nominal_1 / automation.ratio:.6E}): ")
+                              or nominal_1 / automation.ratio)
+            rel_std_1 = float(input("第87行相对标准差 (默认 0.02): ") or "0.02")
+            rel_std_2 = float(input("第92行相对标准差 (默认 0.02): ") or "0.02")
+            correlation = float(input("两参数相关系数 (默认 0.9): ") or "0.9")
+            target_width = float(input("keff均值95%置信区间目标全宽 (默认 1e-4): ") or "1e-4")
+            max_samples = int(input("最大样本数 (默认 500): ") or "500")
+            sampler = CorrelatedLognormalSampler(nominal_1, nominal_2, rel_std_1, rel_std_2, correlation)
+            break
+        except ValueError as e:
+            print(f"错误：{e}")
+    
+    estimate = UncertaintyEstimate(automation.baseline_keff, target_width=target_width, max_samples=max_samples)
+    return sampler, estimate
 
 def main():
     """主函数"""
@@ -910,6 +2616,12 @@ def main():
         input("按回车键退出...")
         return
     
+    # 询问是否重新计算已隔离的参数点
+    quarantined = automation.store.quarantined(os.path.basename(automation.original_file))
+    if quarantined:
+        response = input(f"发现{len(quarantined)}个已隔离的失败参数点，是否重新计算？(y/n，默认n): ").lower()
+        automation.retry_quarantined = response == 'y'
+    
     # 询问是否启用可视化
     if MATPLOTLIB_AVAILABLE:
         response = input("是否启用实时可视化功能？(y/n，默认y): ").lower()
@@ -917,13 +2629,102 @@ def main():
             automation.enable_visualization = False
             print("已禁用可视化功能")
     
+    # 选择计算模式
+    mode = input("计算模式: 1=参数扫描, 2=临界搜索（求达到目标keff的参数值）, 3=多保真度扫描, "
+                 "4=不确定性传播, 5=求解程序A/B对比, 6=多输入文件研究, 7=灵敏度筛选 (默认1): ").strip()
+    search_mode = mode == '2'
+    multifidelity_mode = mode == '3'
+    abtest_mode = mode == '5'
+    
+    # 设置并行进程数
+    cpu_count = os.cpu_count() or 1
+    workers = input(f"并行VSOP进程数 (默认 1，本机{cpu_count}核，auto=按资源自动调节): ").strip().lower()
+    if workers == 'auto':
+        tuner = automation.enable_auto_tuning()
+        print(f"已启用并行度自动调节: {tuner.describe()}")
+    else:
+        try:
+            automation.max_workers = max(1, min(int(workers or "1"), cpu_count))
+        except ValueError:
+            print("输入无效，使用顺序模式")
+    
+    # 内存盘工作目录
+    scratch_root = default_scratch_root()
+    if scratch_root:
+        response = input(f"是否在内存盘（{scratch_root}）上运行各计算点？"
+                         f"(输入大小上限MB启用，默认不启用): ").strip()
+    else:
+        # 没有系统内存盘（如Windows）时可以指定自建内存盘（如ImDisk创建的R:盘）上的目录
+        scratch_root = input("是否在内存盘上运行各计算点？(输入内存盘上的目录启用，默认不启用): ").strip()
+        response = ""
+        if scratch_root and not os.path.isdir(scratch_root):
+            print(f"目录 {scratch_root} 不存在，不启用内存盘")
+        elif scratch_root:
+            response = input("内存盘工作目录大小上限MB（默认2048）: ").strip() or "2048"
+    if response:
+        try:
+            scratch = automation.enable_scratch(root=scratch_root, limit_mb=float(response))
+            if scratch:
+                print(f"已启用内存盘工作目录: {scratch.describe()}")
+        except ValueError:
+            print("输入无效，不启用内存盘")
+    
+    # 流式输出
+    if OutputFifo.supported():
+        response = input("输出文件处理: 1=完整保存（默认）, 2=流式解析只保存K-EFF表, "
+                         "3=流式解析并另存gzip压缩的完整输出: ").strip()
+        if response in ('2', '3'):
+            automation.stream_output = True
+            automation.stream_archive = response == '3'
+    
+    if mode == '4':
+        sampler, estimate = ask_uncertainty_settings(automation)
+        response = input("\n是否开始不确定性传播？(y/n): ")
+        if response.lower() != 'y':
+            print("已取消")
+            return
+        automation.run_uncertainty(sampler, estimate)
+        input("按回车键退出...")
+        return
+    
+    if mode == '7':
+        fields, estimate = ask_sensitivity_settings(automation)
+        if not fields:
+            return
+        response = input("\n是否开始灵敏度筛选？(y/n): ")
+        if response.lower() != 'y':
+            print("已取消")
+            return
+        automation.run_sensitivity(fields, estimate)
+        input("按回车键退出...")
+        return
+    
+    if mode == '6':
+        decks = ask_campaign_settings(automation)
+        if not decks:
+            return
+        response = input("\n是否开始多输入文件研究？(y/n): ")
+        if response.lower() != 'y':
+            print("已取消")
+            return
+        automation.run_campaign(decks)
+        print(f"各输入文件的结果已保存到: {automation.campaign_dir}/<输入文件名>/")
+        input("按回车键退出...")
+        return
+    
     # 设置参数
     while True:
         try:
             print("\nPlease set research parameters (Line 87 parameter values):")
             start_val = float(input("Start value (default 1e-8): ") or "1e-8")
             end_val = float(input("End value (default 9e-7): ") or "9e-7")
-            num_points = int(input("Number of points (default 9): ") or "9")
+            if search_mode:
+                target_keff = float(input(f"Target keff (default baseline {automation.baseline_keff:.5f}, 1 for critical): ")
+                                    or automation.baseline_keff)
+                tolerance = float(input("Keff tolerance (default 1e-4): ") or "1e-4")
+                num_points = int(input("Maximum number of runs (default 12): ") or "12")
+            else:
+                num_points = int(input("Number of points (default 9): ") or "9")
             
             if start_val >= end_val:
                 print("错误：起始值必须小于结束值")
@@ -936,11 +2737,39 @@ def main():
         except ValueError:
             print("错误：请输入有效的数值")
     
+    if search_mode:
+        response = input("\n是否开始临界搜索？(y/n): ")
+        if response.lower() != 'y':
+            print("已取消")
+            return
+        automation.run_search(target_keff, start_val, end_val, tolerance, max_runs=num_points)
+        automation.save_results_csv()
+        input("按回车键退出...")
+        return
+    
+    # 由粗到细排序和时间预算（只用于参数扫描）
+    order = 'ascending'
+    budget = None
+    if not abtest_mode and not multifidelity_mode:
+        response = input("计算顺序: 1=从小到大, 2=由粗到细（中途停止也覆盖整个范围，加密时复用已有结果） (默认1): ").strip()
+        if response == '2':
+            order = 'coarse_to_fine'
+            print("提示: 点数取 2^k+1（如5、9、17、33）时，加密后原有的点全部复用")
+        try:
+            hours = float(input("时间预算（小时，默认不限）: ") or "0")
+            budget = hours * 3600 if hours > 0 else None
+        except ValueError:
+            print("输入无效，不限时间")
+        response = input("是否启用控制通道（运行中加点、调整优先级、取消、调整进程数）？(y/n，默认n): ").lower()
+        if response == 'y':
+            automation.control_file = DEFAULT_CONTROL_FILE
+    
     # 生成参数值
     parameter_values = automation.generate_parameter_values(
         start=start_val,
         end=end_val,
-        num_points=num_points
+        num_points=num_points,
+        order=order
     )
     
     print(f"\nParameter value combinations to be used ({len(parameter_values)} sets):")
@@ -951,11 +2780,41 @@ def main():
         ratio_check = val / val_2
         print(f"{i:2d}    | {val:.6E}   | {val_2:.6E}   | {ratio_check:.3f}")
     
-    print(f"\n预计总运行时间: 约{len(parameter_values) * 2}分钟")
+    deck = os.path.basename(automation.original_file)
+    estimated = automation.runtime_model.estimate_total(parameter_values, deck, automation.max_workers)
+    print(f"\n预计总运行时间: 约{format_duration(estimated)}（{automation.runtime_model.describe(deck)}）")
     
     if automation.enable_visualization:
         print("提示: 运行过程中将显示实时图表监控")
     
+    if abtest_mode:
+        names = list(automation.solver_backends)
+        print("可用的求解程序: " + ", ".join(f"{name}={path}" for name, path in automation.solver_backends.items()))
+        backend_a = input(f"求解程序A (默认 {names[0]}): ").strip() or names[0]
+        backend_b = input(f"求解程序B (默认 {names[1]}): ").strip() or names[1]
+        if backend_a not in automation.solver_backends or backend_b not in automation.solver_backends:
+            print("错误：未知的求解程序名称")
+            return
+        try:
+            repeats = max(1, int(input("每个点的重复次数 (默认 1): ") or "1"))
+        except ValueError:
+            repeats = 1
+        response = input("\n是否开始A/B对比？(y/n): ")
+        if response.lower() != 'y':
+            print("已取消")
+            return
+        automation.run_abtest(parameter_values, backend_a, backend_b, repeats)
+        input("按回车键退出...")
+        return
+    
+    if multifidelity_mode:
+        try:
+            automation.screening_convergence = float(
+                input(f"筛选计算的收敛判据 (默认 {automation.screening_convergence:g}，原输入为0.0001): ")
+                or automation.screening_convergence)
+        except ValueError:
+            print(f"输入无效，使用 {automation.screening_convergence:g}")
+    
     # 确认继续
     response = input("\n是否继续运行研究？(y/n): ")
     if response.lower() != 'y':
@@ -963,19 +2822,38 @@ def main():
         return
     
     # 运行研究
-    automation.run_study(parameter_values)
+    if multifidelity_mode:
+        automation.run_multifidelity(parameter_values)
+    else:
+        coarse_to_fine = order == 'coarse_to_fine'
+        automation.run_study(parameter_values, budget=budget, ordered=coarse_to_fine, reuse=coarse_to_fine)
     
     # 保存结果
     automation.save_results_csv()
+    automation.profiler.write()  # 剖析结果包含结果文件的写入
     
     print("\n所有操作完成！")
     print("已生成以下文件:")
     print("  - keff_study_results.csv (详细结果)")
     print("  - keff_study_summary.txt (统计摘要)")
+    if multifidelity_mode:
+        print("  - keff_multifidelity.csv (筛选与高保真度结果对照)")
     if automation.enable_visualization:
         print("  - keff_study_analysis.png (分析图表)")
     
     input("按回车键退出...")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze':
+        # 离线分析已有输出: python keff_study_simple.py analyze <目录或压缩包>
+        from keff_analyze import main as analyze_main
+        sys.exit(analyze_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'monitor':
+        # 本地监控服务: python keff_study_simple.py monitor [--port 8765]
+        from keff_monitor import main as monitor_main
+        sys.exit(monitor_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'control':
+        # 向运行中的研究发送控制命令: python keff_study_simple.py control add 1.2e-7
+        from keff_control import main as control_main
+        sys.exit(control_main(sys.argv[2:]))
     main() 
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+不确定性传播模块（蒙特卡罗）
+第87行和第92行参数带有测量不确定度时，按相关的对数正态分布抽样，
+逐个样本流式更新keff的均值、方差和分位数，置信区间达到目标宽度时自动停止
+样本本身不保留在内存中；仅使用Python标准库
+"""
+
+import math
+import random
+from statistics import NormalDist
+
+from keff_stats import KeffStatistics
+
+
+class CorrelatedLognormalSampler:
+    """两个参数的相关对数正态抽样
+
+    ln(v_i) = ln(nominal_i) + s_i × z_i，(z_1, z_2) 为相关系数correlation的标准正态变量；
+    correlation = 1 且两个相对标准差相同时，两参数的比例（7.95:5）保持不变
+
+    Args:
+        nominal_1, nominal_2: 第87行、第92行参数的名义值（中位数）
+        rel_std_1, rel_std_2: 相对标准差（对数空间标准差）
+        correlation: 两个参数对数值之间的相关系数
+        seed: 随机数种子，便于复现
+    """
+
+    def __init__(self, nominal_1, nominal_2, rel_std_1=0.02, rel_std_2=0.02, correlation=0.9, seed=None):
+        if not -1.0 <= correlation <= 1.0:
+            raise ValueError("相关系数必须在[-1, 1]内")
+        self.nominal_1 = nominal_1
+        self.nominal_2 = nominal_2
+        self.rel_std_1 = rel_std_1
+        self.rel_std_2 = rel_std_2
+        self.correlation = correlation
+        self._rng = random.Random(seed)
+
+    def sample(self):
+        """抽取一组 (第87行参数, 第92行参数)"""
+        z1 = self._rng.gauss(0.0, 1.0)
+        z2 = self.correlation * z1 + math.sqrt(1.0 - self.correlation ** 2) * self._rng.gauss(0.0, 1.0)
+        return (self.nominal_1 * math.exp(self.rel_std_1 * z1),
+                self.nominal_2 * math.exp(self.rel_std_2 * z2))
+
+    def describe(self):
+        return (f"第87行 {self.nominal_1:.6E} ± {self.rel_std_1:.1%}，第92行 {self.nominal_2:.6E} ± {self.rel_std_2:.1%}，"
+                f"相关系数 {self.correlation:.2f}")
+
+
+class UncertaintyEstimate:
+    """keff分布的流式估计和停止判据
+
+    均值置信区间全宽不超过target_width、标准差置信区间相对全宽不超过std_precision时停止；
+    样本数不足min_samples时不停止，达到max_samples时强制停止
+
+    Args:
+        baseline_keff: 基准keff
+        confidence: 置信水平
+        target_width: keff均值置信区间的目标全宽
+        std_precision: keff标准差置信区间的目标相对全宽
+    """
+
+    def __init__(self, baseline_keff, confidence=0.95, target_width=1e-4, std_precision=0.2,
+                 min_samples=20, max_samples=1000):
+        self.confidence = confidence
+        self.target_width = target_width
+        self.std_precision = std_precision
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.stats = KeffStatistics(baseline_keff, quantiles=(0.025, 0.05, 0.5, 0.95, 0.975))
+        self.failures = 0
+        self._z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def update(self, param1, param2, keff):
+        self.stats.update(param1, param2, keff)
+
+    def mean_interval(self):
+        """keff均值的置信区间"""
+        if self.count < 2:
+            return None
+        half = self._z * self.stats.std / math.sqrt(self.count)
+        return self.stats.mean - half, self.stats.mean + half
+
+    def std_interval(self):
+        """keff标准差的置信区间（对数正态近似）"""
+        if self.count < 3 or self.stats.std == 0:
+            return None
+        factor = math.exp(self._z / math.sqrt(2 * (self.count - 1)))
+        return self.stats.std / factor, self.stats.std * factor
+
+    def batch_size(self, workers):
+        """下一批样本数：估计还需要的样本数，至少每个进程一个，不超过剩余上限"""
+        remaining = self.max_samples - self.count - self.failures
+        if self.count < self.min_samples:
+            needed = self.min_samples - self.count
+        else:
+            # 均值区间宽度按1/sqrt(n)缩小，标准差区间相对宽度按1/sqrt(2(n-1))缩小
+            std = self.stats.std
+            n_mean = (2 * self._z * std / self.target_width) ** 2 if std > 0 else 0
+            n_std = 1 + 0.5 * (2 * self._z / self.std_precision) ** 2
+            needed = max(n_mean, n_std) - self.count
+            needed = min(needed, self.count)  # 估计值不可靠，每批最多使样本数翻倍
+        return max(0, min(remaining, max(workers, int(math.ceil(needed)))))
+
+    def done(self):
+        """返回 (是否停止, 原因)"""
+        if self.count + self.failures >= self.max_samples:
+            return True, f"已达到最大样本数{self.max_samples}"
+        if self.count < self.min_samples:
+            return False, None
+        low, high = self.mean_interval()
+        if high - low > self.target_width:
+            return False, None
+        interval = self.std_interval()
+        if interval is not None and (interval[1] - interval[0]) / self.stats.std > self.std_precision:
+            return False, None
+        return True, "置信区间已达到目标宽度"
+
+    def report_lines(self):
+        """结果摘要（每项一行）"""
+        st = self.stats
+        pct = self.confidence * 100
+        lines = [f"有效样本数: {self.count}（失败 {self.failures}）"]
+        if self.count == 0:
+            return lines
+        lines.append(f"keff均值: {st.mean:.6f}")
+        interval = self.mean_interval()
+        if interval is not None:
+            lines.append(f"均值{pct:.0f}%置信区间: [{interval[0]:.6f}, {interval[1]:.6f}]（全宽 {interval[1] - interval[0]:.2e}）")
+        lines.append(f"keff标准差: {st.std:.6f}")
+        interval = self.std_interval()
+        if interval is not None:
+            lines.append(f"标准差{pct:.0f}%置信区间: [{interval[0]:.6f}, {interval[1]:.6f}]")
+        lines.append(f"keff范围: {st.min_keff:.6f} - {st.max_keff:.6f}")
+        lines.append(f"分位数 2.5% / 50% / 97.5%: {st.quantile(0.025):.6f} / {st.median:.6f} / {st.quantile(0.975):.6f}")
+        lines.append(f"均值与基准值偏差: {st.mean - st.baseline_keff:+.6f}")
+        return lines
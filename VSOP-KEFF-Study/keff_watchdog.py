@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP运行进度看门狗
+跟踪正在运行的VSOP进程的活动信号（输出文件增长、CPU时间、stdout/stderr输出、K-EFF表燃耗步），
+在配置的时间窗口内没有任何进展时提前终止进程，而不是一直等到超时；
+进程正常结束时记录其CPU时间和峰值内存
+stdout/stderr逐行写入每次运行的gzip日志文件，内存中只保留最后几KB供错误报告使用
+仅使用Python标准库（安装了psutil时用它读取CPU时间）
+"""
+
+import os
+import sys
+import gzip
+import time
+import threading
+import subprocess
+from collections import deque
+
+from vsop_output import KeffTableProgress
+
+# 等待结果
+WAIT_OK = 'ok'
+WAIT_TIMEOUT = 'timeout'
+WAIT_STALLED = 'stalled'
+
+
+def process_cpu_time(pid):
+    """读取进程累计CPU时间（秒），无法获取时返回None"""
+    try:
+        import psutil
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if sys.platform.startswith('linux'):
+        try:
+            with open(f"/proc/{pid}/stat", 'r') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            ticks = os.sysconf('SC_CLK_TCK')
+            return (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == 'win32':
+        return _windows_cpu_time(pid)
+    return None
+
+
+def _windows_cpu_time(pid):
+    """通过GetProcessTimes读取Windows进程的CPU时间"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        try:
+            creation, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            if not kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exited),
+                                            ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            # FILETIME以100纳秒为单位
+            return sum(((ft.dwHighDateTime << 32) | ft.dwLowDateTime) / 1e7 for ft in (kernel, user))
+        finally:
+            kernel32.CloseHandle(handle)
+    except Exception:
+        return None
+
+
+def _windows_peak_memory(pid):
+    """通过GetProcessMemoryInfo读取Windows进程的峰值工作集（字节）"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000 | 0x0010, False, pid)  # QUERY_LIMITED_INFORMATION | VM_READ
+        if not handle:
+            return None
+        try:
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if not kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.PeakWorkingSetSize
+        finally:
+            kernel32.CloseHandle(handle)
+    except Exception:
+        return None
+
+
+class StreamLog:
+    """求解程序一个输出流的记录：逐行追加到gzip日志文件，内存中只保留最后tail_limit个字符
+
+    Args:
+        path: 日志文件路径（.gz），为None时不写日志
+        tail_limit: 内存中保留的字符数
+    """
+
+    def __init__(self, path=None, tail_limit=4096):
+        self.path = path
+        self.tail_limit = tail_limit
+        self.total = 0  # 收到的字符数
+        self._tail = deque()
+        self._tail_size = 0
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self._file = gzip.open(path, 'wt', encoding='utf-8', errors='replace')
+            except OSError as e:
+                print(f"无法创建日志文件 {path}: {e}")
+                self.path = None
+
+    def write(self, text):
+        with self._lock:
+            self.total += len(text)
+            if self._file is not None:
+                self._file.write(text)
+            self._tail.append(text)
+            self._tail_size += len(text)
+            # 只丢弃去掉后仍保留至少tail_limit个字符的旧段
+            while self._tail_size - len(self._tail[0]) >= self.tail_limit:
+                self._tail_size -= len(self._tail.popleft())
+
+    def tail(self):
+        """最后tail_limit个字符"""
+        with self._lock:
+            return ''.join(self._tail)[-self.tail_limit:]
+
+    def close(self):
+        """关闭日志文件；流中没有任何输出时删除空日志，path置为None"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            if self.total == 0:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+                self.path = None
+
+
+class SolverWatchdog:
+    """VSOP进程看门狗
+
+    Args:
+        process: subprocess.Popen对象（stdout/stderr为PIPE，stdin已写入并关闭）
+        output_path: VSOP输出文件路径
+        stall_window: 连续多少秒没有任何进展判定为停滞
+        poll_interval: 检查间隔（秒）
+        on_progress: 回调 on_progress(progress)，K-EFF表出现新的燃耗步时调用
+        stream: 流式输出时的vsop_output.OutputFifo，进度取自管道读线程而不是读取输出文件
+        log_prefix: stdout/stderr日志文件路径前缀（写入 <前缀>.stdout.gz、<前缀>.stderr.gz），为None时不写日志
+        tail_limit: 每个流在内存中保留的字符数
+    """
+
+    def __init__(self, process, output_path, stall_window=180.0, poll_interval=2.0, on_progress=None, stream=None,
+                 log_prefix=None, tail_limit=4096):
+        self.process = process
+        self.output_path = output_path
+        self.stall_window = stall_window
+        self.poll_interval = poll_interval
+        self.on_progress = on_progress
+        self.stream = stream
+        self.progress = stream.progress if stream is not None else KeffTableProgress()
+        self._reported_steps = 0
+        self.stdout_log = StreamLog(log_prefix + '.stdout.gz' if log_prefix else None, tail_limit)
+        self.stderr_log = StreamLog(log_prefix + '.stderr.gz' if log_prefix else None, tail_limit)
+        self._last_activity = time.time()
+        self._output_pos = 0
+        self._cpu_time = None
+        self.cpu_time = None     # 进程结束后的累计CPU时间（秒），无法获取时为None
+        self.peak_memory = None  # 进程的峰值内存（字节），无法获取时为None
+        self._readers = [
+            threading.Thread(target=self._drain, args=(process.stdout, self.stdout_log), daemon=True),
+            threading.Thread(target=self._drain, args=(process.stderr, self.stderr_log), daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    def _drain(self, stream, log):
+        """持续读取管道，避免进程因管道写满而阻塞，同时记录输出活动
+
+        按行（超长的行分段）读取，写入日志后只在内存中保留最后一段
+        """
+        if stream is None:
+            return
+        try:
+            for line in iter(lambda: stream.readline(8192), ''):
+                self._last_activity = time.time()
+                log.write(line)
+        except (OSError, ValueError):
+            pass
+
+    def _check_output(self):
+        """读取输出文件新增部分，返回是否有增长"""
+        if self.stream is not None:
+            return self._check_stream()
+        try:
+            size = os.path.getsize(self.output_path)
+        except OSError:
+            return False
+        if size <= self._output_pos:
+            return False
+        steps_before = self.progress.steps
+        with open(self.output_path, 'rb') as f:
+            f.seek(self._output_pos)
+            data = f.read(size - self._output_pos)
+        self._output_pos = size
+        self.progress.feed(data.decode('utf-8', errors='replace'))
+        if self.on_progress is not None and self.progress.steps != steps_before:
+            self.on_progress(self.progress)
+        return True
+
+    def _check_stream(self):
+        """流式输出：管道读线程已收到的字节数是否增长"""
+        received = self.stream.received
+        if received <= self._output_pos:
+            return False
+        self._output_pos = received
+        if self.on_progress is not None and self.progress.steps != self._reported_steps:
+            self._reported_steps = self.progress.steps
+            self.on_progress(self.progress)
+        return True
+
+    def _check_cpu(self):
+        """CPU时间是否增加"""
+        cpu = process_cpu_time(self.process.pid)
+        if cpu is None:
+            return False
+        advanced = self._cpu_time is not None and cpu > self._cpu_time + 0.01
+        self._cpu_time = cpu
+        return advanced
+
+    def wait(self, timeout):
+        """等待进程结束
+
+        Returns:
+            WAIT_OK（进程已退出）、WAIT_TIMEOUT 或 WAIT_STALLED（进程已被终止）
+        """
+        start = time.time()
+        while True:
+            try:
+                self._wait_exit(self.poll_interval)
+                self._check_output()
+                self._join_readers()
+                return WAIT_OK
+            except subprocess.TimeoutExpired:
+                pass
+
+            now = time.time()
+            if self._check_output() or self._check_cpu():
+                self._last_activity = now
+            if now - start > timeout:
+                self._kill()
+                return WAIT_TIMEOUT
+            # 既读不到CPU时间、输出文件也从未增长时无法判断是否停滞，只按超时处理
+            observable = self._cpu_time is not None or self._output_pos > 0
+            if observable and now - self._last_activity > self.stall_window:
+                self._kill()
+                return WAIT_STALLED
+
+    def _wait_exit(self, timeout):
+        """等待进程退出，超时抛出subprocess.TimeoutExpired
+
+        POSIX上用wait4回收进程，同时得到准确的CPU时间和峰值内存；
+        Windows上进程句柄在Popen对象释放前一直有效，退出后仍可查询
+        """
+        if not hasattr(os, 'wait4'):
+            self.process.wait(timeout=timeout)
+            if sys.platform == 'win32':
+                self.cpu_time = _windows_cpu_time(self.process.pid)
+                self.peak_memory = _windows_peak_memory(self.process.pid)
+            else:
+                self.cpu_time = self._cpu_time
+            return
+        deadline = time.time() + timeout
+        while True:
+            try:
+                pid, status, usage = os.wait4(self.process.pid, os.WNOHANG)
+            except ChildProcessError:
+                # 进程已被回收（如Popen内部），只能使用最后一次采样的CPU时间
+                self.process.wait(timeout=timeout)
+                self.cpu_time = self._cpu_time
+                return
+            if pid:
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+                self.cpu_time = usage.ru_utime + usage.ru_stime
+                # ru_maxrss在Linux上以KB为单位，在macOS上以字节为单位；
+                # Linux上fork时继承父进程的值，很小的程序也不会低于启动它的Python进程
+                self.peak_memory = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+                return
+            if time.time() >= deadline:
+                raise subprocess.TimeoutExpired(self.process.args, timeout)
+            time.sleep(0.05)
+
+    def _kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=10)
+        except Exception:
+            pass
+        self._join_readers()
+
+    def _join_readers(self):
+        for reader in self._readers:
+            reader.join(timeout=5)
+        self.stdout_log.close()
+        self.stderr_log.close()
+
+    @property
+    def stderr_text(self):
+        """stderr的最后一段（完整内容见stderr_log.path）"""
+        return self.stderr_log.tail()
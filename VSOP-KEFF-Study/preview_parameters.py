@@ -7,6 +7,10 @@
 
 import math
 
+from keff_runtime import RuntimeModel, format_duration
+
+BATCH_MINUTES = 30  # 每批目标运行时长（分钟）
+
 def generate_parameter_values(start, end, num_points):
     """生成参数值序列（对数均匀分布）"""
     log_start = math.log10(start)
@@ -128,16 +132,22 @@ def preview_parameters():
     ratio_std = math.sqrt(sum((r - ratio)**2 for r in ratios) / len(ratios))
     print(f"  比例关系标准差: {ratio_std:.6f} (应接近0)")
     
-    # 估算运行时间
-    estimated_time = num_points * 2  # 每个点约2分钟
-    print(f"\n运行时间估算:")
-    print(f"  预计总运行时间: {estimated_time}分钟 ({estimated_time/60:.1f}小时)")
-    
-    if estimated_time > 60:
-        print(f"  建议分批运行，每批约30分钟（15个点）")
-        batch_size = 15
-        num_batches = (num_points + batch_size - 1) // batch_size
-        print(f"  推荐分为{num_batches}批运行")
+    # 估算运行时间（基于历史运行时间记录）
+    model = RuntimeModel()
+    deck = "first_begin.i"
+    estimated_seconds = model.estimate_total(values, deck)
+    estimated_time = estimated_seconds / 60
+    per_point = [model.predict(v, deck) for v in values]
+    print(f"\n运行时间估算（{model.describe(deck)}）:")
+    print(f"  单点预计耗时: {format_duration(min(per_point))} - {format_duration(max(per_point))}")
+    print(f"  预计总运行时间: {estimated_time:.0f}分钟 ({estimated_time/60:.1f}小时)")
+    
+    if estimated_time > 2 * BATCH_MINUTES:
+        batches = model.plan_batches(values, BATCH_MINUTES * 60, deck)
+        print(f"  建议分批运行，每批约{BATCH_MINUTES}分钟，推荐分为{len(batches)}批运行:")
+        for i, batch in enumerate(batches, 1):
+            batch_time = model.estimate_total(batch, deck)
+            print(f"    第{i}批: {len(batch)}个点, {batch[0]:.2E} - {batch[-1]:.2E}, 约{format_duration(batch_time)}")
     
     # 参数分布可视化（文本版）
     print(f"\n第87行参数值分布可视化:")
@@ -194,7 +204,7 @@ def preview_parameters():
                 ratio_check = val / val_2
                 f.write(f"{i}\t{val:.6E}\t{val_2:.6E}\t{ratio_check:.3f}\n")
             
-            f.write(f"\n预计运行时间: {estimated_time}分钟 ({estimated_time/60:.1f}小时)\n")
+            f.write(f"\n预计运行时间: {estimated_time:.0f}分钟 ({estimated_time/60:.1f}小时)\n")
         
         print(f"参数列表已导出到: {filename}")
     
@@ -123,6 +123,22 @@ def test_setup():
         print(f"❌ 读取文件出错: {e}")
         success = False
     
+    # 整个输入文件的预检（卡片顺序、字段格式、库文件）
+    print("\n整体预检first_begin.i:")
+    try:
+        from keff_preflight import DeckValidator, format_issues
+        validator = DeckValidator.from_file("first_begin.i")
+        if validator.issues:
+            print(format_issues(validator.issues))
+        if validator.errors:
+            print(f"❌ 预检发现{len(validator.errors)}个错误")
+            success = False
+        else:
+            print(f"✅ 预检通过（{len(validator.base_lines)}行，卡片顺序、数值格式和库文件均正常）")
+    except Exception as e:
+        print(f"❌ 预检时出错: {e}")
+        success = False
+    
     # 测试参考输出文件和keff提取
     print("\n检查参考输出文件:")
     ref_files = ["2025.0711.out", "first_begin.out", "first.out"]
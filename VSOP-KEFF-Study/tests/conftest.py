@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试配置：各模块位于上一级目录，直接按模块名导入"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""keff_failures 失败分类、自适应超时、重试策略和隔离规则测试"""
+
+import pytest
+
+from keff_failures import (AdaptiveTimeout, RetryPolicy, classify_output, classify_output_state, FAILURE_TIMEOUT,
+                           FAILURE_STALLED, FAILURE_CRASH, FAILURE_MALFORMED, FAILURE_NO_KEFF_TABLE)
+from keff_store import ResultsStore, point_key
+from keff_study_simple import KeffStudySimple
+from vsop_output import KEFF_TABLE_HEADER
+
+KEFF_ROW = "     0      0.00   1.22370     3.200     1.230      900.0         0.0   250.0   250.0   750.0"
+
+
+def write_output(tmp_path, rows, name='point.out'):
+    lines = [" VSOP99 SYNTHETIC OUTPUT", "           " + KEFF_TABLE_HEADER, "   (units)", ""] + rows
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return str(path)
+
+
+# 输出文件相关的失败类型；超时、停滞、崩溃由run_solver根据进程状态判定，不经过输出文件分类
+@pytest.mark.parametrize('rows, keff, failure', [
+    ([KEFF_ROW], 1.2237, None),
+    ([], None, FAILURE_MALFORMED),  # 表格被截断
+    (["     0      0.00"], None, FAILURE_MALFORMED),  # 数据行字段不足
+    (["     0      0.00   ******     3.200"], None, FAILURE_MALFORMED),  # keff无法解析
+])
+def test_classify_output(tmp_path, rows, keff, failure):
+    path = write_output(tmp_path, rows)
+    result_keff, result_failure, message = classify_output(path)
+    assert result_failure == failure
+    assert result_keff == keff
+    assert (message is None) == (failure is None)
+    state_keff, state, state_failure, _ = classify_output_state(path)
+    assert (state_keff, state_failure) == (keff, failure)
+
+
+def test_classify_output_without_keff_table(tmp_path):
+    path = tmp_path / 'no_table.out'
+    path.write_text(" VSOP99 SYNTHETIC OUTPUT\n ERROR IN INPUT CARD 87\n", encoding='utf-8')
+    assert classify_output(str(path))[:2] == (None, FAILURE_NO_KEFF_TABLE)
+    assert classify_output_state(str(path))[2] == FAILURE_NO_KEFF_TABLE
+
+
+def test_classify_unreadable_output(tmp_path):
+    keff, failure, message = classify_output(str(tmp_path / 'missing.out'))
+    assert (keff, failure) == (None, FAILURE_MALFORMED)
+    assert message.startswith("无法读取输出文件")
+
+
+def test_adaptive_timeout_uses_initial_until_enough_samples():
+    timeout = AdaptiveTimeout(initial=600.0, min_samples=5)
+    for _ in range(4):
+        timeout.observe(10.0)
+    assert timeout.current() == 600.0
+    timeout.observe(10.0)
+    # 3 × 10秒低于下限60秒
+    assert timeout.current() == 60.0
+
+
+@pytest.mark.parametrize('wall_time, expected', [
+    (100.0, 300.0),  # P95 × 3
+    (5.0, 60.0),  # 下限60秒
+    (5000.0, 3600.0),  # 上限1小时
+])
+def test_adaptive_timeout_p95_times_three_clamped(wall_time, expected):
+    timeout = AdaptiveTimeout()
+    for _ in range(20):
+        timeout.observe(wall_time)
+    assert timeout.current() == pytest.approx(expected)
+
+
+def test_adaptive_timeout_doubles_after_timeout():
+    timeout = AdaptiveTimeout(initial=600.0)
+    assert timeout.for_attempt() == 600.0
+    assert timeout.for_attempt(FAILURE_TIMEOUT, 600.0) == 1200.0
+    assert timeout.for_attempt(FAILURE_TIMEOUT, 2400.0) == 3600.0
+    # 其他失败类型不放宽
+    assert timeout.for_attempt(FAILURE_CRASH, 600.0) == 600.0
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_attempts=3, backoff_base=5.0)
+    for failure in (FAILURE_TIMEOUT, FAILURE_STALLED, FAILURE_CRASH):
+        assert policy.should_retry(failure, 1)
+        assert policy.should_retry(failure, 2)
+        assert not policy.should_retry(failure, 3)
+    for failure in (FAILURE_MALFORMED, FAILURE_NO_KEFF_TABLE):
+        assert not policy.should_retry(failure, 1)
+    assert [policy.backoff(attempt) for attempt in (1, 2, 3)] == [5.0, 10.0, 20.0]
+
+
+@pytest.fixture
+def study(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    automation = KeffStudySimple()
+    automation.enable_visualization = False
+    automation.store = ResultsStore(str(tmp_path / 'store.jsonl'))
+    automation.retry_policy = RetryPolicy(max_attempts=3, backoff_base=0.0)
+    return automation
+
+
+# 隔离规则：确定性失败，或所有尝试都以同一种方式失败；None表示该次尝试成功
+@pytest.mark.parametrize('attempts, quarantined', [
+    ([FAILURE_MALFORMED], True),
+    ([FAILURE_NO_KEFF_TABLE], True),
+    ([FAILURE_CRASH, FAILURE_MALFORMED], True),
+    ([FAILURE_CRASH, FAILURE_CRASH, FAILURE_CRASH], True),
+    ([FAILURE_TIMEOUT, FAILURE_TIMEOUT, FAILURE_TIMEOUT], True),
+    ([FAILURE_TIMEOUT, FAILURE_CRASH, FAILURE_CRASH], False),
+    ([FAILURE_STALLED, FAILURE_TIMEOUT, FAILURE_STALLED], False),
+    ([FAILURE_CRASH, None], False),
+])
+def test_quarantine_rule(study, tmp_path, attempts, quarantined):
+    write_output(tmp_path, [KEFF_ROW], name='ok.out')
+    outcomes = iter(attempts)
+
+    def fake_attempt(run):
+        failure = next(outcomes)
+        run['output_file'] = 'ok.out' if failure is None else None
+        run['failure'], run['message'] = failure, None if failure is None else "synthetic"
+        run['solver_time'] = 1.0
+        run['usage'] = {}
+
+    study.run_attempt = fake_attempt
+    failures = []
+    outcome = study.solve_point(1e-7, workdir=str(tmp_path), failures=failures)
+
+    assert failures == [f for f in attempts if f is not None]
+    assert (outcome is not None) == (attempts[-1] is None)
+    records = study.store.quarantined(study.original_file)
+    assert (point_key(1e-7) in records) == quarantined
+    if quarantined:
+        assert records[point_key(1e-7)]['attempts'] == len(attempts)
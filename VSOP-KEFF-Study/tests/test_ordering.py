@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""由粗到细排序（coarse_to_fine_order）的嵌套性和结果复用测试"""
+
+import pytest
+
+from keff_store import ResultsStore, point_key, STATUS_OK
+from keff_study_simple import KeffStudySimple, coarse_to_fine_order
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 5, 6, 9, 10, 17, 33])
+def test_order_is_permutation_starting_at_endpoints(n):
+    order = coarse_to_fine_order(n)
+    assert sorted(order) == list(range(n))
+    if n >= 2:
+        assert order[:2] == [0, n - 1]
+
+
+def test_dyadic_refinement_nests_previous_order():
+    # 点数从2^k + 1 加密到 2^(k+1) + 1：新顺序的前缀正是原来的点，且顺序不变
+    for k in range(1, 5):
+        coarse, fine = coarse_to_fine_order(2 ** k + 1), coarse_to_fine_order(2 ** (k + 1) + 1)
+        assert fine[:len(coarse)] == [2 * i for i in coarse]
+
+
+def test_every_prefix_covers_range_evenly():
+    n = 33
+    order = coarse_to_fine_order(n)
+    for count in range(2, n + 1):
+        taken = sorted(order[:count])
+        largest_gap = max(b - a for a, b in zip(taken, taken[1:]))
+        # 最大间隙不超过同样点数均匀分布时的两倍
+        assert largest_gap <= 2 * (n - 1) / (count - 1)
+
+
+@pytest.fixture
+def study(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    automation = KeffStudySimple()
+    automation.enable_visualization = False
+    automation.store = ResultsStore(str(tmp_path / 'store.jsonl'))
+    return automation
+
+
+def test_refined_sweep_reuses_coarse_points(study):
+    coarse = study.generate_parameter_values(num_points=5, order='coarse_to_fine')
+    fine = study.generate_parameter_values(num_points=9, order='coarse_to_fine')
+    assert [point_key(v) for v in fine[:5]] == [point_key(v) for v in coarse]
+
+    deck = study.original_file
+    for value in coarse:
+        study.store.append({'deck': deck, 'point': point_key(value), 'parameter_value_1': value,
+                            'status': STATUS_OK, 'keff': 1.2, 'fidelity': 'high'})
+    remaining = study.reuse_completed_points(fine)
+    assert remaining == fine[5:]
+    assert sorted(r['parameter_value_1'] for r in study.results) == sorted(fine[:5])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""vsop_output 流式截取（OutputExtractor）与完整文件读取结果一致性测试"""
+
+import gzip
+
+import pytest
+
+from vsop_output import KEFF_TABLE_HEADER, OutputExtractor, read_keff, read_table
+
+np = pytest.importorskip('numpy')
+
+UNITS = ("                                 (W/CC)     (KW)      MAX (C)     (MWD/T)     (MW)     IN(C)   OUT(C)")
+
+
+def synthetic_output(steps=6, newline='\n', trailing_newline=True):
+    lines = [" VSOP99 SYNTHETIC OUTPUT"] + [f" filler line {i}  1.0 2.0" for i in range(300)]
+    lines += ["           " + KEFF_TABLE_HEADER, UNITS, ""]
+    for s in range(steps):
+        lines.append(f"   {s:3d}  {s * 10.0:8.2f}   {1.22370 - s * 1e-4:.5f}   {3.2 + s * 0.01:7.3f}   "
+                     f"{1.23:7.3f}   {900 + s:8.1f}   {s * 100.0:9.1f}   250.0   250.0   750.0")
+    lines += [" END OF RUN", "  7 TRAILING LINES 1 2 3 4 5 6 7 8 9"]
+    text = newline.join(lines)
+    return (text + newline if trailing_newline else text).encode('utf-8')
+
+
+def stream(data, chunk, tmp_path, archive=None):
+    extractor = OutputExtractor(archive)
+    for start in range(0, len(data), chunk):
+        extractor.feed(data[start:start + chunk])
+    extractor.close()
+    path = tmp_path / 'streamed.out'
+    extractor.write(str(path))
+    return extractor, str(path)
+
+
+def full_file(data, tmp_path):
+    path = tmp_path / 'full.out'
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 4096, 1 << 20])
+def test_streamed_sections_match_full_file(tmp_path, chunk):
+    data = synthetic_output()
+    extractor, streamed = stream(data, chunk, tmp_path)
+    full = full_file(data, tmp_path)
+
+    assert read_keff(streamed) == read_keff(full) == (1.2237, None)
+    table_streamed, error_streamed = read_table(streamed)
+    table_full, error_full = read_table(full)
+    assert error_streamed is None and error_full is None
+    assert table_streamed.dtype == table_full.dtype
+    assert np.array_equal(table_streamed, table_full)
+    assert len(table_full) == 6
+    assert extractor.progress.steps == 6
+    assert extractor.received == len(data)
+
+
+def test_crlf_and_missing_final_newline(tmp_path):
+    data = synthetic_output(newline='\r\n', trailing_newline=False)
+    _, streamed = stream(data, 13, tmp_path)
+    table_streamed, _ = read_table(streamed)
+    table_full, _ = read_table(full_file(data.replace(b'\r\n', b'\n'), tmp_path))
+    assert np.array_equal(table_streamed, table_full)
+
+
+def test_archive_keeps_complete_output(tmp_path):
+    data = synthetic_output()
+    archive = tmp_path / 'streamed.out.gz'
+    stream(data, 1000, tmp_path, archive=str(archive))
+    with gzip.open(archive, 'rb') as f:
+        assert f.read() == data
+
+
+def test_output_without_table_gives_same_error(tmp_path):
+    data = b" VSOP99 OUTPUT\n crashed before burnup\n"
+    _, streamed = stream(data, 5, tmp_path)
+    assert read_keff(streamed) == read_keff(full_file(data, tmp_path))
+    assert read_keff(streamed)[0] is None
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""keff_pipeline 环节交接测试"""
+
+import time
+import threading
+
+from keff_pipeline import Pipeline, Requeue, Stage
+
+
+def test_items_pass_through_every_stage_in_order():
+    def tag(name):
+        def func(item):
+            return item + [name]
+        return func
+
+    pipeline = Pipeline(([i] for i in range(5)), [
+        Stage('render', tag('render')),
+        Stage('solve', tag('solve'), workers=3, capacity=3),
+        Stage('extract', tag('extract')),
+    ])
+    reported = []
+    report = pipeline.run(reported.append)
+    assert sorted(reported) == [[i, 'render', 'solve', 'extract'] for i in range(5)]
+    assert report['fed'] == 5
+    assert [s['processed'] for s in report['stages']] == [5, 5, 5, 5]
+    assert [s['name'] for s in report['stages']] == ['render', 'solve', 'extract', 'report']
+
+
+def test_none_ends_item_and_requeue_retries():
+    attempts = {}
+    lock = threading.Lock()
+
+    def solve(item):
+        with lock:
+            attempts[item] = attempts.get(item, 0) + 1
+            count = attempts[item]
+        if item == 1 and count < 3:
+            return Requeue('solve', item, delay=0.01)
+        return item
+
+    def extract(item):
+        return None if item == 2 else item * 10
+
+    reported = []
+    report = Pipeline(iter(range(4)), [Stage('solve', solve), Stage('extract', extract)]).run(reported.append)
+    assert sorted(reported) == [0, 10, 30]
+    assert attempts[1] == 3
+    assert report['stages'][0]['processed'] == 6
+
+
+def test_stage_error_goes_to_on_error_and_then_report():
+    def solve(item):
+        if item == 'bad':
+            raise RuntimeError('boom')
+        return item
+
+    errors = []
+
+    def on_error(stage, item, error):
+        errors.append((stage, item, str(error)))
+        return item + ':failed'
+
+    later = []
+    pipeline = Pipeline(iter(['a', 'bad', 'b']), [
+        Stage('solve', solve),
+        Stage('persist', lambda item: later.append(item) or item),
+    ], on_error=on_error)
+    reported = []
+    pipeline.run(reported.append)
+    assert errors == [('solve', 'bad', 'boom')]
+    # 出错的item跳过其余环节，直接交给报告环节
+    assert sorted(later) == ['a', 'b']
+    assert sorted(reported) == ['a', 'b', 'bad:failed']
+
+
+def test_stage_error_without_handler_drops_item():
+    def solve(item):
+        if item == 1:
+            raise ValueError('bad item')
+        return item
+
+    reported = []
+    Pipeline(iter(range(3)), [Stage('solve', solve)]).run(reported.append)
+    assert sorted(reported) == [0, 2]
+
+
+def test_concurrency_limit_is_respected():
+    active = [0, 0]
+    lock = threading.Lock()
+
+    def solve(item):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return item
+
+    stage = Stage('solve', solve, workers=4, concurrency=lambda: 2)
+    Pipeline(iter(range(8)), [stage]).run()
+    assert active[1] <= 2
+    assert stage.peak_active <= 2
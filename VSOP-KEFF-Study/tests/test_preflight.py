@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""keff_preflight 输入文件预检测试（使用仓库中的first_begin.i和非VSOP格式的文件i）"""
+
+import os
+
+from keff_fidelity import apply_overrides
+from keff_preflight import DeckValidator, ERROR
+
+STUDY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def validator(name):
+    return DeckValidator.from_file(os.path.join(STUDY_DIR, name))
+
+
+def test_first_begin_deck_passes():
+    deck = validator('first_begin.i')
+    assert deck.errors == []
+
+
+def test_deck_without_card_labels_fails():
+    deck = validator('i')
+    assert deck.errors
+    assert all(level == ERROR for level, _, _ in deck.errors)
+    assert deck.errors[0] == (ERROR, 1, "第73-80列没有卡片标识")
+
+
+def test_missing_library_is_reported(tmp_path):
+    deck = DeckValidator.from_file(os.path.join(STUDY_DIR, 'first_begin.i'), library_dirs=(str(tmp_path),))
+    assert any("库文件" in message for _, _, message in deck.errors)
+
+
+def test_variant_with_same_layout_passes():
+    deck = validator('first_begin.i')
+    lines = apply_overrides(deck.base_lines, [(87, 1, '4.000000E-08')])
+    assert deck.validate_variant(lines) == []
+
+
+def test_variant_layout_changes_are_errors():
+    deck = validator('first_begin.i')
+    base = deck.base_lines[86]
+    shifted = list(deck.base_lines)
+    shifted[86] = base.replace('3.303747E-08  ', '  3.303747E-08')
+    retyped = list(deck.base_lines)
+    retyped[86] = base.replace('   4    ', ' 4.5    ', 1)
+    overflow = list(deck.base_lines)
+    overflow[86] = base[:66] + '1.000000E+00' + base[78:]  # 数据写入第73-80列
+    assert "结束于第" in deck.validate_variant(shifted)[0][2]
+    assert "应为" in deck.validate_variant(retyped)[0][2]
+    assert "卡片标识" in deck.validate_variant(overflow)[0][2]
+    assert deck.validate_variant(deck.base_lines[:-1])[0][0] == ERROR
+
+
+def test_validate_design_returns_only_failing_variants():
+    deck = validator('first_begin.i')
+    good = apply_overrides(deck.base_lines, [(87, 1, '5.000000E-08')])
+    bad = list(deck.base_lines)
+    bad[86] = deck.base_lines[86].replace('3.303747E-08', 'abcdefghijkl')
+    problems = deck.validate_design([('good', good), ('bad', bad)])
+    assert list(problems) == ['bad']
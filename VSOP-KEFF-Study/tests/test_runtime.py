@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""keff_runtime 运行时间模型分组测试"""
+
+import pytest
+
+from keff_runtime import RuntimeModel, DEFAULT_SECONDS_PER_POINT, split_deck_key
+from keff_failures import AdaptiveTimeout
+
+VALUES = (1e-7, 2e-7, 3e-7, 4e-7)
+
+
+def make_model(tmp_path):
+    model = RuntimeModel(str(tmp_path / 'history.csv'))
+    for value in VALUES:
+        model.record(value, value, 2.0, 'deck.i:low')
+        model.record(value, value, 3.0, 'deck.i@ZUT')
+    return model
+
+
+def test_split_deck_key():
+    assert split_deck_key('deck.i') == ('deck.i', '', '')
+    assert split_deck_key('deck.i:low') == ('deck.i', 'low', '')
+    assert split_deck_key('deck.i@ZUT') == ('deck.i', '', 'ZUT')
+
+
+def test_other_fidelity_and_backend_records_are_not_borrowed(tmp_path):
+    model = make_model(tmp_path)
+    assert not model.has_history('deck.i')
+    assert model.predict(2e-7, 'deck.i') == DEFAULT_SECONDS_PER_POINT
+    assert model.predict(2e-7, 'other.i') == DEFAULT_SECONDS_PER_POINT
+    # 低保真度的快速运行不会把高保真度的超时设得过短
+    assert AdaptiveTimeout.from_model(model, VALUES, 'deck.i').initial == 600.0
+    assert model.predict(2e-7, 'deck.i:low') == pytest.approx(2.0)
+
+
+def test_variant_groups_borrow_default_solver_records(tmp_path):
+    model = make_model(tmp_path)
+    model.record(1e-7, 1e-7, 200.0, 'deck.i')
+    assert model.predict(1e-7, 'deck.i') == 200.0
+    assert model.predict(1e-7, 'deck.i@sensitivity') == 200.0
+    # 自身记录足够时只用自身记录
+    assert model.predict(1e-7, 'deck.i@ZUT') == pytest.approx(3.0)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""keff_scheduler 调度顺序测试"""
+
+import time
+
+from keff_scheduler import LPTScheduler, FairShareScheduler, PriorityScheduler
+
+DURATIONS = {'a': 8.0, 'b': 7.0, 'c': 6.0, 'd': 5.0, 'e': 4.0}
+
+
+def test_lpt_assigns_longest_first_to_least_loaded():
+    scheduler = LPTScheduler(list(DURATIONS), DURATIONS.get, 2)
+    assert [list(q) for q in scheduler.queues] == [['a', 'd', 'e'], ['b', 'c']]
+    assert scheduler.predicted_makespan == 17.0
+
+
+def test_lpt_takes_own_head_then_steals_shortest_from_busiest():
+    scheduler = LPTScheduler(list(DURATIONS), DURATIONS.get, 2)
+    assert [scheduler.next_job(1), scheduler.next_job(1)] == ['b', 'c']
+    # 自己的队列已空，从剩余工作量最多的队列尾部（最短作业）窃取
+    assert scheduler.next_job(1) == 'e'
+    assert scheduler.steals == 1
+    assert scheduler.next_job(0) == 'a'
+    assert scheduler.pending_jobs() == ['d']
+
+
+def test_lpt_run_executes_every_job_once():
+    scheduler = LPTScheduler(list(DURATIONS), DURATIONS.get, 3)
+    seen = []
+    report = scheduler.run(lambda job: job.upper(), lambda job, result, elapsed: seen.append((job, result)))
+    assert sorted(seen) == [(job, job.upper()) for job in sorted(DURATIONS)]
+    assert report['jobs'] == len(DURATIONS)
+    assert report['unstarted'] == 0
+
+
+def test_fair_share_interleaves_studies_by_weighted_service():
+    jobs = [('big', v) for v in (10.0, 9.0, 8.0, 7.0)] + [('small', v) for v in (2.0, 1.0)]
+    scheduler = FairShareScheduler(jobs, lambda job: job[1], 1)
+    order = [scheduler.next_job(0) for _ in range(len(jobs))]
+    # 每次从已分配工作量最少的研究中取最长作业：小研究不必等大研究算完
+    assert order == [('big', 10.0), ('small', 2.0), ('small', 1.0), ('big', 9.0), ('big', 8.0), ('big', 7.0)]
+    assert scheduler.next_job(0) is None
+
+
+def test_fair_share_weights_favour_higher_priority_study():
+    jobs = [('a', 1.0 + k / 10) for k in range(6)] + [('b', 1.0 + k / 10) for k in range(6)]
+    scheduler = FairShareScheduler(jobs, lambda job: job[1], 1, weights={'a': 2.0})
+    first = [scheduler.next_job(0)[0] for _ in range(6)]
+    assert first.count('a') == 4
+
+
+def test_priority_scheduler_orders_by_priority_then_arrival():
+    scheduler = PriorityScheduler(['a', 'b', 'c'], lambda job: 1.0, 1)
+    assert scheduler.add('d', priority=5)
+    assert not scheduler.add('a')
+    assert scheduler.set_priority('c', 3)
+    assert scheduler.pending_jobs() == ['d', 'c', 'a', 'b']
+    assert scheduler.next_job(0) == 'd'
+    assert scheduler.cancel('a') == 'queued'
+    assert scheduler.cancel('d') == 'running'
+    assert scheduler.cancel('zz') is None
+    scheduler.finish_job('d')
+    assert [scheduler.next_job(0), scheduler.next_job(0)] == ['c', 'b']
+    scheduler.finish_job('c')
+    scheduler.finish_job('b')
+    assert scheduler.next_job(0) is None
+
+
+def test_priority_scheduler_runs_jobs_added_while_running():
+    scheduler = PriorityScheduler([1, 2], lambda job: 1.0, 2)
+    done = []
+
+    def on_result(job, result, elapsed):
+        done.append(job)
+        if job == 1:
+            scheduler.add(3)
+
+    def work(job):
+        if job == 2:
+            time.sleep(0.5)  # 作业1完成并加入作业3时仍有作业在执行，线程池不会退出
+        return job
+
+    scheduler.run(work, on_result)
+    assert sorted(done) == [1, 2, 3]
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""keff_search 临界搜索在合成keff(x)上的收敛测试"""
+
+import math
+import os
+import shutil
+
+from keff_preflight import DeckValidator
+from keff_search import CriticalitySearch
+from keff_store import ResultsStore
+from keff_study_simple import KeffStudySimple
+
+STUDY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROOT = 3e-7
+
+
+def linear_keff(value):
+    # keff随log10(参数值)线性下降，在ROOT处为1.0
+    return 1.0 - 0.1 * (math.log10(value) - math.log10(ROOT))
+
+
+def curved_keff(value):
+    x = math.log10(value) - math.log10(ROOT)
+    return 1.0 - 0.08 * x - 0.03 * x ** 2 + 0.01 * x ** 3
+
+
+def evaluator(keff, calls=None):
+    def evaluate(values):
+        if calls is not None:
+            calls.append(list(values))
+        return {value: keff(value) for value in values}
+    return evaluate
+
+
+def test_converges_on_linear_keff():
+    result = CriticalitySearch(evaluator(linear_keff), 1.0, 1e-8, 1e-6, tolerance=1e-4).run()
+    assert result['converged']
+    assert result['message'] is None
+    assert abs(result['keff'] - 1.0) <= 1e-4
+    assert abs(math.log10(result['value'] / ROOT)) < 2e-3
+    assert result['runs'] <= 4
+
+
+def test_converges_on_curved_keff_with_parallel_rounds():
+    calls = []
+    search = CriticalitySearch(evaluator(curved_keff, calls), 1.0, 1e-8, 1e-6, tolerance=1e-5,
+                               points_per_round=3, max_runs=30)
+    result = search.run()
+    assert result['converged']
+    assert abs(curved_keff(result['value']) - 1.0) <= 1e-5
+    assert all(len(values) <= 3 for values in calls)
+    low, high = result['bracket']
+    assert low < ROOT < high
+
+
+def test_expands_when_target_is_outside_initial_range():
+    result = CriticalitySearch(evaluator(linear_keff), 1.0, 1e-8, 1e-7, tolerance=1e-4).run()
+    assert result['converged']
+    assert abs(math.log10(result['value'] / ROOT)) < 2e-3
+    assert max(value for _, value, _ in result['history']) > 1e-7
+
+
+def test_stops_when_initial_points_fail():
+    result = CriticalitySearch(lambda values: {}, 1.0, 1e-8, 1e-6).run()
+    assert not result['converged']
+    assert result['value'] is None
+    assert result['message'] == "初始点计算失败，无法开始搜索"
+
+
+def test_run_search_preflights_every_new_point(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(os.path.join(STUDY_DIR, 'first_begin.i'), tmp_path)
+    shutil.copytree(os.path.join(STUDY_DIR, 'Libraries'), tmp_path / 'Libraries')
+    study = KeffStudySimple()
+    study.enable_visualization = False
+    study.store = ResultsStore(str(tmp_path / 'store.jsonl'))
+    study.max_workers = 2
+
+    # 第87行参数值大于2e-7的输入视为未通过预检，区间向上扩展时得到的点都应被跳过
+    validate_variant = DeckValidator.validate_variant
+
+    def reject_large_values(validator, lines):
+        if float(lines[study.target_line_1 - 1].split()[1]) > 2e-7:
+            return [('error', study.target_line_1, "synthetic")]
+        return validate_variant(validator, lines)
+
+    solved = []
+
+    def fake_batch(values, fidelity=None, progress_total=None, label=None):
+        solved.extend(values)
+        return {value: {'keff': linear_keff(value)} for value in values}
+
+    monkeypatch.setattr(DeckValidator, 'validate_variant', reject_large_values)
+    monkeypatch.setattr(study, 'run_batch', fake_batch)
+    result = study.run_search(target=1.0, lower=1e-8, upper=1e-7, max_runs=8)
+
+    assert solved and max(solved) <= 2e-7
+    skipped = [value for _, value, keff in result['history'] if keff is None]
+    assert skipped and min(skipped) > 2e-7
+    assert not result['converged']
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""keff_sensitivity Morris基本效应在已知函数上的测试"""
+
+import math
+
+import pytest
+
+from keff_sensitivity import DeckField, MorrisDesign, MorrisEstimate
+
+
+def run_trajectories(fields, keff, trajectories, seed=1, estimate=None):
+    design = MorrisDesign(fields, levels=4, seed=seed)
+    estimate = estimate or MorrisEstimate(fields, max_trajectories=trajectories)
+    for _ in range(trajectories):
+        points, order = design.trajectory()
+        values = [tuple(field.value(u) for field, u in zip(fields, point)) for point in points]
+        estimate.add(values, order, [keff(v) for v in values])
+    return estimate
+
+
+def test_trajectory_changes_one_field_per_step():
+    fields = [DeckField(1, 0, 0.0, 1.0), DeckField(2, 0, 0.0, 1.0), DeckField(3, 0, 0.0, 1.0)]
+    design = MorrisDesign(fields, levels=4, seed=7)
+    points, order = design.trajectory()
+    assert sorted(order) == [0, 1, 2]
+    for step, index in enumerate(order):
+        before, after = points[step], points[step + 1]
+        changed = [i for i in range(3) if before[i] != after[i]]
+        assert changed == [index]
+        assert abs(after[index] - before[index]) == pytest.approx(design.delta)
+        assert 0.0 <= after[index] <= 1.0
+
+
+def test_linear_function_gives_exact_mu_star_and_zero_sigma():
+    fields = [DeckField(1, 0, 0.0, 2.0, name='strong'), DeckField(2, 0, 10.0, 20.0, name='weak')]
+    # 字段从下限变到上限时keff变化 +0.04 和 -0.005
+    estimate = run_trajectories(fields, lambda v: 1.0 + 0.02 * v[0] - 0.0005 * v[1], 6)
+    strong, weak = estimate.summary(0), estimate.summary(1)
+    assert strong['n'] == weak['n'] == 6
+    assert strong['mu_star'] == pytest.approx(0.04)
+    assert strong['mu'] == pytest.approx(0.04)
+    assert weak['mu_star'] == pytest.approx(0.005)
+    assert weak['mu'] == pytest.approx(-0.005)
+    assert strong['sigma'] == pytest.approx(0.0, abs=1e-12)
+    assert strong['half_width'] == pytest.approx(0.0, abs=1e-12)
+    assert [field.name for field, _ in estimate.ranking()] == ['strong', 'weak']
+
+
+def test_nonlinear_field_has_spread_and_log_field_uses_unit_scale():
+    fields = [DeckField(1, 0, 0.0, 1.0, name='quad'), DeckField(2, 0, 1e-8, 1e-6, log=True, name='log')]
+
+    def keff(v):
+        # log字段：keff与log10(值)线性相关，跨两个数量级变化0.01
+        return 1.0 + 0.03 * v[0] ** 2 + 0.005 * (math.log10(v[1]) + 8)
+
+    estimate = run_trajectories(fields, keff, 20)
+    quad, log = estimate.summary(0), estimate.summary(1)
+    assert quad['sigma'] > 0.1 * quad['mu_star']
+    assert 0.0 < quad['mu_star'] < 0.06
+    assert log['mu_star'] == pytest.approx(0.01)
+    assert log['sigma'] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_failed_points_are_counted_and_skipped():
+    fields = [DeckField(1, 0, 0.0, 1.0), DeckField(2, 0, 0.0, 1.0)]
+    estimate = MorrisEstimate(fields)
+    values = [(0.0, 0.0), (2 / 3, 0.0), (2 / 3, 2 / 3)]
+    estimate.add(values, [0, 1], [1.0, None, 1.01])
+    assert estimate.failures == 2
+    assert estimate.summary(0)['n'] == estimate.summary(1)['n'] == 0
+
+
+def test_stops_once_confidence_interval_is_tight():
+    fields = [DeckField(1, 0, 0.0, 1.0), DeckField(2, 0, 0.0, 1.0)]
+    estimate = MorrisEstimate(fields, min_trajectories=4, max_trajectories=50)
+    assert estimate.done() == (False, None)
+    run_trajectories(fields, lambda v: 1.0 + 0.01 * v[0] + 0.002 * v[1], 4, estimate=estimate)
+    stop, reason = estimate.done()
+    assert stop and "置信区间" in reason
+
+
+def test_format_keeps_original_field_style():
+    field = DeckField(1, 0, 1e-5, 1e-3, log=True)
+    assert field.format(2.5e-4, '3.303747E-08') == ('2.500000E-04', 2.5e-4)
+    assert field.format(2.5e-4, '1.0D-04')[0] == '2.5D-04'
+    assert field.format(7.6, '4') == ('8', 8.0)
+    # 原值的小数位数不足以表示新值时改用科学计数法
+    text, actual = field.format(1e-5, '0.0001')
+    assert actual == pytest.approx(1e-5)
+    assert 'E' in text
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""keff_stats 增量统计（Welford）和P²流式分位数与statistics/numpy结果的对比测试"""
+
+import random
+import statistics
+
+import pytest
+
+from keff_stats import P2Quantile, KeffStatistics
+
+BASELINE = 1.22370
+SIGMA = 3e-3
+
+
+def sample(n, seed=20240611):
+    rng = random.Random(seed)
+    return [rng.gauss(BASELINE, SIGMA) for _ in range(n)]
+
+
+def fill(values):
+    stats = KeffStatistics(BASELINE)
+    for i, keff in enumerate(values):
+        stats.update(1e-7 * (i + 1), 1e-7 * (i + 1) / 1.59, keff)
+    return stats
+
+
+def test_moments_match_statistics():
+    values = sample(2000)
+    stats = fill(values)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values), abs=1e-12)
+    assert stats.std == pytest.approx(statistics.pstdev(values), rel=1e-9)
+    assert stats.sample_variance == pytest.approx(statistics.variance(values), rel=1e-9)
+    assert (stats.min_keff, stats.max_keff) == (min(values), max(values))
+    assert stats.reference_keff == values[0]
+    assert stats.avg_deviation == pytest.approx(statistics.fmean(values) - BASELINE, abs=1e-12)
+
+
+def test_streaming_quartiles_close_to_exact():
+    values = sample(2000)
+    stats = fill(values)
+    exact = statistics.quantiles(values, n=4, method='inclusive')
+    # P²只保存5个标记点，误差取标准差的5%
+    for q, expected in zip((0.25, 0.5, 0.75), exact):
+        assert stats.quantile(q) == pytest.approx(expected, abs=0.05 * SIGMA)
+    assert stats.median == stats.quantile(0.5)
+    assert stats.quantile(0.9) is None
+
+
+def test_streaming_quantiles_match_numpy():
+    np = pytest.importorskip('numpy')
+    values = sample(5000, seed=7)
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        estimator = P2Quantile(q)
+        for x in values:
+            estimator.update(x)
+        assert estimator.value() == pytest.approx(np.percentile(values, 100 * q), abs=0.05 * SIGMA)
+    stats = fill(values)
+    assert stats.mean == pytest.approx(float(np.mean(values)), abs=1e-12)
+    assert stats.std == pytest.approx(float(np.std(values)), rel=1e-9)
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 4, 5])
+def test_small_samples_use_sorted_values(n):
+    values = sample(n, seed=n)
+    ordered = sorted(values)
+    for q in (0.25, 0.5, 0.75):
+        estimator = P2Quantile(q)
+        for x in values:
+            estimator.update(x)
+        assert estimator.value() == ordered[int(round(q * (n - 1)))]
+    stats = fill(values)
+    if n % 2:
+        assert stats.median == statistics.median(values)
+    assert stats.mean == pytest.approx(statistics.fmean(values), abs=1e-12)
+    if n == 1:
+        assert stats.std == 0.0 and stats.sample_variance == 0.0
+        assert stats.max_change_percent == 0.0
+    else:
+        assert stats.sample_variance == pytest.approx(statistics.variance(values), rel=1e-9)
+
+
+def test_empty_statistics():
+    stats = KeffStatistics(BASELINE)
+    assert P2Quantile(0.5).value() is None
+    assert stats.median is None
+    assert stats.variance == stats.sample_variance == stats.std == 0.0
+    assert stats.keff_range == 0.0
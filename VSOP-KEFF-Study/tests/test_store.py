@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""keff_store 参数扫描记录与变体运行记录的区分测试"""
+
+import pytest
+
+from keff_store import ResultsStore, point_key, STATUS_OK, STATUS_QUARANTINED, VARIANT_FIELDS
+
+DECK = 'first_begin.i'
+VALUE = 1e-7
+
+
+def record(status, **extra):
+    return {'deck': DECK, 'point': point_key(VALUE), 'parameter_value_1': VALUE, 'status': status, **extra}
+
+
+@pytest.mark.parametrize('field', VARIANT_FIELDS)
+def test_variant_records_are_not_sweep_results(tmp_path, field):
+    store = ResultsStore(str(tmp_path / 'store.jsonl'))
+    store.append(record(STATUS_OK, keff=1.2, **{field: 1}))
+    store.append(record(STATUS_QUARANTINED, failure='crash', **{field: 2}))
+    assert store.completed(DECK) == {}
+    assert store.quarantined(DECK) == {}
+
+
+def test_sweep_records_are_completed_and_quarantined(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store.jsonl'))
+    store.append(record(STATUS_QUARANTINED, failure='crash'))
+    assert list(store.quarantined(DECK)) == [point_key(VALUE)]
+    store.append(record(STATUS_OK, keff=1.2))
+    assert store.quarantined(DECK) == {}
+    assert store.completed(DECK)[point_key(VALUE)]['keff'] == 1.2
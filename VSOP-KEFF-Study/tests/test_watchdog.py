@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""keff_watchdog 求解程序stdout/stderr日志（StreamLog）测试：内存中只保留末尾、gzip日志完整、空日志删除"""
+
+import gzip
+import os
+import subprocess
+import sys
+
+import pytest
+
+from keff_store import ResultsStore
+from keff_study_simple import KeffStudySimple
+from keff_watchdog import SolverWatchdog, StreamLog, WAIT_OK
+
+TAIL = 4096
+
+# 模拟求解程序：读取输入后在stdout输出大量内容，stderr不输出
+NOISY_SOLVER = """
+import sys
+sys.stdin.read()
+for i in range({lines}):
+    print(f"iteration {{i}} " + "x" * 50)
+"""
+
+
+def expected_stdout(lines):
+    return "".join(f"iteration {i} " + "x" * 50 + "\n" for i in range(lines))
+
+
+def read_gzip(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_large_stream_keeps_tail_and_full_gzip_log(tmp_path):
+    path = str(tmp_path / 'logs' / 'run.stdout.gz')
+    log = StreamLog(path, tail_limit=TAIL)
+    text = expected_stdout(20000)
+    for start in range(0, len(text), 8192):
+        log.write(text[start:start + 8192])
+    assert log.tail() == text[-TAIL:]
+    assert log._tail_size < TAIL + 8192
+    log.close()
+    assert log.total == len(text)
+    assert log.path == path
+    assert read_gzip(path) == text
+
+
+def test_short_stream_tail_is_whole_text(tmp_path):
+    log = StreamLog(str(tmp_path / 'run.stderr.gz'), tail_limit=TAIL)
+    log.write("fatal: boom\n")
+    assert log.tail() == "fatal: boom\n"
+    log.close()
+    assert read_gzip(log.path) == "fatal: boom\n"
+
+
+def test_empty_stream_log_is_deleted(tmp_path):
+    path = str(tmp_path / 'run.stderr.gz')
+    log = StreamLog(path, tail_limit=TAIL)
+    assert os.path.exists(path)
+    log.close()
+    assert log.path is None
+    assert not os.path.exists(path)
+    assert log.tail() == ""
+    log.close()  # 重复关闭无影响
+
+
+def test_without_path_only_keeps_tail():
+    log = StreamLog(None, tail_limit=10)
+    log.write("0123456789abcdef")
+    log.close()
+    assert log.path is None
+    assert log.tail() == "6789abcdef"
+
+
+def test_watchdog_pipes_large_and_empty_streams(tmp_path):
+    script = tmp_path / 'solver.py'
+    script.write_text(NOISY_SOLVER.format(lines=20000), encoding='utf-8')
+    process = subprocess.Popen([sys.executable, str(script)], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, text=True, cwd=str(tmp_path))
+    process.stdin.close()
+    prefix = str(tmp_path / 'logs' / 'run')
+    watchdog = SolverWatchdog(process, str(tmp_path / 'none.out'), poll_interval=0.1, log_prefix=prefix,
+                              tail_limit=TAIL)
+    assert watchdog.wait(60) == WAIT_OK
+    text = expected_stdout(20000)
+    assert watchdog.stdout_log.tail() == text[-TAIL:]
+    assert read_gzip(prefix + '.stdout.gz') == text
+    assert watchdog.stderr_log.path is None
+    assert not os.path.exists(prefix + '.stderr.gz')
+    assert watchdog.stderr_text == ""
+
+
+@pytest.fixture
+def study(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    automation = KeffStudySimple()
+    automation.enable_visualization = False
+    automation.store = ResultsStore(str(tmp_path / 'store.jsonl'))
+    automation.logs_dir = str(tmp_path / 'logs')
+    return automation
+
+
+def test_run_solver_records_log_paths(study, tmp_path):
+    script = tmp_path / 'solver.py'
+    script.write_text(NOISY_SOLVER.format(lines=2000), encoding='utf-8')
+    usage = {}
+    output_file, failure, _ = study.run_solver(1e-7, str(tmp_path), timeout=60,
+                                               program=[sys.executable, str(script)], usage=usage)
+    assert failure is None
+    assert output_file == "1.000000E-07.out"
+    assert read_gzip(usage['stdout_log']) == expected_stdout(2000)
+    assert usage['stderr_log'] is None
+    assert os.listdir(study.logs_dir) == [os.path.basename(usage['stdout_log'])]
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VSOP输出文件解析模块
+提供不依赖matplotlib的keff提取函数，可在多进程工作进程中直接调用
+安装了numpy时可把整张K-EFF表解析为结构化数组（各燃耗步的功率密度、燃料温度、卸料燃耗等）
+
+输出文件（每个约20MB）第一次解析时建立段落索引：记录已知段落标题行的字节偏移，
+保存为同名的 .idx 旁路文件；之后的提取直接定位到段落，只读取需要的字节
+
+流式输出（OutputFifo）：输出文件名换成命名管道，求解程序写出的内容边写边解析，
+只把已知表格的段落（可选再加完整输出的gzip副本）写到磁盘，省去每次运行完整输出的写入和读回
+"""
+
+import os
+import gzip
+import json
+import mmap
+import re
+import stat
+import shutil
+import threading
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# K-EFF表标题行，keff位于标题行下方第3行的第3个字段
+KEFF_TABLE_HEADER = "TIME (D)   K-EFF    POW-DENS   POW/BALL   FUEL TEMP    DISCH.-BU   POWER    TEMP.   TEMP."
+KEFF_ROW_OFFSET = 3
+KEFF_FIELD_INDEX = 2
+
+NO_KEFF_TABLE_ERROR = "未找到K-EFF标题行"
+
+# 建立索引的段落 {名称: 标题行中的文本}，需要定位其他输出块时在此添加
+SECTION_HEADERS = {
+    'keff_table': KEFF_TABLE_HEADER,
+}
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+
+# K-EFF表各列 (字段名, 数据行中的字段序号, 类型)，数据行第1个字段为燃耗步序号
+KEFF_TABLE_COLUMNS = (
+    ('step', 0, 'f8'),
+    ('time_d', 1, 'f8'),         # TIME (D)
+    ('keff', 2, 'f8'),           # K-EFF
+    ('pow_dens', 3, 'f8'),       # POW-DENS (W/CC)
+    ('pow_ball', 4, 'f8'),       # POW/BALL (KW)
+    ('fuel_temp_max', 5, 'f8'),  # FUEL TEMP MAX (C)
+    ('disch_bu', 6, 'f8'),       # DISCH.-BU (MWD/T)
+    ('power', 7, 'f8'),          # POWER (MW)
+    ('temp_in', 8, 'f8'),        # TEMP. IN(C)
+    ('temp_out', 9, 'f8'),       # TEMP. OUT(C)
+)
+
+# 可解析的表格 {段落名称: (第一个数据行相对标题行的行数, 列定义)}，段落标题见SECTION_HEADERS
+TABLE_SPECS = {
+    'keff_table': (KEFF_ROW_OFFSET, KEFF_TABLE_COLUMNS),
+}
+
+# 结果中随keff一起记录的运行状态（K-EFF表第一个数据行，即keff所在的行）
+STATE_FIELDS = tuple(name for name, _, _ in KEFF_TABLE_COLUMNS if name not in ('step', 'keff'))
+
+# 运行状态在结果CSV中的列名
+STATE_LABELS = {
+    'time_d': 'Time_D',
+    'pow_dens': 'Pow_Dens_W_cc',
+    'pow_ball': 'Pow_Ball_kW',
+    'fuel_temp_max': 'Fuel_Temp_Max_C',
+    'disch_bu': 'Disch_BU_MWd_t',
+    'power': 'Power_MW',
+    'temp_in': 'Temp_In_C',
+    'temp_out': 'Temp_Out_C',
+    'burnup_steps': 'Burnup_Steps',
+}
+
+_NUMBER_PATTERN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([EeDd][+-]?\d+)?$')
+
+
+def parse_keff_lines(lines):
+    """从输出文件的行列表中解析keff值
+
+    Returns:
+        (keff, error): 成功时error为None，失败时keff为None
+    """
+    for i, line in enumerate(lines):
+        if KEFF_TABLE_HEADER in line:
+            target_index = i + KEFF_ROW_OFFSET
+            if target_index >= len(lines):
+                return None, "标题行下方第3行超出文件范围"
+            parts = lines[target_index].split()
+            if len(parts) <= KEFF_FIELD_INDEX:
+                return None, f"数据行格式不正确，仅有{len(parts)}个字段"
+            try:
+                return float(parts[KEFF_FIELD_INDEX]), None
+            except ValueError:
+                return None, f"无法解析keff值 '{parts[KEFF_FIELD_INDEX]}'"
+    return None, NO_KEFF_TABLE_ERROR
+
+
+class KeffTableProgress:
+    """增量解析正在写入的输出文件，跟踪K-EFF表已经输出到第几个燃耗步
+
+    按块调用feed()传入新增文本，末尾不完整的行留到下一块再处理
+    """
+
+    def __init__(self):
+        self.steps = 0
+        self.last_time = None
+        self.last_keff = None
+        self._partial = ''
+        self._rows_after_header = None  # 找到标题行之前为None
+        self._table_ended = False
+
+    def feed(self, text):
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, line):
+        if self._table_ended:
+            return
+        if self._rows_after_header is None:
+            if KEFF_TABLE_HEADER in line:
+                self._rows_after_header = 0
+            return
+        self._rows_after_header += 1
+        if self._rows_after_header < KEFF_ROW_OFFSET:
+            return
+        parts = line.split()
+        try:
+            time_d = float(parts[KEFF_FIELD_INDEX - 1])
+            keff = float(parts[KEFF_FIELD_INDEX])
+        except (IndexError, ValueError):
+            if self.steps > 0:
+                self._table_ended = True
+            return
+        self.steps += 1
+        self.last_time = time_d
+        self.last_keff = keff
+
+
+def index_path(output_path):
+    return output_path + INDEX_SUFFIX
+
+
+def build_section_index(output_path, headers=None):
+    """扫描一次输出文件，返回 {段落名称: [标题行起始字节偏移, ...]}
+
+    用mmap在整个文件中直接查找各标题文本，不逐行解码
+    """
+    headers = SECTION_HEADERS if headers is None else headers
+    sections = {name: [] for name in headers}
+    if os.path.getsize(output_path) == 0:
+        return sections
+    with open(output_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for name, header in headers.items():
+            needle = header.encode('utf-8')
+            pos = mm.find(needle)
+            while pos >= 0:
+                line_start = mm.rfind(b'\n', 0, pos) + 1
+                sections[name].append(line_start)
+                pos = mm.find(needle, pos + len(needle))
+    return sections
+
+
+def load_section_index(output_path, headers=None):
+    """读取旁路索引；索引不存在、已过期（输出文件大小或修改时间不同）或段落定义不同时返回None"""
+    headers = SECTION_HEADERS if headers is None else headers
+    try:
+        with open(index_path(output_path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        st = os.stat(output_path)
+    except (OSError, ValueError):
+        return None
+    if (index.get('version') != INDEX_VERSION or index.get('size') != st.st_size
+            or index.get('mtime_ns') != st.st_mtime_ns or index.get('headers') != headers):
+        return None
+    return index['sections']
+
+
+def section_index(output_path, headers=None, write=True):
+    """返回输出文件的段落索引，没有可用的旁路索引时扫描一次并写入
+
+    输出目录只读（如已归档的研究）时不写入，仍返回扫描结果
+    """
+    headers = SECTION_HEADERS if headers is None else headers
+    sections = load_section_index(output_path, headers)
+    if sections is not None:
+        return sections
+    st = os.stat(output_path)
+    sections = build_section_index(output_path, headers)
+    if write:
+        index = {
+            'version': INDEX_VERSION,
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'headers': headers,
+            'sections': sections,
+        }
+        try:
+            with open(index_path(output_path), 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        except OSError:
+            pass
+    return sections
+
+
+def iter_section_lines(output_path, name, occurrence=0, sections=None):
+    """从段落标题行开始逐行读取输出文件（含标题行），段落不存在时返回None
+
+    Args:
+        name: SECTION_HEADERS中的段落名称
+        occurrence: 段落在文件中多次出现时取第几次
+    """
+    if sections is None:
+        sections = section_index(output_path)
+    offsets = sections.get(name) or []
+    if occurrence >= len(offsets):
+        return None
+    return _lines_from(output_path, offsets[occurrence])
+
+
+def _lines_from(output_path, offset):
+    with open(output_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        f.seek(offset)
+        yield from f
+
+
+def read_section_lines(output_path, name, max_lines=None, occurrence=0, sections=None):
+    """从段落标题行开始读取最多max_lines行（含标题行），段落不存在时返回None"""
+    lines = iter_section_lines(output_path, name, occurrence, sections)
+    if lines is None:
+        return None
+    return list(islice(lines, max_lines))
+
+
+def read_keff(output_path):
+    """通过段落索引提取keff，只读取K-EFF表标题行和其下的几行
+
+    Returns:
+        (keff, error)，与parse_keff_lines相同
+    """
+    lines = read_section_lines(output_path, 'keff_table', max_lines=KEFF_ROW_OFFSET + 1)
+    if lines is None:
+        return None, NO_KEFF_TABLE_ERROR
+    return parse_keff_lines(lines)
+
+
+def _is_table_row(parts, required):
+    return len(parts) >= required and _NUMBER_PATTERN.match(parts[0]) is not None
+
+
+def parse_table_lines(lines, columns, row_offset=KEFF_ROW_OFFSET):
+    """把表格解析为numpy结构化数组，每个燃耗步一行
+
+    数据行从标题行下方第row_offset行开始，到第一个字段数不足或首字段不是数值的行结束；
+    全部数据行的字段先组成一个字符串数组，再按列一次性转换类型
+
+    Args:
+        lines: 从标题行开始的行（列表或迭代器，读到表格结束即停止）
+        columns: 列定义 ((字段名, 字段序号, 类型), ...)
+
+    Returns:
+        (table, error)，成功时error为None
+    """
+    if np is None:
+        return None, "解析表格需要numpy"
+    required = max(index for _, index, _ in columns) + 1
+    rows = []
+    for line in islice(lines, row_offset, None):
+        parts = line.split()
+        if not _is_table_row(parts, required):
+            break
+        rows.append(parts[:required])
+
+    # 表格后紧跟的文本行恰好以数值开头且字段足够时，截断到第一个含非数值字段的行之前
+    for count, parts in enumerate(rows):
+        if not all(_NUMBER_PATTERN.match(parts[index]) for _, index, _ in columns):
+            del rows[count:]
+            break
+    if not rows:
+        return None, f"标题行下方第{row_offset}行不是数据行"
+
+    tokens = np.array(rows)
+    table = np.empty(len(rows), dtype=[(name, dtype) for name, _, dtype in columns])
+    for name, index, dtype in columns:
+        table[name] = np.char.replace(tokens[:, index], 'D', 'E').astype(dtype)
+    return table, None
+
+
+def read_table(output_path, name='keff_table', sections=None):
+    """通过段落索引读取并解析输出文件中的一张表（见TABLE_SPECS），只读取到表格结束
+
+    Returns:
+        (table, error)，table为numpy结构化数组
+    """
+    row_offset, columns = TABLE_SPECS[name]
+    lines = iter_section_lines(output_path, name, sections=sections)
+    if lines is None:
+        return None, NO_KEFF_TABLE_ERROR if name == 'keff_table' else f"未找到段落 {name}"
+    try:
+        return parse_table_lines(lines, columns, row_offset)
+    finally:
+        lines.close()
+
+
+def operating_state(table, row=0):
+    """表格中一行的运行状态 {字段名: 数值}，附带燃耗步数，供写入结果记录"""
+    state = {name: float(table[name][row]) for name in STATE_FIELDS if name in table.dtype.names}
+    state['burnup_steps'] = len(table)
+    return state
+
+
+def read_operating_state(output_path):
+    """读取keff所在行的运行状态，无法解析（或没有numpy）时返回空字典"""
+    table, error = read_table(output_path)
+    return operating_state(table) if error is None else {}
+
+
+class OutputExtractor:
+    """从正在写出的输出流中截取已知表格的段落（SECTION_HEADERS中有TABLE_SPECS的段落）
+
+    按块调用feed()传入新增字节，同时跟踪K-EFF表的燃耗步进度；
+    截取的段落写成的文件可以像完整输出文件一样用read_keff、read_table读取
+
+    Args:
+        archive: 可选，完整输出的gzip压缩副本路径
+    """
+
+    def __init__(self, archive=None):
+        self.progress = KeffTableProgress()
+        self.received = 0  # 已收到的字节数
+        self.sections = []  # 截取的段落，每个为从标题行开始的文本行列表
+        self._current = None  # 正在截取的段落 [行列表, 数据行需要的字段数, 第一个数据行相对标题行的行数]
+        self._partial = b''
+        self._archive = gzip.open(archive, 'wb', compresslevel=6) if archive else None
+
+    def feed(self, data):
+        self.received += len(data)
+        if self._archive is not None:
+            self._archive.write(data)
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        self._feed_lines(lines)
+
+    def _feed_lines(self, lines):
+        if not lines:
+            return
+        text = [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines]
+        self.progress.feed('\n'.join(text) + '\n')
+        for line in text:
+            self._capture(line)
+
+    def _capture(self, line):
+        if self._current is not None:
+            lines, required, row_offset = self._current
+            if len(lines) < row_offset or _is_table_row(line.split(), required):
+                lines.append(line)
+                return
+            self._current = None
+        for name, header in SECTION_HEADERS.items():
+            if name in TABLE_SPECS and header in line:
+                row_offset, columns = TABLE_SPECS[name]
+                self._current = [[line], max(index for _, index, _ in columns) + 1, row_offset]
+                self.sections.append(self._current[0])
+                return
+
+    def close(self):
+        """处理末尾没有换行的行，关闭压缩副本"""
+        if self._partial:
+            self._feed_lines([self._partial])
+            self._partial = b''
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def write(self, path):
+        """把截取的段落写入文件（段落之间空一行）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for section in self.sections:
+                f.write('\n'.join(section) + '\n\n')
+
+
+class OutputFifo:
+    """把输出文件路径换成命名管道，在后台线程中边读边解析
+
+    求解程序结束后调用finish()：截取的段落写到原输出文件路径，后续的keff提取照常进行。
+    求解程序删除管道重新创建普通文件时（如以REPLACE方式打开输出文件）保留该文件，按普通输出处理
+
+    Args:
+        path: 输出文件路径
+        archive: 为True时另存完整输出的gzip副本（<输出文件>.gz）
+    """
+
+    def __init__(self, path, archive=False):
+        self.path = path
+        self.archive_path = path + '.gz' if archive else None
+        self.extractor = OutputExtractor(self.archive_path)
+        self.error = None
+        os.mkfifo(path)
+        # 自己先持有一个写端：求解程序打开、关闭输出文件之前读端不会读到文件结束，
+        # 求解程序从未打开输出文件时关闭这个写端即可结束读线程
+        read_fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        self._write_fd = os.open(path, os.O_WRONLY)
+        os.set_blocking(read_fd, True)
+        self._reader = threading.Thread(target=self._read, args=(read_fd,), daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def supported():
+        return hasattr(os, 'mkfifo')
+
+    @property
+    def progress(self):
+        return self.extractor.progress
+
+    @property
+    def received(self):
+        return self.extractor.received
+
+    def _read(self, read_fd):
+        try:
+            with open(read_fd, 'rb', buffering=0) as f:
+                while True:
+                    data = f.read(1 << 16)
+                    if not data:
+                        break
+                    self.extractor.feed(data)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.extractor.close()
+
+    def finish(self, timeout=30):
+        """求解程序结束后调用：等待读完管道，把截取的段落写到输出文件路径
+
+        Returns:
+            是否按流式输出处理（False表示管道已被普通文件替换或读取出错）
+        """
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+            self._write_fd = None
+        self._reader.join(timeout)
+        try:
+            is_fifo = stat.S_ISFIFO(os.stat(self.path).st_mode)
+        except OSError:
+            is_fifo = False
+        if not is_fifo:
+            return False
+        os.remove(self.path)
+        if self.error is not None:
+            return False
+        self.extractor.write(self.path)
+        return True
+
+
+def move_with_index(source, target):
+    """移动输出文件，旁路索引随之移动"""
+    shutil.move(source, target)
+    if os.path.exists(index_path(source)):
+        shutil.move(index_path(source), index_path(target))
+
+
+def parameter_from_filename(name):
+    """从输出文件名（如 4.000000E-08.out）还原第87行参数值，无法解析时返回None"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    try:
+        return float(stem)
+    except ValueError:
+        return None
+
+
+def parse_output_task(task):
+    """多进程解析任务：读取一个输出文件并返回结果记录
+
+    Args:
+        task: (kind, source, member)
+            kind为'file'时source是文件路径；
+            kind为'zip'时source是压缩包路径，member是包内文件名
+    """
+    kind, source, member = task
+    name = member if kind == 'zip' else source
+    record = {
+        'output_file': os.path.basename(name),
+        'parameter_value_1': parameter_from_filename(name),
+        'keff': None,
+        'state': {},
+        'error': None,
+    }
+    try:
+        if kind == 'zip':
+            # 压缩包成员不能随机读取，整体解压后解析
+            import zipfile
+            with zipfile.ZipFile(source) as zf:
+                text = zf.read(member).decode('utf-8', errors='replace')
+            lines = text.splitlines()
+            record['keff'], record['error'] = parse_keff_lines(lines)
+            header = next((i for i, line in enumerate(lines) if KEFF_TABLE_HEADER in line), None)
+            if header is not None:
+                table, error = parse_table_lines(lines[header:], KEFF_TABLE_COLUMNS)
+                if error is None:
+                    record['state'] = operating_state(table)
+        else:
+            # 一次解析K-EFF表同时得到keff和运行状态；不能整体解析（如没有numpy）时只提取keff
+            table, error = read_table(source)
+            if error is None:
+                record['keff'] = float(table['keff'][0])
+                record['state'] = operating_state(table)
+            elif error == NO_KEFF_TABLE_ERROR:
+                record['error'] = error
+            else:
+                record['keff'], record['error'] = read_keff(source)
+    except Exception as e:
+        record['error'] = str(e)
+    return record